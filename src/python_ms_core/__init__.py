@@ -4,12 +4,19 @@ from .core.logger.logger import Logger
 from .core.logger.local_logger import LocalLogger
 from .core.topic.topic import Topic
 from .core.topic.azure_topic import AzureTopic
+from .core.topic.async_azure_topic import AsyncAzureTopic
 from .core.topic.local_topic import LocalTopic
 from .core.storage.providers.azure.azure_storage_client import AzureStorageClient
 from .core.storage.providers.local.local_storage_client import LocalStorageClient
 from .core.auth.provider.hosted.hosted_authorizer import HostedAuthorizer
 from .core.auth.provider.simulated.simulated_authorizer import SimulatedAuthorizer
 from .core.config.config import CoreConfig, LocalConfig, AuthConfig, UnknownConfig
+from .core.connection_registry import ConnectionRegistry
+from .core.topic.admission_policy import MemoryAdmissionPolicy
+from .core.topic.consumer_host import TopicConsumerHost
+from .core.topic.idempotency_cache import IdempotencyCache, SqliteIdempotencyBackend
+from .core.topic.retry_policy import RetryPolicy
+from .core.topic.receive_supervisor import ReceiveSupervisor
 from .version import __version__
 
 LOCAL_ENV = 'LOCAL'
@@ -20,6 +27,7 @@ SIMULATED_ENV = 'SIMULATED'
 
 class Core:
     def __init__(self, config=None):
+        self.connections = ConnectionRegistry()
         if config is not None:
             if config.upper() == LOCAL_ENV:
                 self.config = LocalConfig()
@@ -45,21 +53,52 @@ class Core:
         else:
             logging.error(f'Failed to initialize core.get_logger for provider: {logger_config.provider}')
 
-    def get_topic(self, topic_name: str, max_concurrent_messages=os.cpu_count()):
+    def get_topic(self, topic_name: str, max_concurrent_messages=os.cpu_count(), max_messages_per_worker=None,
+                  worker_initializer=None, preload_modules=None):
         topic_config = self.config.topic()
         if topic_config.provider.upper() == LOCAL_ENV:
             return LocalTopic(config=topic_config, topic_name=topic_name)
         elif topic_config.provider.upper() == AZURE_ENV:
-            return AzureTopic(config=topic_config, topic_name=topic_name, max_concurrent_messages=max_concurrent_messages)
+            return AzureTopic(
+                config=topic_config,
+                topic_name=topic_name,
+                max_concurrent_messages=max_concurrent_messages,
+                max_messages_per_worker=max_messages_per_worker,
+                registry=self.connections,
+                worker_initializer=worker_initializer,
+                preload_modules=preload_modules,
+            )
         else:
             logging.error(f'Failed to initialize core.get_topic for provider: {topic_config.provider}')
 
+    def get_consumer_host(self, max_concurrent_messages=os.cpu_count(), max_messages_per_worker=None,
+                          worker_initializer=None, preload_modules=None):
+        topic_config = self.config.topic()
+        if topic_config.provider.upper() == AZURE_ENV:
+            return TopicConsumerHost(
+                config=topic_config,
+                max_concurrent_messages=max_concurrent_messages,
+                max_messages_per_worker=max_messages_per_worker,
+                registry=self.connections,
+                worker_initializer=worker_initializer,
+                preload_modules=preload_modules,
+            )
+        else:
+            logging.error(f'Failed to initialize core.get_consumer_host for provider: {topic_config.provider}')
+
+    def get_async_topic(self, topic_name: str, max_concurrent_messages=os.cpu_count()):
+        topic_config = self.config.topic()
+        if topic_config.provider.upper() == AZURE_ENV:
+            return AsyncAzureTopic(config=topic_config, topic_name=topic_name, max_concurrent_messages=max_concurrent_messages)
+        else:
+            logging.error(f'Failed to initialize core.get_async_topic for provider: {topic_config.provider}')
+
     def get_storage_client(self):
         storage_config = self.config.storage()
         if storage_config.provider.upper() == LOCAL_ENV:
             return LocalStorageClient(storage_config)
         elif storage_config.provider.upper() == AZURE_ENV:
-            return AzureStorageClient(storage_config)
+            return AzureStorageClient(storage_config, registry=self.connections)
         else:
             logging.error(f'Failed to initialize core.get_storage_client for provider: {storage_config.provider}')
 
@@ -77,6 +116,12 @@ class Core:
         else:
             logging.error(f'Failed to initialize core.get_authorizer for provider: {auth_config.provider}')
 
+    def close(self):
+        """
+        Closes every Service Bus client, topic sender and storage client shared by the objects this Core handed out.
+        """
+        self.connections.close()
+
     def __check_health(self):
         print('\x1b[32m ------------------------- \x1b[0m')
         print('\x1b[30m\x1b[42m PERFORMING CORE-HEALTH-CHECK \x1b[0m')
@@ -0,0 +1,96 @@
+import logging
+import threading
+
+logger = logging.getLogger('ConnectionRegistry')
+
+
+"""
+ConnectionRegistry shares expensive clients (Service Bus clients, topic senders, blob service clients) between the
+objects handed out by one Core instance.
+Every resource is created once per key, reference counted, and closed when its last user releases it or when the
+registry is closed.
+Methods:
+    acquire(key, factory) -> object:
+        Returns the resource registered under key, creating it with factory() on first use.
+    release(key) -> None:
+        Drops one reference to the resource and closes it when no reference is left.
+    close() -> None:
+        Closes every registered resource.
+"""
+class ConnectionRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+
+    def acquire(self, key, factory):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _RegistryEntry(factory())
+                self._entries[key] = entry
+            entry.ref_count += 1
+            return entry.resource
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.ref_count -= 1
+            if entry.ref_count > 0:
+                return
+            del self._entries[key]
+        entry.close()
+
+    def ref_count(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.ref_count if entry is not None else 0
+
+    def close(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries = {}
+        # Senders are registered after the clients they come from, so close them first.
+        for entry in reversed(entries):
+            entry.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class _RegistryEntry:
+    def __init__(self, resource):
+        self.resource = resource
+        self.ref_count = 0
+
+    def close(self):
+        close = getattr(self.resource, 'close', None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.error(f'Error in closing shared connection: {e}')
+
+
+class SynchronizedSender:
+    """
+    Wraps a Service Bus sender shared between topics. The SDK senders are not thread-safe, so calls are serialised.
+    """
+    def __init__(self, sender):
+        self._sender = sender
+        self._lock = threading.Lock()
+
+    def send_messages(self, *args, **kwargs):
+        with self._lock:
+            return self._sender.send_messages(*args, **kwargs)
+
+    def create_message_batch(self, *args, **kwargs):
+        with self._lock:
+            return self._sender.create_message_batch(*args, **kwargs)
+
+    def close(self):
+        with self._lock:
+            self._sender.close()
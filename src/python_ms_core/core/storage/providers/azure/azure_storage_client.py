@@ -13,10 +13,31 @@ class AzureStorageClient(storage_client.StorageClient):
 
     _blob_service_client: BlobServiceClient
 
-    def __init__(self, config):
+    def __init__(self, config, registry=None):
         super().__init__()
         self.config = config
-        self._blob_service_client = BlobServiceClient.from_connection_string(config.connection_string)
+        self.registry = registry
+        self.registry_key = None
+        if registry is None:
+            self._blob_service_client = BlobServiceClient.from_connection_string(config.connection_string)
+        else:
+            # Share one BlobServiceClient (and its connection pool) per connection string.
+            self.registry_key = ('blob_service_client', config.connection_string)
+            self._blob_service_client = registry.acquire(
+                self.registry_key,
+                lambda: BlobServiceClient.from_connection_string(config.connection_string),
+            )
+
+    def close(self):
+        """
+        Closes the underlying BlobServiceClient, or releases it back to the shared registry.
+        """
+        if self.registry is not None:
+            if self.registry_key is not None:
+                self.registry.release(self.registry_key)
+                self.registry_key = None
+            return
+        self._blob_service_client.close()
 
     @ExceptionHandler.decorated
     def get_container(self, container_name: str):
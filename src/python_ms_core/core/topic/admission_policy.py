@@ -0,0 +1,77 @@
+import logging
+import time
+from .resource_usage import get_cgroup_memory_limit, get_process_rss
+
+logger = logging.getLogger('AzureTopic')
+
+
+"""
+MemoryAdmissionPolicy decides whether the receive loop may request new messages, based on the RSS of the service
+process and its callback processes.
+Receiving stops once usage rises above high_water_mark * budget and resumes only after it falls below
+low_water_mark * budget, so the loop does not flap around a single threshold.
+The budget is either an absolute max_rss_bytes or cgroup_limit_fraction of the container memory limit.
+Attributes:
+    budget (int): The memory budget in bytes.
+    high_water_mark (float): Fraction of the budget above which receiving is paused.
+    low_water_mark (float): Fraction of the budget below which receiving resumes.
+    check_interval (float): Minimum seconds between two RSS samples.
+    paused (bool): Whether new messages are currently refused.
+Methods:
+    admits() -> bool:
+        Returns True when new messages may be received.
+    stats() -> dict:
+        Returns the budget, the last sampled RSS and the pause state.
+"""
+class MemoryAdmissionPolicy:
+    def __init__(self, max_rss_bytes=None, cgroup_limit_fraction=None, high_water_mark=0.9, low_water_mark=0.75,
+                 check_interval=1, rss_sampler=get_process_rss, limit_reader=get_cgroup_memory_limit):
+        if max_rss_bytes is None and cgroup_limit_fraction is None:
+            raise ValueError('Either max_rss_bytes or cgroup_limit_fraction is required.')
+        if not 0 < low_water_mark <= high_water_mark:
+            raise ValueError('Expected 0 < low_water_mark <= high_water_mark.')
+        if max_rss_bytes is not None:
+            self.budget = int(max_rss_bytes)
+        else:
+            self.budget = int(limit_reader() * cgroup_limit_fraction)
+        self.high_water_mark = high_water_mark
+        self.low_water_mark = low_water_mark
+        self.check_interval = check_interval
+        self.rss_sampler = rss_sampler
+        self.paused = False
+        self.pauses = 0
+        self.last_rss = None
+        self._checked_at = None
+
+    def admits(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return not self.paused
+        self._checked_at = now
+        try:
+            self.last_rss = self.rss_sampler()
+        except Exception as e:
+            logger.warning(f'Unable to sample memory usage for admission control: {e}')
+            return not self.paused
+        if not self.paused and self.last_rss > self.budget * self.high_water_mark:
+            self.paused = True
+            self.pauses += 1
+            logger.warning(
+                f'Pausing message receive: RSS {self.last_rss} bytes is above the high-water mark '
+                f'({self.high_water_mark} of {self.budget} bytes)'
+            )
+        elif self.paused and self.last_rss < self.budget * self.low_water_mark:
+            self.paused = False
+            logger.info(
+                f'Resuming message receive: RSS {self.last_rss} bytes is below the low-water mark '
+                f'({self.low_water_mark} of {self.budget} bytes)'
+            )
+        return not self.paused
+
+    def stats(self):
+        return {
+            'budget': self.budget,
+            'rss': self.last_rss,
+            'paused': self.paused,
+            'pauses': self.pauses,
+        }
@@ -0,0 +1,203 @@
+import asyncio
+import inspect
+import json
+import logging
+from typing import Iterable
+from ..config.config import TopicConfig
+from .abstract.topic_abstract import TopicAbstract
+from ..queue.models.queue_message import QueueMessage
+from azure.servicebus import ServiceBusMessage
+from azure.servicebus.aio import ServiceBusClient, AutoLockRenewer
+from .message_batches import send_in_batches_async
+
+
+logger = logging.getLogger('AsyncAzureTopic')
+
+
+"""
+AsyncAzureTopic is the asyncio counterpart of AzureTopic, built on azure.servicebus.aio.
+Attributes:
+    topic (str): The name of the topic.
+    client (ServiceBusClient): The async ServiceBusClient object used to interact with the Service Bus.
+    max_concurrent_messages (int): The maximum number of callbacks awaited at the same time.
+    publisher (ServiceBusSender): The async sender, created on first publish and reused afterwards.
+    internal_count (int): The number of messages currently being processed.
+    max_renewal_duration (int): The maximum duration in seconds to renew a message lock.
+    wait_time_for_message (int): The maximum wait time in seconds to receive messages.
+Methods:
+    publish(data: QueueMessage) -> None:
+        Publishes a message to the topic.
+    publish_many(messages: Iterable[QueueMessage]) -> list:
+        Publishes messages in size-bounded batches and returns one result per batch.
+    subscribe(subscription: str, callback, max_receivable_messages=-1, prefetch_count=0) -> None:
+        Receives messages and awaits the callback for each one, bounded by max_concurrent_messages.
+    close() -> None:
+        Closes the sender and the client.
+"""
+class AsyncAzureTopic(TopicAbstract):
+    def __init__(self, config: TopicConfig = None, topic_name=None, max_concurrent_messages: int = 1):
+        self.topic = topic_name
+        self.topic_name = topic_name
+        self.client = ServiceBusClient.from_connection_string(conn_str=config.connection_string, retry_total=10, retry_backoff_factor=1, retry_backoff_max=30)
+        self.max_concurrent_messages = max(int(max_concurrent_messages or 1), 1)
+        self.publisher = None
+        self.internal_count = 0
+        self.max_renewal_duration = 86400  # Renew the message upto 1 day
+        self.wait_time_for_message = 5
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def publish(self, data: QueueMessage):
+        """
+        Publishes a message to the topic.
+        Args:
+            data (QueueMessage): The message to publish.
+        """
+        message = QueueMessage.to_dict(data)
+        await self._get_publisher().send_messages(ServiceBusMessage(json.dumps(message)))
+
+    async def publish_many(self, messages: Iterable[QueueMessage]):
+        """
+        Publishes messages using as few ServiceBusMessageBatch sends as the batch size limit allows.
+        Args:
+            messages (Iterable[QueueMessage]): The messages to publish.
+        Returns:
+            list: One {'batch', 'message_count', 'success', 'error'} entry per batch sent.
+        """
+        return await send_in_batches_async(
+            self._get_publisher(),
+            (ServiceBusMessage(json.dumps(QueueMessage.to_dict(data))) for data in messages),
+        )
+
+    async def subscribe(self, subscription: str, callback, max_receivable_messages=-1, prefetch_count=0):
+        """
+        Subscribes to a subscription of the topic and processes incoming messages on the running event loop.
+        Args:
+            subscription (str): The name of the subscription to subscribe to.
+            callback (function): Coroutine function (or plain function, run in the default executor) invoked per message.
+            max_receivable_messages (int): Stop after this many messages have been processed (-1 = run forever).
+            prefetch_count (int): Messages the Service Bus link prefetches into the SDK cache (0 = disabled).
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_messages)
+        # Callbacks never block the event loop (plain ones run in the executor), so the renewer's own schedule of
+        # renewing shortly before expiry keeps up without tuning its private settings.
+        lock_renewal = AutoLockRenewer(
+            max_lock_renewal_duration=self.max_renewal_duration,
+            on_lock_renew_failure=self._handle_lock_renew_failure,
+        )
+        pending_tasks = set()
+        received_messages = 0
+        receiver = self.client.get_subscription_receiver(
+            topic_name=self.topic_name,
+            subscription_name=subscription,
+            prefetch_count=max(int(prefetch_count or 0), 0),
+        )
+        async with receiver:
+            try:
+                while max_receivable_messages <= 0 or received_messages < max_receivable_messages:
+                    slots = await self._acquire_slots(semaphore, max_receivable_messages, received_messages)
+                    try:
+                        messages = await receiver.receive_messages(max_message_count=slots, max_wait_time=self.wait_time_for_message)
+                    except Exception as e:
+                        logger.error(f'Error in receiving messages: {e}')
+                        messages = []
+                        # Yield to the in-flight callbacks instead of retrying in a tight loop.
+                        await asyncio.sleep(1)
+                    for _ in range(slots - len(messages)):
+                        semaphore.release()
+                    received_messages += len(messages)
+                    for message in messages:
+                        lock_renewal.register(
+                            receiver,
+                            message,
+                            max_lock_renewal_duration=self.max_renewal_duration,
+                            on_lock_renew_failure=self._handle_lock_renew_failure,
+                        )
+                        task = asyncio.create_task(self._process_message(receiver, message, callback, semaphore))
+                        pending_tasks.add(task)
+                        task.add_done_callback(pending_tasks.discard)
+                if pending_tasks:
+                    await asyncio.gather(*pending_tasks, return_exceptions=True)
+            finally:
+                for task in list(pending_tasks):
+                    task.cancel()
+                await lock_renewal.close()
+
+    async def close(self):
+        if self.publisher is not None:
+            try:
+                await self.publisher.close()
+            finally:
+                self.publisher = None
+        await self.client.close()
+
+    def _get_publisher(self):
+        if self.publisher is None:
+            self.publisher = self.client.get_topic_sender(topic_name=self.topic_name)
+        return self.publisher
+
+    async def _acquire_slots(self, semaphore, max_receivable_messages, received_messages):
+        """
+        Waits for one free slot, then takes every other slot that is free right now.
+        """
+        limit = self.max_concurrent_messages
+        if max_receivable_messages > 0:
+            limit = min(limit, max_receivable_messages - received_messages)
+        await semaphore.acquire()
+        slots = 1
+        while slots < limit and not semaphore.locked():
+            await semaphore.acquire()
+            slots += 1
+        return slots
+
+    async def _process_message(self, receiver, message, callback, semaphore):
+        self.internal_count += 1
+        try:
+            try:
+                queue_message = QueueMessage.data_from(str(message))
+                if inspect.iscoroutinefunction(callback):
+                    await callback(queue_message)
+                else:
+                    result = await asyncio.get_running_loop().run_in_executor(None, callback, queue_message)
+                    if inspect.isawaitable(result):
+                        await result
+                success = True
+            except Exception as e:
+                logger.error(f'Processing failed for message {self._get_message_id(message)}: {e}')
+                success = False
+            await self._settle_message(receiver, message, success)
+        finally:
+            self.internal_count -= 1
+            semaphore.release()
+
+    async def _settle_message(self, receiver, message, success):
+        try:
+            if getattr(message, '_lock_expired', False):
+                logger.error(
+                    f'Skipping settlement for message {self._get_message_id(message)} '
+                    f'because the lock expired at {getattr(message, "locked_until_utc", None)}. '
+                    f'auto_renew_error={getattr(message, "auto_renew_error", None)}'
+                )
+                return
+            if success:
+                await receiver.complete_message(message)
+            else:
+                await receiver.abandon_message(message)
+        except Exception as e:
+            logger.error(f'Error in settling message: {e}')
+
+    async def _handle_lock_renew_failure(self, renewable, error):
+        message_id = self._get_message_id(renewable)
+        failure_reason = error or getattr(renewable, 'auto_renew_error', None) or 'lock expired before renewal could complete'
+        logger.error(
+            f'Error renewing lock for message {message_id}: {failure_reason}; '
+            f'locked_until_utc={getattr(renewable, "locked_until_utc", None)}'
+        )
+
+    @staticmethod
+    def _get_message_id(message):
+        return getattr(message, 'message_id', None) or getattr(message, 'messageId', 'unknown')
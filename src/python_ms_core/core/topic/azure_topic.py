@@ -1,72 +1,250 @@
+import functools
+import importlib
 import json
 import logging
 import multiprocessing as mp
 import os
+import signal
+from multiprocessing import connection as mp_connection
 import time
 import traceback
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from ..config.config import TopicConfig
+from ..connection_registry import ConnectionRegistry, SynchronizedSender
 from concurrent.futures import ThreadPoolExecutor
 from .abstract.topic_abstract import TopicAbstract
+from .worker_pool import CallbackWorkerPool, initialize_callback_process
+from .buffered_publisher import BufferedPublisher
+from .message_batches import send_in_batches
+from .lock_renewal_scheduler import LockRenewalScheduler
+from .topic_metrics import TopicMetrics
+from .concurrency_controller import AdaptiveConcurrencyController
+from .admission_policy import MemoryAdmissionPolicy
+from .batch_callback import run_batch_callback
+from .idempotency_cache import IdempotencyCache, IdempotencyBackend
+from .receive_supervisor import ReceiveSupervisor
+from .payload_transport import SharedPayload, get_body_sections, load_payload
+from .retry_policy import (
+    RetryPolicy,
+    RETRY_ATTEMPT_PROPERTY,
+    RETRY_ORIGINAL_MESSAGE_ID_PROPERTY,
+    RETRY_SUBSCRIPTION_PROPERTY,
+)
 from ..queue.models.queue_message import QueueMessage
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
-from azure.servicebus import AutoLockRenewer
+from azure.servicebus import NEXT_AVAILABLE_SESSION, ServiceBusClient, ServiceBusMessage, ServiceBusReceiveMode
+from azure.servicebus.exceptions import OperationTimeoutError
 import threading
+from typing import Iterable
 
 
 logger = logging.getLogger('AzureTopic')
 
+# Outcomes counted as failures in the summary `subscribe` returns.
+FAILED_OUTCOMES = ('abandoned', 'retried', 'dead_lettered', 'failed', 'timed_out', 'lock_expired', 'settle_failed')
+
 
 """
 AzureTopic class represents a topic in Azure Service Bus.
 Attributes:
     topic (str): The name of the topic.
     client (ServiceBusClient): The ServiceBusClient object used to interact with the Service Bus.
+    registry (ConnectionRegistry): Optional registry the client and sender are borrowed from instead of owned.
     max_concurrent_messages (int): The maximum number of concurrent messages to process.
     topic_name (str): The name of the topic.
     publisher (TopicSender): The TopicSender object used to send messages to the topic.
+    buffered_publisher (BufferedPublisher): Background batch sender used by `publish` once buffered publishing is enabled.
     executor (ThreadPoolExecutor): The ThreadPoolExecutor object used to execute callback functions.
+    owns_executor (bool): False when the executor was passed in (e.g. by TopicConsumerHost); it is then never shut
+        down or replaced by the topic.
     internal_count (int): The internal count of concurrent messages being processed.
-    lock_renewal (AutoLockRenewer): The AutoLockRenewer object used to renew message locks.
+    lock_renewal (LockRenewalScheduler): The timer-heap scheduler used to renew message locks (shared through the registry).
+    max_messages_per_worker (int): Messages a pooled callback worker handles before it is recycled (0 = never).
+    worker_pool (CallbackWorkerPool): The long-lived callback processes used in `pool` execution mode.
+    worker_initializer (function): Called once in every callback process before it runs a callback.
+    preload_modules (list): Modules imported ahead of the callbacks (fork server / parent / pool workers).
     max_renewal_duration (int): The maximum duration in seconds to renew a message lock.
     wait_time_for_message (int): The maximum wait time in seconds to receive messages.
+    receiver_count (int): The number of receiver links `subscribe` opens on the subscription.
+    receive_ahead_buffer (deque): Messages received ahead of free worker slots, waiting to be dispatched.
+    receive_ahead_lock_margin (int): Minimum lock time in seconds a buffered message needs left to be dispatched.
+    admission_policy (MemoryAdmissionPolicy): Pauses receiving while the process tree uses too much memory.
+    concurrency_controller (AdaptiveConcurrencyController): Adjusts the in-flight limit when adaptive concurrency is enabled.
+    concurrency_budget (WeightedConcurrencyBudget): Global limit shared with other subscriptions of a TopicConsumerHost.
+    metrics (TopicMetrics): Per-message timing histograms and settlement outcomes of the subscription.
+    metrics_logger (Logger): Optional logger the metrics are forwarded to through `record_metric`.
+    callback_timeout (float): Execution deadline in seconds of a callback (None = no deadline).
+    callback_timeout_action (str): `abandon` or `dead_letter`; what happens to a message whose callback timed out.
+    leaked_slots (int): Slots still held by timed-out thread callbacks that cannot be stopped.
+    idempotency_cache (IdempotencyCache): Completed message ids; redelivered duplicates skip the callback.
+    retry_policy (RetryPolicy): Re-publishes failed messages with a backoff delay instead of abandoning them.
+    subscription_name (str): The subscription being consumed.
+    receive_mode (str): `peek_lock` (at-least-once, default) or `receive_and_delete` (at-most-once, no settlement).
+    shared_payload_min_size (int): Bodies of at least this many bytes reach callback processes through a memory-mapped
+        file instead of a pipe (None = disabled).
+    receive_supervisor (ReceiveSupervisor): Backs off failed receive loop iterations, rebuilds broken receiver links and
+        keeps the circuit-breaker state.
+    stopping (bool): Set by `stop`; the receive loops stop receiving and drain the messages in flight.
+    max_concurrent_sessions (int): Sessions `subscribe_sessions` processes in parallel.
+    session_idle_timeout (float): Seconds a session may stay empty before it is released for the next one.
 Methods:
     publish(data: QueueMessage) -> None:
         Publishes a message to the topic.
-    subscribe(subscription: str, callback) -> None:
-        Subscribes to a subscription of the topic and processes incoming messages.
+    publish_many(messages: Iterable[QueueMessage]) -> list:
+        Publishes messages in size-bounded batches and returns one result per batch.
+    enable_buffered_publish(**options) -> None:
+        Makes `publish` enqueue messages for a background sender thread instead of sending them inline.
+    flush(timeout=None) -> bool:
+        Waits until every buffered message has been sent.
+    close() -> None:
+        Drains buffered messages and releases the sender, worker pool, executor and client.
+    enable_adaptive_concurrency(min_concurrent_messages=1, max_concurrent_messages=None, **options) -> None:
+        Lets an AIMD controller move the in-flight limit between the bounds from latency, errors, CPU and RSS.
+    stats() -> dict:
+        Returns a snapshot of the consumption metrics.
+    forward_metrics(metrics_logger, interval=60) -> None:
+        Periodically sends the metric summaries through `metrics_logger.record_metric`.
+    set_callback_deadline(timeout, action='abandon') -> None:
+        Stops waiting for callbacks that run longer than timeout seconds and abandons or dead-letters their messages.
+    enable_deduplication(backend=None, max_entries=10000, ttl=86400) -> None:
+        Completes redelivered messages that were already processed to completion without invoking the callback.
+    enable_retry(max_attempts=5, initial_delay=10, max_delay=3600, multiplier=2, jitter=0.2) -> None:
+        Retries failed messages later with exponential backoff and dead-letters them after max_attempts.
+    enable_shared_payloads(min_size=65536, directory=None) -> None:
+        Hands large message bodies to process and pool callbacks through memory-mapped files.
+    set_reconnect_policy(initial_delay=1, max_delay=60, multiplier=2, jitter=0.2, failure_threshold=5,
+                         reset_timeout=60) -> None:
+        Configures the backoff and circuit breaker applied when receiving fails.
+    stop(drain_timeout=30, close=True) -> None:
+        Stops receiving, lets callbacks in flight finish until drain_timeout and abandons what is left.
+    handle_termination_signals(drain_timeout=30, signals=(signal.SIGTERM,)) -> None:
+        Calls `stop` when the process receives one of the signals.
+    subscribe(subscription: str, callback, max_receivable_messages=-1, prefetch_count=0, receive_ahead=0,
+              admission_policy=None, receiver_count=1, receive_mode='peek_lock', exit_when_idle=None) -> dict:
+        Subscribes to a subscription of the topic, processes incoming messages and returns a run summary.
+    subscribe_batch(subscription: str, callback, max_batch_size=100, max_wait=5, ...) -> dict:
+        Subscribes to a subscription of the topic, hands the callback lists of messages and returns a run summary.
+    subscribe_sessions(subscription: str, callback, max_concurrent_sessions=None, ...) -> dict:
+        Consumes a session-enabled subscription: messages of a session in order, sessions in parallel.
     internal_callback(message, callbackfn) -> ServiceBusMessage:
         Internal callback function that processes a message and invokes the callback function.
     settle_message(x: cf.Future) -> None:
         Sets the message as completed and updates the internal count.
 """
 class AzureTopic(TopicAbstract):
-    def __init__(self, config: TopicConfig=None, topic_name=None, max_concurrent_messages:int=1):
+    def __init__(self, config: TopicConfig=None, topic_name=None, max_concurrent_messages:int=1, max_messages_per_worker:int=None,
+                 registry: ConnectionRegistry=None, worker_initializer=None, preload_modules=None,
+                 executor: ThreadPoolExecutor=None):
         self.topic = topic_name
-        self.client = ServiceBusClient.from_connection_string(conn_str=config.connection_string, retry_total=10, retry_backoff_factor=1, retry_backoff_max=30)
+        self.registry = registry
+        self.registry_keys = []
+        if registry is None:
+            self.client = self._create_client(config.connection_string)
+            self.publisher = self.client.get_topic_sender(topic_name=topic_name)
+        else:
+            client_key = ('servicebus_client', config.connection_string)
+            sender_key = ('topic_sender', config.connection_string, topic_name)
+            self.client = registry.acquire(client_key, lambda: self._create_client(config.connection_string))
+            self.publisher = registry.acquire(
+                sender_key,
+                lambda: SynchronizedSender(self.client.get_topic_sender(topic_name=topic_name)),
+            )
+            self.registry_keys = [client_key, sender_key]
         self.max_concurrent_messages = max_concurrent_messages
         self.topic_name = topic_name
-        self.publisher = self.client.get_topic_sender(topic_name=topic_name)
-        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_messages)
+        self.buffered_publisher = None
+        self.owns_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_messages) if executor is None else executor
         self.callback_execution_mode = self._get_callback_execution_mode()
         self.callback_process_start_method = self._get_process_start_method()
         self.process_context = self._get_process_context()
+        self.max_messages_per_worker = self._get_max_messages_per_worker(max_messages_per_worker)
+        self.worker_initializer = worker_initializer
+        self.preload_modules = list(preload_modules or [])
+        self.callback_process_initializer = self._get_callback_process_initializer()
+        self._preload_callback_modules()
+        self.worker_pool = None
+        self.worker_pool_runner = None
         self.internal_count = 0
         self.max_renewal_duration = 86400  # Renew the message upto 1 day
         self.lock_renewal_margin = 60
-        renewer_max_workers = max(max_concurrent_messages, 2)
-        self.lock_renewal = AutoLockRenewer(
-            max_lock_renewal_duration=self.max_renewal_duration,
-            on_lock_renew_failure=self._handle_lock_renew_failure,
-            max_workers=renewer_max_workers,
-        )
-        # The SDK default renews only in the last 10 seconds of the lock window.
-        # Start earlier so long-running jobs have more headroom for scheduler jitter.
-        self.lock_renewal._renew_period = min(self.lock_renewal_margin, self.max_renewal_duration)
+        # One scheduler thread renews every outstanding lock lock_renewal_margin seconds before it expires.
+        if registry is None:
+            self.lock_renewal = self._create_lock_renewal_scheduler()
+        else:
+            scheduler_key = ('lock_renewal_scheduler',)
+            self.lock_renewal = registry.acquire(scheduler_key, self._create_lock_renewal_scheduler)
+            self.registry_keys.append(scheduler_key)
         self.wait_time_for_message = 5
+        self.receive_ahead = 0
+        self.receive_ahead_lock_margin = 5
+        self.receiver_count = 1
+        self.received_messages = 0
+        self.reserved_messages = 0
         self.thread_lock = threading.Lock()
-        self.pending_tasks = []
+        self.worker_pool_lock = threading.Lock()
+        # Receiver, in-flight tasks and receive-ahead buffer belong to the receive loop (thread) that uses them.
+        self.loop_state = _ReceiveLoopState()
+        self.completion_signals = []
+        self.receive_buffers = []
+        self.concurrency_controller = None
+        self.admission_policy = None
+        # Set by TopicConsumerHost when several subscriptions share one concurrency limit and worker pool.
+        self.concurrency_budget = None
+        self.budget_name = None
+        self.shared_worker_pool = None
+        self.metrics = TopicMetrics()
+        self.metrics_logger = None
+        self.metrics_report_interval = 60
+        self.metrics_reported_at = time.monotonic()
+        self.callback_timeout = None
+        self.callback_timeout_action = 'abandon'
+        self.leaked_slots = 0
+        self.idempotency_cache = None
+        self.retry_policy = None
+        self.subscription_name = None
+        self.receive_mode = 'peek_lock'
+        self.shared_payload_min_size = None
+        self.shared_payload_directory = None
+        self.shared_payloads = {}
+        self.receive_supervisor = ReceiveSupervisor()
+        # Plain attributes rather than an Event: `stop` may run in a signal handler on the receive loop's thread.
+        self.stopping = False
+        self.drain_deadline = None
+        self.close_on_stop = True
+        self.last_message_at = time.monotonic()
+        self.max_concurrent_sessions = None
+        self.session_idle_timeout = 5
     
     
+    @property
+    def receiver(self):
+        return self.loop_state.receiver
+
+    @receiver.setter
+    def receiver(self, receiver):
+        self.loop_state.receiver = receiver
+
+    @property
+    def pending_tasks(self):
+        return self.loop_state.pending_tasks
+
+    @pending_tasks.setter
+    def pending_tasks(self, pending_tasks):
+        self.loop_state.pending_tasks = pending_tasks
+
+    @property
+    def receive_ahead_buffer(self):
+        return self.loop_state.receive_ahead_buffer
+
+    @property
+    def completion_signal(self):
+        if self.loop_state.completion_signal is None:
+            self.loop_state.completion_signal = _CompletionSignal()
+            with self.thread_lock:
+                self.completion_signals.append(self.loop_state.completion_signal)
+        return self.loop_state.completion_signal
+
     def publish(self, data: QueueMessage):
         """
         Publishes a message to the topic.
@@ -75,52 +253,835 @@ class AzureTopic(TopicAbstract):
         
         """
         message = QueueMessage.to_dict(data)
+        if self.buffered_publisher is not None:
+            self.buffered_publisher.publish(json.dumps(message))
+            return
         self.publisher.send_messages(ServiceBusMessage(json.dumps(message)))
 
-    def subscribe(self, subscription: str, callback, max_receivable_messages=-1):
+    def publish_many(self, messages: Iterable[QueueMessage]):
+        """
+        Publishes messages using as few ServiceBusMessageBatch sends as the batch size limit allows.
+        Args:
+            messages (Iterable[QueueMessage]): The messages to publish.
+        Returns:
+            list: One {'batch', 'message_count', 'success', 'error'} entry per batch sent.
+        """
+        return send_in_batches(
+            self.publisher,
+            (ServiceBusMessage(json.dumps(QueueMessage.to_dict(data))) for data in messages),
+        )
+
+    def enable_buffered_publish(self, max_buffer_size=10000, max_batch_messages=100, max_batch_bytes=256 * 1024,
+                                linger_time=0.05, block_when_full=True, block_timeout=None):
+        """
+        Switches `publish` to fire-and-forget: messages are buffered in memory and sent in batches by a background thread.
+        Args:
+            max_buffer_size (int): The maximum number of messages held in memory.
+            max_batch_messages (int): Send as soon as this many messages are buffered.
+            max_batch_bytes (int): Send as soon as the buffered messages reach this size in bytes.
+            linger_time (float): The maximum time in seconds a message waits before it is sent.
+            block_when_full (bool): Block `publish` while the buffer is full, otherwise raise TooManyRequestError.
+            block_timeout (float): The maximum time in seconds `publish` blocks before raising TimeOutError.
+        """
+        if self.buffered_publisher is not None:
+            self.buffered_publisher.close()
+        self.buffered_publisher = BufferedPublisher(
+            sender=self.publisher,
+            max_buffer_size=max_buffer_size,
+            max_batch_messages=max_batch_messages,
+            max_batch_bytes=max_batch_bytes,
+            linger_time=linger_time,
+            block_when_full=block_when_full,
+            block_timeout=block_timeout,
+        )
+
+    def flush(self, timeout=None):
+        """
+        Waits until every buffered message has been sent. Returns False if the timeout passed first.
+        """
+        if self.buffered_publisher is None:
+            return True
+        return self.buffered_publisher.flush(timeout=timeout)
+
+    def close(self):
+        """
+        Drains buffered messages and releases the sender, worker pool, executor and client.
+        """
+        for shared_payload in list(self.shared_payloads.values()):
+            shared_payload.release()
+        self.shared_payloads = {}
+        if self.buffered_publisher is not None:
+            self.buffered_publisher.close()
+            self.buffered_publisher = None
+        if self.idempotency_cache is not None:
+            self.idempotency_cache.close()
+        self._shutdown_worker_pool()
+        if self.owns_executor:
+            self.executor.shutdown(wait=False)
+        with self.thread_lock:
+            completion_signals, self.completion_signals = self.completion_signals, []
+        for completion_signal in completion_signals:
+            completion_signal.close()
+        self.loop_state.completion_signal = None
+        owned_resources = []
+        if self.registry is None:
+            owned_resources += [self.lock_renewal, self.publisher, self.client]
+        for resource in owned_resources:
+            try:
+                resource.close()
+            except Exception as e:
+                logger.error(f'Error in closing topic resources: {e}')
+        # Shared client, sender and renewal scheduler are only closed once the last topic using them lets go.
+        for key in reversed(self.registry_keys):
+            self.registry.release(key)
+        self.registry_keys = []
+
+    def enable_adaptive_concurrency(self, min_concurrent_messages=1, max_concurrent_messages=None, target_latency=None,
+                                    max_error_rate=0.1, max_cpu_percent=90, max_rss_bytes=None, increase_step=1,
+                                    decrease_factor=0.5, adjust_interval=10):
+        """
+        Replaces the fixed `max_concurrent_messages` window with an adaptive one. Call it before `subscribe`.
+        Args:
+            min_concurrent_messages (int): The lowest number of messages kept in flight.
+            max_concurrent_messages (int): The highest number of messages kept in flight (defaults to the current value).
+            target_latency (float): Average callback duration in seconds above which concurrency is reduced.
+            max_error_rate (float): Fraction of failed callbacks above which concurrency is reduced.
+            max_cpu_percent (float): CPU utilisation above which concurrency is reduced.
+            max_rss_bytes (int): RSS of the process and its callback processes above which concurrency is reduced.
+            increase_step (int): Slots added after an interval in which the window was fully used.
+            decrease_factor (float): Factor the limit is multiplied with when a threshold is exceeded.
+            adjust_interval (float): Seconds between two adjustments.
+        """
+        max_concurrent_messages = max_concurrent_messages or self.max_concurrent_messages
+        if max_concurrent_messages > self.max_concurrent_messages:
+            # Thread and pool workers are sized from max_concurrent_messages; grow them to the new upper bound.
+            # An executor passed in by its owner (e.g. TopicConsumerHost) is sized and kept by that owner.
+            self.max_concurrent_messages = max_concurrent_messages
+            if self.owns_executor:
+                self.executor.shutdown(wait=False)
+                self.executor = ThreadPoolExecutor(max_workers=max_concurrent_messages)
+            self._shutdown_worker_pool()
+        self.concurrency_controller = AdaptiveConcurrencyController(
+            min_concurrency=min_concurrent_messages,
+            max_concurrency=max_concurrent_messages,
+            target_latency=target_latency,
+            max_error_rate=max_error_rate,
+            max_cpu_percent=max_cpu_percent,
+            max_rss_bytes=max_rss_bytes,
+            increase_step=increase_step,
+            decrease_factor=decrease_factor,
+            adjust_interval=adjust_interval,
+        )
+
+    def stats(self):
+        """
+        Returns a snapshot of the consumption metrics: timing histograms, settlement outcomes, in-flight and
+        buffered message counts and the lock renewal counters.
+        """
+        snapshot = self.metrics.snapshot()
+        with self.thread_lock:
+            in_flight = self.internal_count
+        snapshot.update({
+            'topic': self.topic_name,
+            'in_flight': in_flight,
+            'buffered': sum(len(buffer) for buffer in list(self.receive_buffers)),
+            'concurrency_limit': self._get_concurrency_limit(),
+            'admission': self.admission_policy.stats() if self.admission_policy is not None else None,
+            'lock_renewal': self.lock_renewal.stats(),
+            'leaked_slots': self.leaked_slots,
+            'deduplication': self.idempotency_cache.stats() if self.idempotency_cache is not None else None,
+            'receiver': self.receive_supervisor.stats(),
+        })
+        return snapshot
+
+    def forward_metrics(self, metrics_logger, interval=60):
+        """
+        Sends a summary of every histogram and the outcome counters through `metrics_logger.record_metric`
+        from the receive loop, at most once per interval.
+        Args:
+            metrics_logger (Logger): The logger returned by `core.get_logger()`, or None to stop forwarding.
+            interval (float): Seconds between two reports.
+        """
+        self.metrics_logger = metrics_logger
+        self.metrics_report_interval = interval
+        self.metrics_reported_at = time.monotonic()
+
+    def set_callback_deadline(self, timeout, action='abandon'):
+        """
+        Sets an execution deadline for every callback. When it passes, process and pool workers are terminated;
+        thread callbacks cannot be stopped, so their slot stays taken (leaked) until the thread returns.
+        The message is settled right away with a timeout reason and counted as `timed_out` in the metrics.
+        Args:
+            timeout (float): Seconds a callback may run, or None to remove the deadline.
+            action (str): `abandon` to let Service Bus redeliver the message, `dead_letter` to dead-letter it.
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError('timeout must be greater than 0.')
+        if action not in ('abandon', 'dead_letter'):
+            raise ValueError(f'Invalid callback timeout action: {action}. Use abandon or dead_letter.')
+        self.callback_timeout = timeout
+        self.callback_timeout_action = action
+
+    def enable_deduplication(self, backend: IdempotencyBackend=None, max_entries=10000, ttl=86400):
+        """
+        Remembers the ids (`message_id`, else the `messageId` of the QueueMessage body) of completed messages.
+        A redelivered message whose id is known is completed straight away without invoking the callback.
+        Args:
+            backend (IdempotencyBackend): Persistent store shared across restarts, e.g. SqliteIdempotencyBackend.
+            max_entries (int): The number of ids kept in the in-memory LRU.
+            ttl (float): Seconds a completed id is remembered.
+        """
+        if self.idempotency_cache is not None:
+            self.idempotency_cache.close()
+        self.idempotency_cache = IdempotencyCache(backend=backend, max_entries=max_entries, ttl=ttl)
+
+    def enable_retry(self, max_attempts=5, initial_delay=10, max_delay=3600, multiplier=2, jitter=0.2,
+                     max_error_length=4096):
+        """
+        Replaces the immediate abandon of a failed message with a delayed retry: the message is re-published to the
+        topic with `scheduled_enqueue_time_utc` and a new message_id, and the original is completed. The attempt
+        count, the subscription and the first message_id are carried in the `retry_attempt` / `retry_subscription` /
+        `retry_original_message_id` application properties. Every subscription of the topic needs the rule filter
+        from `RetryPolicy.get_subscription_filter` so only the failing subscription receives the copy; AzureTopic
+        subscriptions without it complete foreign copies without processing them. After max_attempts failed
+        callbacks the message is dead-lettered with the truncated traceback.
+        Args:
+            max_attempts (int): Failed callbacks after which the message is dead-lettered.
+            initial_delay (float): Seconds before the first retry.
+            max_delay (float): Upper bound of the delay in seconds.
+            multiplier (float): Factor the delay grows by with every attempt.
+            jitter (float): Fraction of the delay randomly added or removed.
+            max_error_length (int): Characters of the traceback kept in the dead-letter description.
+        """
+        self.retry_policy = RetryPolicy(
+            max_attempts=max_attempts,
+            initial_delay=initial_delay,
+            max_delay=max_delay,
+            multiplier=multiplier,
+            jitter=jitter,
+            max_error_length=max_error_length,
+        )
+
+    def enable_shared_payloads(self, min_size=65536, directory=None):
+        """
+        Writes message bodies of at least min_size bytes once into a memory-mapped file and passes only its handle to
+        `process` and `pool` callbacks, which decode the body straight from the mapping. The file is removed when the
+        message is settled. Thread callbacks and batches keep receiving the body directly.
+        Args:
+            min_size (int): The smallest body in bytes handed over through shared memory.
+            directory (str): Where the files are created (defaults to /dev/shm when present).
+        """
+        self.shared_payload_min_size = max(int(min_size), 0)
+        self.shared_payload_directory = directory
+
+    def set_reconnect_policy(self, initial_delay=1, max_delay=60, multiplier=2, jitter=0.2, failure_threshold=5,
+                             reset_timeout=60):
+        """
+        Configures how the receive loops recover from errors. Consecutive failures wait exponentially longer; after
+        failure_threshold of them the circuit opens and receiving pauses for reset_timeout before a trial receive.
+        Connection errors and an open circuit replace the receiver link; messages in flight are still settled through
+        the receiver they came from.
+        Args:
+            initial_delay (float): Seconds to wait after the first failure.
+            max_delay (float): Upper bound of the wait in seconds.
+            multiplier (float): Factor the wait grows by with every consecutive failure.
+            jitter (float): Fraction of the wait added or removed at random.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial receive.
+        """
+        self.receive_supervisor = ReceiveSupervisor(
+            initial_delay=initial_delay,
+            max_delay=max_delay,
+            multiplier=multiplier,
+            jitter=jitter,
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+        )
+
+    def stop(self, drain_timeout=30, close=True):
+        """
+        Stops `subscribe` / `subscribe_batch` gracefully. The receive loops stop receiving and abandon buffered
+        messages, callbacks in flight get until drain_timeout to finish, and the messages of callbacks still running
+        then are abandoned so Service Bus redelivers them at once. Returns immediately; the subscribe call returns
+        when the drain is over. Safe to call from another thread or a signal handler. With close=False the topic can
+        subscribe again afterwards; every subscribe call starts out of the stopping state.
+        Args:
+            drain_timeout (float): Seconds callbacks in flight are given to finish.
+            close (bool): Close the executor, lock renewal scheduler, sender and client once the drain is over.
+        """
+        if not self.stopping:
+            self.drain_deadline = time.monotonic() + max(drain_timeout, 0)
+            self.close_on_stop = close
+            self.stopping = True
+
+    def handle_termination_signals(self, drain_timeout=30, signals=(signal.SIGTERM,)):
+        """
+        Installs handlers that call `stop(drain_timeout)` when the process receives one of the signals, so a rolling
+        deploy drains the subscription instead of killing its callbacks. Call it from the main thread.
+        Args:
+            drain_timeout (float): Seconds callbacks in flight are given to finish.
+            signals (tuple): The signals to handle.
+        """
+        def handle_signal(signum, frame):
+            logger.info(f'Received signal {signum}, draining {self.topic_name} for up to {drain_timeout}s')
+            self.stop(drain_timeout)
+
+        for signum in signals:
+            signal.signal(signum, handle_signal)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def subscribe(self, subscription: str, callback, max_receivable_messages=-1, prefetch_count=0, receive_ahead=0,
+                  admission_policy: MemoryAdmissionPolicy=None, receiver_count=1, receive_mode='peek_lock',
+                  exit_when_idle=None):
 
         """
         Subscribes to a subscription of the topic and processes incoming messages.
         Args:
             subscription (str): The name of the subscription to subscribe to.
             callback (function): The callback function to invoke for each message.
+            max_receivable_messages (int): Stop after this many messages have been processed (-1 = run forever).
+            prefetch_count (int): Messages the Service Bus link prefetches into the SDK cache (0 = disabled).
+            receive_ahead (int): Messages received ahead of free worker slots so the next callback can start
+                as soon as a slot frees (0 = disabled).
+            admission_policy (MemoryAdmissionPolicy): Stops requesting new messages while the memory used by the
+                service and its callback processes is above the policy's high-water mark.
+            receiver_count (int): Receiver links opened on the subscription, each with its own receive loop thread.
+                The loops share the worker pool and the concurrency budget; every message is settled by the
+                receiver it came from.
+            receive_mode (str): `peek_lock` locks, renews and settles every message (at-least-once).
+                `receive_and_delete` removes messages from the subscription as they are received: no lock renewal
+                and no settlement, so a failed or interrupted callback loses its message (at-most-once).
+            exit_when_idle (float): Return once the subscription returned no messages for this many seconds and the
+                messages in flight are settled (batch-job mode; None = run until max_receivable_messages or `stop`).
+        Returns:
+            dict: Summary of the run: exit reason, wall time, received messages, outcome counts and callback time.
         """
-        self.receiver = self.client.get_subscription_receiver(topic_name=self.topic_name, subscription_name=subscription)
-        self.receiver.local_received_messages = 0
+        if receive_mode not in ('peek_lock', 'receive_and_delete'):
+            raise ValueError(f'Invalid receive mode: {receive_mode}. Use peek_lock or receive_and_delete.')
+        if exit_when_idle is not None and exit_when_idle <= 0:
+            raise ValueError('exit_when_idle must be greater than 0.')
+        run_started = time.monotonic()
+        metrics_at_start = self.metrics.snapshot()
+        self.stopping = False
+        self.drain_deadline = None
+        self.last_message_at = run_started
+        self.receive_mode = receive_mode
+        self.subscription_name = subscription
+        self.receive_ahead = max(int(receive_ahead or 0), 0)
+        self.admission_policy = admission_policy
+        self.receiver_count = max(int(receiver_count or 1), 1)
+        self.received_messages = 0
+        self.reserved_messages = 0
+        if self.receiver_count == 1:
+            self._run_receive_loop(subscription, callback, max_receivable_messages, prefetch_count, exit_when_idle)
+        else:
+            receive_threads = [
+                threading.Thread(
+                    target=self._run_receive_loop,
+                    args=(subscription, callback, max_receivable_messages, prefetch_count, exit_when_idle),
+                    name=f'AzureTopicReceiver-{index}',
+                    daemon=True,
+                )
+                for index in range(self.receiver_count)
+            ]
+            for receive_thread in receive_threads:
+                receive_thread.start()
+            for receive_thread in receive_threads:
+                receive_thread.join()
+        self._report_metrics(force=True)
+        summary = self._create_run_summary(run_started, metrics_at_start, max_receivable_messages, exit_when_idle)
+        self._shutdown_worker_pool()
+        self._close_after_stop()
+        return summary
+
+    def _run_receive_loop(self, subscription, callback, max_receivable_messages, prefetch_count, exit_when_idle=None):
+        self.receiver = self._create_receiver(subscription, prefetch_count)
+        self.receive_buffers.append(self.receive_ahead_buffer)
         while True:
                 try:
+                    self._reconnect_receiver(subscription, prefetch_count)
                     self._settle_completed_tasks()
+                    self._report_metrics()
+                    if self.stopping:
+                        if self._drain(callback):
+                            break
+                        continue
+                    self._update_concurrency_limit()
+                    self._dispatch_buffered_messages(callback)
                     to_receive = self._get_receivable_count(max_receivable_messages=max_receivable_messages)
-                    if max_receivable_messages > 0 and self.receiver.local_received_messages >= max_receivable_messages:
-                        if len(self.pending_tasks) == 0:
+                    if max_receivable_messages > 0 and self.received_messages >= max_receivable_messages:
+                        if self._get_active_task_count() == 0 and len(self.receive_ahead_buffer) == 0:
+                            break
+                        self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
+                        continue
+                    if self._is_idle(exit_when_idle):
+                        # Batch-job mode: nothing arrived during the idle window, finish what is in flight and return.
+                        if self._get_active_task_count() == 0 and len(self.receive_ahead_buffer) == 0:
                             break
-                        self._wait_for_pending_tasks(timeout=0.5)
+                        self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
                         continue
                     if to_receive > 0:
-                        messages = self.receiver.receive_messages(max_message_count=to_receive, max_wait_time=self.wait_time_for_message)
+                        max_wait_time = self.wait_time_for_message
+                        if self._get_free_slot_count() <= 0:
+                            # Only filling the receive-ahead buffer; keep the wait short so finished tasks are not held up.
+                            max_wait_time = min(self.wait_time_for_message, 1)
+                        if exit_when_idle is not None:
+                            max_wait_time = min(max_wait_time, exit_when_idle)
+                        self.receive_supervisor.before_attempt()
+                        messages = self._receive_messages(to_receive, max_receivable_messages, max_wait_time)
+                        self.receive_supervisor.record_success()
                         if not messages or len(messages) == 0:
                             if len(self.pending_tasks) > 0:
                                 self._wait_for_pending_tasks(timeout=0.5)
                             continue
-                        self.receiver.local_received_messages += len(messages)
-                        with self.thread_lock:
-                            self.internal_count += len(messages)
-                        for message in messages: 
-                            execution_task = self._submit_processing_task(message, callback)
-                            self.lock_renewal.register(
-                                self.receiver,
-                                message,
-                                max_lock_renewal_duration=self.max_renewal_duration,
-                                on_lock_renew_failure=self._handle_lock_renew_failure,
-                            )
-                            self.pending_tasks.append((execution_task, message))
+                        self.last_message_at = time.monotonic()
+                        self._buffer_received_messages(messages)
+                        self._dispatch_buffered_messages(callback)
                     else:
                         if len(self.pending_tasks) > 0:
-                            self._wait_for_pending_tasks(timeout=0.5)
+                            # All slots are busy; block until the first task finishes.
+                            self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
+                        else:
+                            time.sleep(self.wait_time_for_message)
+                        # Not asking for messages is not idleness; the idle window restarts once slots free up.
+                        self.last_message_at = time.monotonic()
+                except Exception as e:
+                    self._recover_receive_loop(e)
+        self.receive_buffers = [buffer for buffer in self.receive_buffers if buffer is not self.receive_ahead_buffer]
+        self._close_retired_receivers(force=True)
+        if self.receiver_count > 1 and self.receiver is not None:
+            try:
+                self.receiver.close()
+            except Exception as e:
+                logger.error(f'Error in closing receiver: {e}')
+
+    def subscribe_sessions(self, subscription: str, callback, max_concurrent_sessions=None, max_receivable_messages=-1,
+                           session_idle_timeout=5, prefetch_count=0):
+        """
+        Subscribes to a session-enabled subscription. Up to max_concurrent_sessions sessions are accepted as they
+        become available; the messages of one session are handed to the callback strictly one after another and in
+        order, while different sessions run in parallel on the executor / worker pool. Session locks are renewed by
+        the lock renewal scheduler. A session is released once it stayed empty for session_idle_timeout seconds and
+        the next available one is accepted.
+        Failed messages are abandoned so they are redelivered before the rest of their session; the retry policy is
+        not applied because a re-published copy would be processed out of order.
+        Args:
+            subscription (str): The name of the subscription to subscribe to.
+            callback (function): The callback function to invoke for each message.
+            max_concurrent_sessions (int): Sessions processed in parallel (defaults to, and is capped at,
+                max_concurrent_messages so every session has a worker slot).
+            max_receivable_messages (int): Stop after this many messages have been processed (-1 = run forever).
+            session_idle_timeout (float): Seconds to wait for a session, and for the next message of a session.
+            prefetch_count (int): Messages the Service Bus link prefetches per session (0 = disabled).
+        Returns:
+            dict: Summary of the run (see `subscribe`).
+        """
+        run_started = time.monotonic()
+        metrics_at_start = self.metrics.snapshot()
+        self.stopping = False
+        self.drain_deadline = None
+        self.receive_mode = 'peek_lock'
+        self.subscription_name = subscription
+        self.max_concurrent_sessions = max(int(max_concurrent_sessions or self.max_concurrent_messages), 1)
+        if self.max_concurrent_sessions > self.max_concurrent_messages:
+            logger.warning(
+                f'max_concurrent_sessions {self.max_concurrent_sessions} is above max_concurrent_messages; '
+                f'processing {self.max_concurrent_messages} sessions in parallel'
+            )
+            self.max_concurrent_sessions = self.max_concurrent_messages
+        self.session_idle_timeout = session_idle_timeout
+        self.received_messages = 0
+        self.reserved_messages = 0
+        session_threads = [
+            threading.Thread(
+                target=self._run_session_loop,
+                args=(subscription, callback, max_receivable_messages, prefetch_count),
+                name=f'AzureTopicSession-{index}',
+                daemon=True,
+            )
+            for index in range(self.max_concurrent_sessions)
+        ]
+        for session_thread in session_threads:
+            session_thread.start()
+        for session_thread in session_threads:
+            session_thread.join()
+        self._report_metrics(force=True)
+        summary = self._create_run_summary(run_started, metrics_at_start, max_receivable_messages, None)
+        self._shutdown_worker_pool()
+        self._close_after_stop()
+        return summary
+
+    def _run_session_loop(self, subscription, callback, max_receivable_messages, prefetch_count):
+        while not self.stopping and not self._received_all(max_receivable_messages):
+            receiver = self.client.get_subscription_receiver(
+                topic_name=self.topic_name,
+                subscription_name=subscription,
+                session_id=NEXT_AVAILABLE_SESSION,
+                max_wait_time=self.session_idle_timeout,
+                prefetch_count=max(int(prefetch_count or 0), 0),
+            )
+            try:
+                # Opening the link accepts the next available session, outside of any max_receivable_messages
+                # reservation, and closing it releases the session.
+                with receiver:
+                    self.receiver = receiver
+                    self._consume_session(callback, max_receivable_messages)
+                self.receive_supervisor.record_success()
+            except OperationTimeoutError:
+                # No session had messages within session_idle_timeout; ask again.
+                continue
+            except Exception as e:
+                delay = self.receive_supervisor.record_failure(e)
+                logger.error(f'Error in receiving session messages, retrying in {delay:.1f}s: {e}')
+                self._back_off(delay)
+            finally:
+                self.receiver = None
+
+    def _consume_session(self, callback, max_receivable_messages):
+        """
+        Processes the messages of the session the receiver accepted, one at a time, until it stays empty.
+        """
+        session = None
+        try:
+            while not self.stopping and not self._received_all(max_receivable_messages):
+                messages = self._receive_messages(1, max_receivable_messages, self.session_idle_timeout)
+                if messages is None:
+                    # Other sessions reserved the rest of max_receivable_messages; hold on to this session until
+                    # their receive calls return.
+                    time.sleep(0.05)
+                    continue
+                if not messages:
+                    return
+                if session is None:
+                    # The session is only known once the receiver link is open.
+                    session = self.receiver.session
+                    self.lock_renewal.register(
+                        self.receiver,
+                        session,
+                        max_lock_renewal_duration=self.max_renewal_duration,
+                        on_lock_renew_failure=self._handle_lock_renew_failure,
+                    )
+                for message in messages:
+                    self.metrics.on_received(message)
+                    self._process_session_message(message, callback)
+        finally:
+            if session is not None:
+                self.lock_renewal.unregister(session)
+
+    def _process_session_message(self, message, callback):
+        if self._skip_foreign_retry(message) or self._complete_duplicate(message):
+            return
+        # Adaptive concurrency or a shared budget can lower the limit below the sessions in flight; wait for a slot
+        # rather than oversubscribe the executor / worker pool.
+        while not self._reserve_slot():
+            if self.stopping:
+                self._abandon_unprocessed_message(message)
+                return
+            time.sleep(0.05)
+        self.metrics.on_started(message)
+        try:
+            execution_task = self._submit_processing_task(message, callback)
+        except Exception as e:
+            self._abandon_unstarted_messages([message], e)
+            return
+        self._start_callback_deadline(execution_task)
+        self.pending_tasks.append((execution_task, message))
+        # The next message of the session is only received once this one is settled.
+        while self._get_active_task_count() > 0:
+            if self.stopping and time.monotonic() >= self.drain_deadline:
+                self._abandon_pending_tasks()
+                break
+            self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
+
+    def _received_all(self, max_receivable_messages):
+        return max_receivable_messages > 0 and self.received_messages >= max_receivable_messages
+
+    def _is_idle(self, exit_when_idle):
+        return exit_when_idle is not None and time.monotonic() - self.last_message_at >= exit_when_idle
+
+    def _create_run_summary(self, run_started, metrics_at_start, max_receivable_messages, exit_when_idle):
+        """
+        Summarises one subscribe call from the difference between the metrics at its start and at its end.
+        """
+        metrics = self.metrics.snapshot()
+        outcomes = {
+            outcome: count - metrics_at_start['outcomes'].get(outcome, 0)
+            for outcome, count in metrics['outcomes'].items()
+        }
+        callbacks = metrics['histograms']['callback_duration']
+        callbacks_at_start = metrics_at_start['histograms']['callback_duration']
+        callback_count = callbacks['count'] - callbacks_at_start['count']
+        callback_time = callbacks['sum'] - callbacks_at_start['sum']
+        if self.stopping:
+            exit_reason = 'stopped'
+        elif exit_when_idle is not None and self._is_idle(exit_when_idle):
+            exit_reason = 'idle'
+        else:
+            exit_reason = 'max_receivable_messages'
+        return {
+            'subscription': self.subscription_name,
+            'exit_reason': exit_reason,
+            'duration': time.monotonic() - run_started,
+            'received': self.received_messages,
+            'completed': outcomes.get('completed', 0),
+            'failed': sum(outcomes.get(outcome, 0) for outcome in FAILED_OUTCOMES),
+            'outcomes': outcomes,
+            'callback_duration': {
+                'count': callback_count,
+                'total': callback_time,
+                'avg': callback_time / callback_count if callback_count else None,
+            },
+        }
+
+    def _create_receiver(self, subscription, prefetch_count):
+        receiver_options = {}
+        if self.receive_mode == 'receive_and_delete':
+            receiver_options['receive_mode'] = ServiceBusReceiveMode.RECEIVE_AND_DELETE
+        return self.client.get_subscription_receiver(
+            topic_name=self.topic_name,
+            subscription_name=subscription,
+            prefetch_count=max(int(prefetch_count or 0), 0),
+            **receiver_options,
+        )
+
+    def _reconnect_receiver(self, subscription, prefetch_count):
+        if self.receiver is not None or self.stopping:
+            return
+        self.receiver = self._create_receiver(subscription, prefetch_count)
+        self.receive_supervisor.record_reconnect()
+        logger.info(f'Opened a new receiver link on {self.topic_name}/{subscription}')
+
+    def _recover_receive_loop(self, error):
+        """
+        Backs off after a failed receive loop iteration and retires the receiver link when it cannot be reused.
+        Tasks in flight keep running and are settled while the loop waits.
+        """
+        delay = self.receive_supervisor.record_failure(error)
+        logger.error(
+            f'Error in receiving messages, retrying in {delay:.1f}s '
+            f'(circuit {self.receive_supervisor.state}): {error}'
+        )
+        if self.receiver is not None and self.receive_supervisor.should_rebuild(error):
+            self._retire_receiver()
+        self._back_off(delay)
+
+    def _back_off(self, delay):
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.stopping:
+                return
+            # Short waits so a stop request is picked up during long backoffs.
+            if len(self.pending_tasks) == 0:
+                time.sleep(min(remaining, 1))
+                continue
+            try:
+                self._wait_for_pending_tasks(timeout=min(remaining, 1))
+            except Exception as e:
+                logger.error(f'Error in settling messages: {e}')
+                time.sleep(min(remaining, 1))
+
+    def _drain(self, callback):
+        """
+        One receive loop iteration while stopping. Returns True once nothing is left in flight.
+        """
+        if self._settles_messages():
+            while self.receive_ahead_buffer:
+                self._abandon_unprocessed_message(self.receive_ahead_buffer.popleft())
+        else:
+            # Receive-and-delete messages are already gone from the subscription; process them while draining.
+            self._dispatch_buffered_messages(callback)
+        if self._get_active_task_count() == 0 and len(self.receive_ahead_buffer) == 0:
+            return True
+        remaining = self.drain_deadline - time.monotonic()
+        if remaining <= 0:
+            self._abandon_pending_tasks()
+            return True
+        self._wait_for_pending_tasks(timeout=min(remaining, self.wait_time_for_message))
+        return False
+
+    def _abandon_unprocessed_message(self, message):
+        outcome = 'abandoned'
+        try:
+            self._get_message_receiver(message).abandon_message(message)
+        except Exception as e:
+            logger.error(f'Error in abandoning message {self._get_message_id(message)}: {e}')
+            outcome = 'settle_failed'
+        self.lock_renewal.unregister(message)
+        self.metrics.on_settled(message, outcome)
+
+    def _abandon_pending_tasks(self):
+        """
+        Abandons the messages of callbacks still running when the drain timeout passed. Process and pool workers are
+        terminated; thread callbacks cannot be stopped and finish in the background.
+        """
+        error = 'Subscription stopped before the callback finished'
+        for task, incoming_message in self.pending_tasks:
+            if incoming_message is None:
+                continue
+            messages = incoming_message if isinstance(incoming_message, list) else [incoming_message]
+            logger.warning(
+                f'Drain timeout passed; abandoning message(s) '
+                f'{", ".join(str(self._get_message_id(message)) for message in messages)}'
+            )
+            if hasattr(task, 'terminate'):
+                task.terminate()
+            try:
+                for message in messages:
+                    self._settle_message(message, {'success': False, 'error': error, 'interrupted': True})
+            finally:
+                self._release_slot()
+        self.pending_tasks = []
+
+    def _close_after_stop(self):
+        if self.stopping and self.close_on_stop:
+            self.close()
+
+    def _retire_receiver(self):
+        """
+        Replaces the receiver on the next loop iteration. Messages in flight stay bound to the receiver that received
+        them; it is closed once they are all settled.
+        """
+        retired_receiver = self.receiver
+        self.receiver = None
+        for message in self._get_in_flight_messages():
+            self.loop_state.message_receivers.setdefault(id(message), (message, retired_receiver))
+        self.loop_state.retired_receivers.append(retired_receiver)
+        self._close_retired_receivers()
+
+    def _close_retired_receivers(self, force=False):
+        if not self.loop_state.retired_receivers:
+            return
+        in_flight = {id(message) for message in self._get_in_flight_messages()}
+        self.loop_state.message_receivers = {
+            key: owner for key, owner in self.loop_state.message_receivers.items() if key in in_flight
+        }
+        remaining_receivers = []
+        for retired_receiver in self.loop_state.retired_receivers:
+            if not force and any(owner is retired_receiver for _, owner in self.loop_state.message_receivers.values()):
+                remaining_receivers.append(retired_receiver)
+                continue
+            try:
+                retired_receiver.close()
+            except Exception as e:
+                logger.error(f'Error in closing receiver: {e}')
+        self.loop_state.retired_receivers = remaining_receivers
+
+    def _get_in_flight_messages(self):
+        messages = list(self.receive_ahead_buffer)
+        for _, incoming_message in self.pending_tasks:
+            if isinstance(incoming_message, list):
+                messages.extend(incoming_message)
+            elif incoming_message is not None:
+                messages.append(incoming_message)
+        return messages
+
+    def _get_message_receiver(self, message):
+        """
+        Returns the receiver a message has to be settled through: the one that received it.
+        """
+        owner = self.loop_state.message_receivers.get(id(message))
+        return self.receiver if owner is None else owner[1]
+
+    def _receive_messages(self, to_receive, max_receivable_messages, max_wait_time):
+        """
+        Receives up to to_receive messages. The count is reserved against max_receivable_messages before the call so
+        parallel receive loops never fetch more than the limit together. Returns None when the limit left nothing to
+        request.
+        """
+        with self.thread_lock:
+            if max_receivable_messages > 0:
+                to_receive = min(to_receive, max_receivable_messages - self.received_messages - self.reserved_messages)
+            if to_receive <= 0:
+                return None
+            self.reserved_messages += to_receive
+        messages = []
+        try:
+            messages = self.receiver.receive_messages(max_message_count=to_receive, max_wait_time=max_wait_time) or []
+        finally:
+            with self.thread_lock:
+                self.reserved_messages -= to_receive
+                self.received_messages += len(messages)
+            if self.concurrency_budget is not None:
+                self.concurrency_budget.record_receive(self.budget_name, len(messages))
+        return messages
+
+    def subscribe_batch(self, subscription: str, callback, max_batch_size=100, max_wait=5, max_receivable_messages=-1,
+                        prefetch_count=0, admission_policy: MemoryAdmissionPolicy=None):
+        """
+        Subscribes to a subscription of the topic and invokes the callback with lists of messages.
+        The callback receives a list of QueueMessage objects and returns None/True (all succeeded), False (all failed),
+        a {messageId or position: bool} map or a list of bools. Succeeded messages are completed and the others
+        abandoned. Each batch takes one of the max_concurrent_messages slots and runs in the configured execution mode.
+        Args:
+            subscription (str): The name of the subscription to subscribe to.
+            callback (function): The callback function to invoke for each batch.
+            max_batch_size (int): The maximum number of messages in one batch.
+            max_wait (float): The maximum time in seconds to wait for messages before a partial batch is delivered.
+            max_receivable_messages (int): Stop after this many messages have been processed (-1 = run forever).
+            prefetch_count (int): Messages the Service Bus link prefetches into the SDK cache (0 = disabled).
+            admission_policy (MemoryAdmissionPolicy): Stops requesting new batches while memory usage is too high.
+        Returns:
+            dict: Summary of the run (see `subscribe`).
+        """
+        max_batch_size = max(int(max_batch_size), 1)
+        run_started = time.monotonic()
+        metrics_at_start = self.metrics.snapshot()
+        self.stopping = False
+        self.drain_deadline = None
+        self.last_message_at = run_started
+        self.receive_mode = 'peek_lock'
+        self.subscription_name = subscription
+        self.admission_policy = admission_policy
+        self.receiver = self._create_receiver(subscription, prefetch_count)
+        self.received_messages = 0
+        self.reserved_messages = 0
+        while True:
+                try:
+                    self._reconnect_receiver(subscription, prefetch_count)
+                    self._settle_completed_tasks()
+                    self._report_metrics()
+                    if self.stopping:
+                        if self._drain(callback):
+                            break
+                        continue
+                    self._update_concurrency_limit()
+                    if max_receivable_messages > 0 and self.received_messages >= max_receivable_messages:
+                        if self._get_active_task_count() == 0:
+                            break
+                        self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
+                        continue
+                    admitted = self.admission_policy is None or self.admission_policy.admits()
+                    if not admitted or self._get_free_slot_count() <= 0:
+                        if len(self.pending_tasks) > 0:
+                            self._wait_for_pending_tasks(timeout=self.wait_time_for_message)
                         else:
                             time.sleep(self.wait_time_for_message)
+                        continue
+                    self.receive_supervisor.before_attempt()
+                    messages = self._receive_messages(max_batch_size, max_receivable_messages, max_wait)
+                    self.receive_supervisor.record_success()
+                    if not messages or len(messages) == 0:
+                        if len(self.pending_tasks) > 0:
+                            self._wait_for_pending_tasks(timeout=0.5)
+                        continue
+                    self.last_message_at = time.monotonic()
+                    for message in messages:
+                        self.metrics.on_received(message)
+                    self._dispatch_batch(messages, callback)
                 except Exception as e:
-                    logger.error(f'Error in receiving messages: {e}')
+                    self._recover_receive_loop(e)
+        self._close_retired_receivers(force=True)
+        self._report_metrics(force=True)
+        summary = self._create_run_summary(run_started, metrics_at_start, max_receivable_messages, None)
+        self._shutdown_worker_pool()
+        self._close_after_stop()
+        return summary
 
     
     def internal_callback(self, message_payload, callbackfn):
@@ -147,30 +1108,96 @@ class AzureTopic(TopicAbstract):
         return self._settle_task(x)
 
     def _submit_processing_task(self, message, callback):
-        message_payload = str(message)
-        if self.callback_execution_mode == 'process':
+        if self.callback_execution_mode == 'pool':
+            try:
+                return self._submit_pool_task(self._get_process_payload(message), callback)
+            except Exception as exc:
+                self._release_shared_payload(message)
+                logger.warning(
+                    'Falling back to thread execution for message %s because the worker pool is unavailable: %s',
+                    self._get_message_id(message),
+                    exc,
+                )
+        elif self.callback_execution_mode == 'process':
             try:
-                return self._submit_process_task(message_payload, callback)
+                return self._submit_process_task(self._get_process_payload(message), callback)
             except Exception as exc:
+                self._release_shared_payload(message)
                 logger.warning(
                     'Falling back to thread execution for message %s because process start failed: %s',
                     self._get_message_id(message),
                     exc,
                 )
-        return self._submit_thread_task(message_payload, callback)
+        return self._submit_thread_task(str(message), callback)
+
+    def _get_process_payload(self, message):
+        """
+        Returns the payload sent to a callback process: the body string, or the handle of a memory-mapped copy
+        when shared payloads are enabled and the body is large enough. When the copy cannot be written (for example
+        /dev/shm is full) the body string is sent, so the message still runs in the configured execution mode.
+        """
+        if self.shared_payload_min_size is None:
+            return str(message)
+        body_sections = get_body_sections(message)
+        if body_sections is None or sum(memoryview(section).nbytes for section in body_sections) < self.shared_payload_min_size:
+            return str(message)
+        try:
+            shared_payload = SharedPayload(body_sections, directory=self.shared_payload_directory)
+        except OSError as e:
+            logger.warning(
+                'Sending message %s to the callback process without a shared payload: %s',
+                self._get_message_id(message),
+                e,
+            )
+            return str(message)
+        with self.thread_lock:
+            self.shared_payloads[id(message)] = shared_payload
+        return shared_payload.handle
+
+    def _release_shared_payload(self, message):
+        with self.thread_lock:
+            shared_payload = self.shared_payloads.pop(id(message), None)
+        if shared_payload is not None:
+            shared_payload.release()
+
+    def _submit_batch_task(self, messages, callback):
+        message_payloads = [str(message) for message in messages]
+        if self.callback_execution_mode == 'pool':
+            try:
+                return self._submit_pool_task(message_payloads, callback, runner=run_batch_callback)
+            except Exception as exc:
+                logger.warning(
+                    'Falling back to thread execution for a batch of %s messages because the worker pool is unavailable: %s',
+                    len(messages),
+                    exc,
+                )
+        elif self.callback_execution_mode == 'process':
+            try:
+                return self._submit_process_task(message_payloads, callback, target=_run_batch_callback_in_subprocess)
+            except Exception as exc:
+                logger.warning(
+                    'Falling back to thread execution for a batch of %s messages because process start failed: %s',
+                    len(messages),
+                    exc,
+                )
+        future = self.executor.submit(run_batch_callback, callback, message_payloads)
+        return _FutureExecutionTask(future, on_done=self.completion_signal.notify)
 
     def _submit_thread_task(self, message_payload, callback):
         future = self.executor.submit(self.internal_callback, message_payload, callback)
-        return _FutureExecutionTask(future)
+        return _FutureExecutionTask(future, on_done=self.completion_signal.notify)
 
-    def _submit_process_task(self, message_payload, callback):
+    def _submit_process_task(self, message_payload, callback, target=None):
         if self.process_context is None:
             raise RuntimeError('Process execution mode is not available for this environment.')
 
         parent_connection, child_connection = self.process_context.Pipe(duplex=False)
+        args = (message_payload, callback, child_connection)
+        if self.worker_initializer is not None:
+            args += (self.worker_initializer,)
         callback_process = self.process_context.Process(
-            target=_run_callback_in_subprocess,
-            args=(message_payload, callback, child_connection),
+            target=target or _run_callback_in_subprocess,
+            args=args,
         )
         try:
             callback_process.start()
@@ -181,35 +1208,340 @@ class AzureTopic(TopicAbstract):
         child_connection.close()
         return _ProcessExecutionTask(callback_process, parent_connection)
 
-    def _get_receivable_count(self, max_receivable_messages=-1):
+    def _submit_pool_task(self, message_payload, callback, runner=None):
+        if self.process_context is None:
+            raise RuntimeError('Process execution mode is not available for this environment.')
+
+        if self.shared_worker_pool is not None and runner is None:
+            # Host-owned pool: the workers look the callback up by the budget name.
+            return self.shared_worker_pool.submit((self.budget_name, message_payload))
+
+        with self.worker_pool_lock:
+            if self.worker_pool is None or self.worker_pool.callback is not callback or self.worker_pool_runner is not runner:
+                # Workers are bound to one callback so it is handed over once at start-up instead of per message.
+                self._shutdown_worker_pool()
+                self.worker_pool = CallbackWorkerPool(
+                    process_context=self.process_context,
+                    callback=callback,
+                    size=self.max_concurrent_messages,
+                    max_messages_per_worker=self.max_messages_per_worker,
+                    runner=runner,
+                    initializer=self.callback_process_initializer,
+                )
+                self.worker_pool_runner = runner
+                self.worker_pool.start()
+            worker_pool = self.worker_pool
+        return worker_pool.submit(message_payload)
+
+    def _shutdown_worker_pool(self):
+        if self.worker_pool is None:
+            return
+        try:
+            self.worker_pool.shutdown()
+        except Exception as e:
+            logger.error(f'Error shutting down callback worker pool: {e}')
+        finally:
+            self.worker_pool = None
+
+    def _dispatch_buffered_messages(self, callback):
+        while self.receive_ahead_buffer and self._get_free_slot_count() > 0:
+            message = self.receive_ahead_buffer.popleft()
+            if self._settles_messages() and not self._has_dispatchable_lock(message):
+                self.lock_renewal.unregister(message)
+                self.metrics.on_settled(message, 'dropped')
+                continue
+            if self._skip_foreign_retry(message) or self._complete_duplicate(message):
+                continue
+            if not self._reserve_slot():
+                # Another receive loop took the slot; dispatch on the next pass.
+                self.receive_ahead_buffer.appendleft(message)
+                break
+            self.metrics.on_started(message)
+            try:
+                execution_task = self._submit_processing_task(message, callback)
+            except Exception as e:
+                self._abandon_unstarted_messages([message], e)
+                continue
+            self._start_callback_deadline(execution_task)
+            self.pending_tasks.append((execution_task, message))
+
+    def _buffer_received_messages(self, messages):
+        """
+        Queues received messages for dispatch. Their locks are renewed from arrival, so messages waiting behind long
+        callbacks in the receive-ahead buffer keep their lock and delivery count.
+        """
+        for message in messages:
+            self.metrics.on_received(message)
+            if self._settles_messages():
+                self._register_lock_renewal(message)
+        self.receive_ahead_buffer.extend(messages)
+
+    def _register_lock_renewal(self, message):
+        self.lock_renewal.register(
+            self._get_message_receiver(message),
+            message,
+            max_lock_renewal_duration=self.max_renewal_duration,
+            on_lock_renew_failure=self._handle_lock_renew_failure,
+        )
+
+    def _dispatch_batch(self, messages, callback):
+        messages = [
+            message for message in messages
+            if not self._skip_foreign_retry(message) and not self._complete_duplicate(message)
+        ]
+        if not messages:
+            return
+        self._reserve_slot(force=True)
+        for message in messages:
+            self.metrics.on_started(message)
+        try:
+            execution_task = self._submit_batch_task(messages, callback)
+        except Exception as e:
+            self._abandon_unstarted_messages(messages, e)
+            return
+        self._start_callback_deadline(execution_task)
+        for message in messages:
+            self._register_lock_renewal(message)
+        self.pending_tasks.append((execution_task, list(messages)))
+
+    def _abandon_unstarted_messages(self, messages, error):
+        """
+        Gives back the slot of a callback that could not be started and abandons its messages.
+        """
+        logger.error(
+            f'Unable to start the callback of message(s) '
+            f'{", ".join(str(self._get_message_id(message)) for message in messages)}: {error}'
+        )
+        try:
+            for message in messages:
+                self._settle_message(message, {'success': False, 'error': str(error), 'interrupted': True})
+        finally:
+            self._release_slot()
+
+    def _settles_messages(self):
+        return self.receive_mode == 'peek_lock'
+
+    def _skip_foreign_retry(self, message):
+        """
+        Completes a retry copy that another subscription of the topic re-published. Returns True if it was one.
+        """
+        retry_subscription = _get_application_property(message, RETRY_SUBSCRIPTION_PROPERTY)
+        if retry_subscription is None or retry_subscription == self.subscription_name:
+            return False
+        try:
+            if self._settles_messages():
+                self._get_message_receiver(message).complete_message(message)
+        except Exception as e:
+            logger.error(f'Error in completing retry message of subscription {retry_subscription}: {e}')
+        self.lock_renewal.unregister(message)
+        self.metrics.on_settled(message, 'skipped')
+        return True
+
+    def _complete_duplicate(self, message):
+        """
+        Completes a message that was already processed to completion. Returns True if it was a duplicate.
+        """
+        if self.idempotency_cache is None:
+            return False
+        message_id = self._get_idempotency_key(message)
+        if not self.idempotency_cache.is_completed(message_id):
+            return False
+        logger.info(f'Completing duplicate message {message_id} without invoking the callback')
+        outcome = 'duplicate'
+        try:
+            if self._settles_messages():
+                self._get_message_receiver(message).complete_message(message)
+        except Exception as e:
+            logger.error(f'Error in completing duplicate message: {e}')
+            outcome = 'settle_failed'
+        self.lock_renewal.unregister(message)
+        self.metrics.on_settled(message, outcome)
+        return True
+
+    @staticmethod
+    def _get_idempotency_key(message):
+        # Retry copies carry a new message_id; they are deduplicated under the id of the first delivery.
+        message_id = _get_application_property(message, RETRY_ORIGINAL_MESSAGE_ID_PROPERTY)
+        if isinstance(message_id, str) and message_id:
+            return message_id
+        message_id = getattr(message, 'message_id', None)
+        if isinstance(message_id, str) and message_id:
+            return message_id
+        try:
+            body = json.loads(str(message))
+        except (TypeError, ValueError):
+            return None
+        message_id = body.get('messageId') if isinstance(body, dict) else None
+        return message_id if isinstance(message_id, str) and message_id else None
+
+    def _has_dispatchable_lock(self, message):
+        """
+        Checks that a buffered message still has enough lock time left to be handed to a callback.
+        Messages close to expiry are abandoned so Service Bus redelivers them right away.
+        """
+        locked_until = getattr(message, 'locked_until_utc', None)
+        if getattr(message, '_lock_expired', False):
+            remaining = 0
+        elif isinstance(locked_until, datetime):
+            if locked_until.tzinfo is None:
+                locked_until = locked_until.replace(tzinfo=timezone.utc)
+            remaining = (locked_until - datetime.now(timezone.utc)).total_seconds()
+        else:
+            return True
+        if remaining >= self.receive_ahead_lock_margin:
+            return True
+        logger.warning(
+            f'Dropping buffered message {self._get_message_id(message)} because its lock expires in {remaining:.1f}s'
+        )
+        if remaining > 0:
+            try:
+                self._get_message_receiver(message).abandon_message(message)
+            except Exception as e:
+                logger.error(f'Error in abandoning buffered message: {e}')
+        return False
+
+    def _get_concurrency_limit(self):
+        if self.concurrency_controller is None:
+            return self.max_concurrent_messages
+        return min(self.concurrency_controller.limit, self.max_concurrent_messages)
+
+    def _update_concurrency_limit(self):
+        if self.concurrency_controller is None:
+            return
+        with self.thread_lock:
+            in_flight = self.internal_count
+        self.concurrency_controller.update(in_flight)
+
+    def _get_free_slot_count(self):
+        with self.thread_lock:
+            free_slots = self._get_concurrency_limit() - self.internal_count
+        if self.concurrency_budget is not None:
+            free_slots = min(free_slots, self.concurrency_budget.available(self.budget_name))
+        return free_slots
+
+    def _reserve_slot(self, force=False):
+        """
+        Takes one slot of the concurrency budget shared by all receive loops. Batches always take their slot
+        because the messages are already received.
+        """
+        with self.thread_lock:
+            if self._get_concurrency_limit() - self.internal_count <= 0 and not force:
+                return False
+            if self.concurrency_budget is not None and not self.concurrency_budget.acquire(self.budget_name, force=force):
+                return False
+            self.internal_count += 1
+            return True
+
+    def _release_slot(self):
         with self.thread_lock:
-            available_slots = self.max_concurrent_messages - self.internal_count
+            if self.internal_count > 0 and self.concurrency_budget is not None:
+                self.concurrency_budget.release(self.budget_name)
+            self.internal_count = max(self.internal_count - 1, 0)
+
+    def _get_receivable_count(self, max_receivable_messages=-1):
+        if self.admission_policy is not None and not self.admission_policy.admits():
+            return 0
+        free_slots = self._get_free_slot_count()
+        if self.receiver_count > 1 and free_slots > 0:
+            # Split the free slots between the receive loops so they do not all fetch for the same slots.
+            free_slots = -(-free_slots // self.receiver_count)
+        available_slots = free_slots + self.receive_ahead - len(self.receive_ahead_buffer)
         if max_receivable_messages > 0:
-            remaining_messages = max_receivable_messages - self.receiver.local_received_messages
+            remaining_messages = max_receivable_messages - self.received_messages - self.reserved_messages
             available_slots = min(available_slots, remaining_messages)
         return max(available_slots, 0)
 
     def _wait_for_pending_tasks(self, timeout=0.5):
+        """
+        Blocks until any pending task finishes (or the timeout passes) and settles the finished tasks.
+        Thread tasks wake the loop through the completion signal, process tasks through their result
+        pipe and process sentinel.
+        """
         if len(self.pending_tasks) == 0:
             return
-        if timeout <= 0:
-            self._settle_completed_tasks()
-            return
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if any(task.done() for task, _ in self.pending_tasks):
-                break
-            time.sleep(min(0.1, max(deadline - time.time(), 0)))
+        next_deadline = self._get_next_deadline()
+        if next_deadline is not None:
+            # Wake up in time to enforce the callback deadline.
+            timeout = min(timeout, max(next_deadline - time.monotonic(), 0))
+        wait_handles = [self.completion_signal.wait_handle]
+        task_ready = False
+        for task, _ in self.pending_tasks:
+            task_handles = task.wait_handles() if hasattr(task, 'wait_handles') else None
+            if task_handles is None:
+                task_ready = task_ready or task.done()
+            else:
+                wait_handles.extend(task_handles)
+        if timeout > 0 and not task_ready:
+            mp_connection.wait(wait_handles, timeout=timeout)
+        self.completion_signal.clear()
         self._settle_completed_tasks()
 
     def _settle_completed_tasks(self):
+        self._expire_overdue_tasks()
         remaining_tasks = []
         for future, incoming_message in self.pending_tasks:
-            if future.done():
+            if future.done() and incoming_message is None:
+                # A timed-out thread callback finally returned; its message was already settled.
+                self._release_leaked_slot()
+            elif future.done() and isinstance(incoming_message, list):
+                self._settle_batch_task(future, incoming_message)
+            elif future.done():
                 self._settle_task(future, incoming_message=incoming_message)
             else:
                 remaining_tasks.append((future, incoming_message))
         self.pending_tasks = remaining_tasks
+        self._close_retired_receivers()
+
+    def _get_active_task_count(self):
+        return sum(1 for _, incoming_message in self.pending_tasks if incoming_message is not None)
+
+    def _start_callback_deadline(self, execution_task):
+        if self.callback_timeout is not None:
+            execution_task.deadline = time.monotonic() + self.callback_timeout
+
+    def _get_next_deadline(self):
+        deadlines = [
+            task.deadline for task, incoming_message in self.pending_tasks
+            if incoming_message is not None and getattr(task, 'deadline', None) is not None
+        ]
+        return min(deadlines) if deadlines else None
+
+    def _expire_overdue_tasks(self):
+        """
+        Settles the messages of callbacks that ran past their deadline. Process and pool workers are terminated;
+        a thread callback keeps its slot (leaked) until it returns, because threads cannot be stopped.
+        """
+        now = time.monotonic()
+        remaining_tasks = []
+        for task, incoming_message in self.pending_tasks:
+            deadline = getattr(task, 'deadline', None)
+            if incoming_message is None or deadline is None or now < deadline or task.done():
+                remaining_tasks.append((task, incoming_message))
+                continue
+            messages = incoming_message if isinstance(incoming_message, list) else [incoming_message]
+            error = f'Callback exceeded its deadline of {self.callback_timeout}s'
+            logger.error(
+                f'{error}; settling message(s) '
+                f'{", ".join(str(self._get_message_id(message)) for message in messages)} '
+                f'with {self.callback_timeout_action}'
+            )
+            terminated = task.terminate() if hasattr(task, 'terminate') else False
+            try:
+                for message in messages:
+                    self._settle_message(message, {'success': False, 'error': error, 'timed_out': True})
+            finally:
+                if terminated:
+                    self._release_slot()
+                else:
+                    with self.thread_lock:
+                        self.leaked_slots += 1
+                    remaining_tasks.append((task, None))
+        self.pending_tasks = remaining_tasks
+
+    def _release_leaked_slot(self):
+        with self.thread_lock:
+            self.leaked_slots = max(self.leaked_slots - 1, 0)
+        self._release_slot()
 
     def _settle_task(self, x, incoming_message=None):
         """
@@ -217,39 +1549,212 @@ class AzureTopic(TopicAbstract):
         Args:
             x: The task object representing the message processing.
         """
+        task_result = self._get_task_result(x)
+        try:
+            if incoming_message is not None:
+                self._settle_message(incoming_message, task_result)
+        finally:
+            self._release_slot()
+
+    def _settle_batch_task(self, x, incoming_messages):
+        """
+        Completes the messages the batch callback reported as succeeded, abandons the others and releases the slot.
+        """
+        task_result = self._get_task_result(x)
+        results = task_result.get('results') or [bool(task_result.get('success'))] * len(incoming_messages)
+        error = task_result.get('error') or 'batch callback reported failure'
+        try:
+            for incoming_message, success in zip(incoming_messages, results):
+                self._settle_message(incoming_message, {
+                    'success': success,
+                    'error': error,
+                    'timed_out': task_result.get('timed_out', False),
+                })
+        finally:
+            self._release_slot()
+
+    @staticmethod
+    def _get_task_result(x):
         try:
-            task_result = x.result()
+            return x.result()
         except Exception as e:
-            task_result = {
+            return {
                 'success': False,
                 'error': f'Callback worker exited before returning a result: {e}',
             }
 
+    def _settle_message(self, incoming_message, task_result):
+        self._release_shared_payload(incoming_message)
+        if not self._settles_messages():
+            self._record_unsettled_message(incoming_message, task_result)
+            return
+        outcome = 'settle_failed'
+        settlement_latency = None
         try:
-            if incoming_message is None:
-                return
-            if getattr(incoming_message, '_lock_expired', False):
+            callback_duration = self.metrics.on_finished(incoming_message)
+            if self.concurrency_controller is not None:
+                self.concurrency_controller.record(callback_duration, bool(task_result.get('success')))
+            if task_result.get('success') and self.idempotency_cache is not None:
+                # Marked before settling: when the lock was lost and completion fails, the redelivery is a duplicate.
+                self.idempotency_cache.mark_completed(self._get_idempotency_key(incoming_message))
+            lock_expired, locked_until, auto_renew_error = self._get_lock_state(incoming_message)
+            if lock_expired:
                 logger.error(
                     f'Skipping settlement for message {self._get_message_id(incoming_message)} '
-                    f'because the lock expired at {getattr(incoming_message, "locked_until_utc", None)}. '
-                    f'auto_renew_error={getattr(incoming_message, "auto_renew_error", None)}'
+                    f'because the lock expired at {locked_until}. '
+                    f'auto_renew_error={auto_renew_error}'
                 )
+                outcome = 'lock_expired'
                 return
+            settle_started = time.monotonic()
             if task_result.get('success'):
-                self.receiver.complete_message(incoming_message)
+                self._get_message_receiver(incoming_message).complete_message(incoming_message)
+                outcome = 'completed'
+            elif task_result.get('interrupted'):
+                self._get_message_receiver(incoming_message).abandon_message(incoming_message)
+                outcome = 'abandoned'
+            elif task_result.get('timed_out'):
+                if self.callback_timeout_action == 'dead_letter':
+                    self._get_message_receiver(incoming_message).dead_letter_message(
+                        incoming_message,
+                        reason='CallbackTimeout',
+                        error_description=task_result.get('error'),
+                    )
+                else:
+                    self._get_message_receiver(incoming_message).abandon_message(incoming_message)
+                outcome = 'timed_out'
             else:
                 logger.error(
                     'Processing failed for message %s: %s',
                     self._get_message_id(incoming_message),
                     task_result.get('error', 'unknown processing failure'),
                 )
-                self.receiver.abandon_message(incoming_message)
+                outcome = self._retry_failed_message(incoming_message, task_result.get('error'))
+            settlement_latency = time.monotonic() - settle_started
         except Exception as e:
             logger.error(f'Error in settling message: {e}')
         finally:
-            with self.thread_lock:
-                self.internal_count = max(self.internal_count - 1, 0)
-        return
+            lock_renewals = self.lock_renewal.unregister(incoming_message)
+            self.metrics.on_settled(incoming_message, outcome, settlement_latency, lock_renewals)
+
+    def _get_lock_state(self, message):
+        """
+        Returns (expired, locked_until_utc, auto_renew_error) of the lock a message is settled under. Session messages
+        are locked through their session, and the SDK raises TypeError when asked whether their own lock expired.
+        """
+        if not isinstance(getattr(message, 'session_id', None), str):
+            try:
+                return (
+                    getattr(message, '_lock_expired', False),
+                    getattr(message, 'locked_until_utc', None),
+                    getattr(message, 'auto_renew_error', None),
+                )
+            except TypeError:
+                pass
+        session = getattr(self._get_message_receiver(message), 'session', None)
+        locked_until = getattr(session, 'locked_until_utc', None)
+        lock_expired = False
+        if isinstance(locked_until, datetime):
+            if locked_until.tzinfo is None:
+                locked_until = locked_until.replace(tzinfo=timezone.utc)
+            lock_expired = locked_until <= datetime.now(timezone.utc)
+        return lock_expired, locked_until, getattr(session, 'auto_renew_error', None)
+
+    def _record_unsettled_message(self, incoming_message, task_result):
+        """
+        Receive-and-delete mode: the message is already gone from the subscription, only the outcome is recorded.
+        """
+        callback_duration = self.metrics.on_finished(incoming_message)
+        success = bool(task_result.get('success'))
+        if self.concurrency_controller is not None:
+            self.concurrency_controller.record(callback_duration, success)
+        if success:
+            outcome = 'completed'
+            if self.idempotency_cache is not None:
+                self.idempotency_cache.mark_completed(self._get_idempotency_key(incoming_message))
+        else:
+            outcome = 'timed_out' if task_result.get('timed_out') else 'failed'
+            logger.error(
+                'Processing failed for message %s, which is lost in receive_and_delete mode: %s',
+                self._get_message_id(incoming_message),
+                task_result.get('error', 'unknown processing failure'),
+            )
+        self.metrics.on_settled(incoming_message, outcome)
+
+    def _retry_failed_message(self, message, error):
+        """
+        Abandons a failed message, or with a retry policy schedules a delayed copy / dead-letters it after the last
+        attempt. Returns the settlement outcome.
+        """
+        # A re-published copy of a session message would be processed after the rest of its session.
+        if self.retry_policy is None or isinstance(getattr(message, 'session_id', None), str):
+            self._get_message_receiver(message).abandon_message(message)
+            return 'abandoned'
+        try:
+            attempt = int(_get_application_property(message, RETRY_ATTEMPT_PROPERTY) or 0) + 1
+        except (TypeError, ValueError):
+            attempt = 1
+        if self.retry_policy.should_dead_letter(attempt):
+            logger.error(f'Dead-lettering message {self._get_message_id(message)} after {attempt} failed attempts')
+            self._get_message_receiver(message).dead_letter_message(
+                message,
+                reason='MaxRetryAttemptsExceeded',
+                error_description=self.retry_policy.truncate_error(error),
+            )
+            return 'dead_lettered'
+        delay = self.retry_policy.get_delay(attempt)
+        try:
+            self.publisher.send_messages(self._create_retry_message(message, attempt, delay))
+        except Exception as e:
+            logger.error(f'Error in scheduling retry of message {self._get_message_id(message)}, abandoning it: {e}')
+            self._get_message_receiver(message).abandon_message(message)
+            return 'abandoned'
+        logger.info(f'Retrying message {self._get_message_id(message)} in {delay:.1f}s (attempt {attempt + 1})')
+        self._get_message_receiver(message).complete_message(message)
+        return 'retried'
+
+    def _create_retry_message(self, message, attempt, delay):
+        application_properties = dict(getattr(message, 'application_properties', None) or {})
+        original_message_id = _get_application_property(message, RETRY_ORIGINAL_MESSAGE_ID_PROPERTY)
+        if original_message_id is None:
+            original_message_id = getattr(message, 'message_id', None)
+        for name in (RETRY_ATTEMPT_PROPERTY, RETRY_SUBSCRIPTION_PROPERTY, RETRY_ORIGINAL_MESSAGE_ID_PROPERTY):
+            application_properties.pop(name, None)
+            application_properties.pop(name.encode(), None)
+        application_properties[RETRY_ATTEMPT_PROPERTY] = attempt
+        application_properties[RETRY_SUBSCRIPTION_PROPERTY] = self.subscription_name
+        if isinstance(original_message_id, str):
+            application_properties[RETRY_ORIGINAL_MESSAGE_ID_PROPERTY] = original_message_id
+        # The copy keeps no message_id: the SDK assigns a new one, so duplicate detection does not drop the copy.
+        optional_properties = {}
+        for name in ('content_type', 'correlation_id', 'subject'):
+            value = getattr(message, name, None)
+            if isinstance(value, str):
+                optional_properties[name] = value
+        return ServiceBusMessage(
+            str(message),
+            application_properties=application_properties,
+            scheduled_enqueue_time_utc=datetime.now(timezone.utc) + timedelta(seconds=delay),
+            **optional_properties,
+        )
+
+    def _report_metrics(self, force=False):
+        if self.metrics_logger is None:
+            return
+        now = time.monotonic()
+        with self.thread_lock:
+            if not force and now - self.metrics_reported_at < self.metrics_report_interval:
+                return
+            self.metrics_reported_at = now
+        snapshot = self.metrics.snapshot()
+        try:
+            for name, histogram in snapshot['histograms'].items():
+                summary = {key: histogram[key] for key in ('count', 'avg', 'min', 'max', 'p50', 'p95', 'p99')}
+                self.metrics_logger.record_metric(f'{self.topic_name}.{name}', json.dumps(summary))
+            self.metrics_logger.record_metric(f'{self.topic_name}.outcomes', json.dumps(snapshot['outcomes']))
+            self.metrics_logger.record_metric(f'{self.topic_name}.receiver', json.dumps(self.receive_supervisor.stats()))
+        except Exception as e:
+            logger.error(f'Error in forwarding topic metrics: {e}')
 
     def _handle_lock_renew_failure(self, renewable, error):
         message_id = self._get_message_id(renewable)
@@ -259,6 +1764,39 @@ class AzureTopic(TopicAbstract):
             f'locked_until_utc={getattr(renewable, "locked_until_utc", None)}'
         )
 
+    def _get_callback_process_initializer(self):
+        if self.worker_initializer is None and not self.preload_modules:
+            return None
+        return functools.partial(initialize_callback_process, tuple(self.preload_modules), self.worker_initializer)
+
+    def _preload_callback_modules(self):
+        """
+        Makes the preload modules available to per-message callback processes without importing them per message:
+        the fork server imports them once, and with fork they are imported in this process and inherited.
+        With spawn only pool workers benefit, as they import the modules once at start-up.
+        """
+        if not self.preload_modules or self.process_context is None:
+            return
+        if self.callback_process_start_method == 'forkserver':
+            self.process_context.set_forkserver_preload(self.preload_modules)
+        elif self.callback_process_start_method == 'fork':
+            for module_name in self.preload_modules:
+                try:
+                    importlib.import_module(module_name)
+                except ImportError as e:
+                    logger.warning(f'Unable to preload module {module_name}: {e}')
+
+    def _create_lock_renewal_scheduler(self):
+        return LockRenewalScheduler(
+            renew_margin=min(self.lock_renewal_margin, self.max_renewal_duration),
+            max_lock_renewal_duration=self.max_renewal_duration,
+            on_lock_renew_failure=self._handle_lock_renew_failure,
+        )
+
+    @staticmethod
+    def _create_client(connection_string):
+        return ServiceBusClient.from_connection_string(conn_str=connection_string, retry_total=10, retry_backoff_factor=1, retry_backoff_max=30)
+
     @staticmethod
     def _get_message_id(message):
         return getattr(message, 'message_id', None) or getattr(message, 'messageId', 'unknown')
@@ -267,7 +1805,7 @@ class AzureTopic(TopicAbstract):
     def _get_callback_execution_mode():
         value = os.environ.get('TOPIC_CALLBACK_EXECUTION_MODE', 'process')
         normalized = str(value).strip().lower()
-        if normalized in ('process', 'thread'):
+        if normalized in ('process', 'pool', 'thread'):
             return normalized
         logger.warning(
             'Invalid value for TOPIC_CALLBACK_EXECUTION_MODE: %s. Using default process.',
@@ -290,8 +1828,21 @@ class AzureTopic(TopicAbstract):
         )
         return default_method
 
+    @staticmethod
+    def _get_max_messages_per_worker(value=None):
+        if value is None:
+            value = os.environ.get('TOPIC_CALLBACK_WORKER_MAX_MESSAGES', 0)
+        try:
+            return max(int(value), 0)
+        except (TypeError, ValueError):
+            logger.warning(
+                'Invalid value for TOPIC_CALLBACK_WORKER_MAX_MESSAGES: %s. Workers will not be recycled.',
+                value,
+            )
+            return 0
+
     def _get_process_context(self):
-        if self.callback_execution_mode != 'process':
+        if self.callback_execution_mode not in ('process', 'pool'):
             return None
         try:
             return mp.get_context(self.callback_process_start_method)
@@ -304,9 +1855,11 @@ class AzureTopic(TopicAbstract):
             return None
 
 
-def _run_callback_in_subprocess(message_payload, callbackfn, result_connection):
+def _run_callback_in_subprocess(message_payload, callbackfn, result_connection, initializer=None):
     try:
-        queue_message = QueueMessage.data_from(message_payload)
+        if initializer is not None:
+            initializer()
+        queue_message = QueueMessage.data_from(load_payload(message_payload))
         callbackfn(queue_message)
         result_connection.send({'success': True, 'error': None})
     except BaseException as exc:  # pragma: no cover - exercised through the parent process wrapper
@@ -318,13 +1871,108 @@ def _run_callback_in_subprocess(message_payload, callbackfn, result_connection):
         result_connection.close()
 
 
+def _run_batch_callback_in_subprocess(message_payloads, callbackfn, result_connection, initializer=None):
+    try:
+        if initializer is not None:
+            initializer()
+        result_connection.send(run_batch_callback(callbackfn, message_payloads))
+    except BaseException as exc:  # pragma: no cover - exercised through the parent process wrapper
+        result_connection.send({
+            'success': False,
+            'error': ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)).strip(),
+            'results': [False] * len(message_payloads),
+        })
+    finally:
+        result_connection.close()
+
+
+def _get_application_property(message, name):
+    """
+    Reads an application property of a received message; the SDK may return keys and string values as bytes.
+    """
+    application_properties = getattr(message, 'application_properties', None)
+    if not isinstance(application_properties, dict):
+        return None
+    value = application_properties.get(name, application_properties.get(name.encode()))
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+class _ReceiveLoopState(threading.local):
+    """
+    Per-thread state of a receive loop: its receiver link, the tasks it dispatched and its receive-ahead buffer.
+    """
+    def __init__(self):
+        self.receiver = None
+        self.pending_tasks = []
+        self.receive_ahead_buffer = deque()
+        # Created on first use so `close` can release the pipes of every receive loop.
+        self.completion_signal = None
+        # Receivers replaced after a failure, and the in-flight messages (by id) they still have to settle.
+        self.retired_receivers = []
+        self.message_receivers = {}
+
+
+class _CompletionSignal:
+    """
+    Self-pipe that lets worker threads wake the receive loop while it waits in `multiprocessing.connection.wait`.
+    At most one notification is in the pipe until `clear` drains it, so `notify` never blocks on a full pipe.
+    """
+    def __init__(self):
+        self._reader, self._writer = mp.Pipe(duplex=False)
+        self._lock = threading.Lock()
+        self._signalled = False
+
+    @property
+    def wait_handle(self):
+        return self._reader
+
+    def notify(self, *args):
+        with self._lock:
+            if self._signalled:
+                return
+            try:
+                self._writer.send_bytes(b'1')
+                self._signalled = True
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            try:
+                while self._reader.poll():
+                    self._reader.recv_bytes()
+            except OSError:
+                pass
+            self._signalled = False
+
+    def close(self):
+        with self._lock:
+            # Keep notify from writing to the closed pipe.
+            self._signalled = True
+            self._reader.close()
+            self._writer.close()
+
+
 class _FutureExecutionTask:
-    def __init__(self, future):
+    def __init__(self, future, on_done=None):
         self._future = future
+        self.deadline = None
+        if on_done is not None:
+            self._future.add_done_callback(on_done)
 
     def done(self):
         return self._future.done()
 
+    def wait_handles(self):
+        # Completion is reported through the `on_done` callback.
+        return []
+
+    def terminate(self):
+        # A running thread cannot be stopped; only a callback still queued in the executor is cancelled.
+        return self._future.cancel()
+
     def result(self):
         return self._future.result()
 
@@ -334,24 +1982,40 @@ class _ProcessExecutionTask:
         self._process = process
         self._result_connection = result_connection
         self._result = None
+        self.deadline = None
 
     def done(self):
-        return not self._process.is_alive()
+        if self._result is not None:
+            return True
+        return len(mp_connection.wait(self.wait_handles(), timeout=0)) > 0
+
+    def wait_handles(self):
+        if self._result is not None:
+            return []
+        return [self._result_connection, self._process.sentinel]
+
+    def terminate(self):
+        self._process.terminate()
+        self._process.join(5)
+        self._result_connection.close()
+        self._result = {'success': False, 'error': 'Callback process terminated after its deadline.', 'timed_out': True}
+        return True
 
     def result(self):
         if self._result is not None:
             return self._result
 
-        self._process.join()
+        # Read before joining: a result larger than the pipe buffer keeps the child blocked in `send` until it is read.
         try:
-            if self._result_connection.poll():
-                self._result = self._result_connection.recv()
-            else:
-                self._result = {
-                    'success': False,
-                    'error': f'Callback worker exited with code {self._process.exitcode} without returning a result.',
-                }
+            self._result = self._result_connection.recv()
+        except (EOFError, OSError):
+            self._process.join()
+            self._result = {
+                'success': False,
+                'error': f'Callback worker exited with code {self._process.exitcode} without returning a result.',
+            }
         finally:
             self._result_connection.close()
+        self._process.join()
 
         return self._result
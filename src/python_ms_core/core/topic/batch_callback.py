@@ -0,0 +1,67 @@
+import traceback
+from ..queue.models.queue_message import QueueMessage
+
+
+def run_batch_callback(callbackfn, message_payloads):
+    """
+    Decodes a batch of message payloads, invokes the batch callback once with the list of QueueMessage objects and
+    maps its return value onto one success flag per payload.
+    The callback may return:
+        None or True: every message succeeded.
+        False: every message failed.
+        dict: success per message, keyed by `messageId` or by the position in the delivered list.
+        list / tuple: success per message, in the order of the delivered list.
+    Messages missing from a dict, and payloads that cannot be decoded, are reported as failed.
+    Returns:
+        dict: {'success': all messages succeeded, 'error': str or None, 'results': [bool per payload]}
+    """
+    results = [False] * len(message_payloads)
+    errors = []
+    queue_messages = []
+    positions = []
+    for position, message_payload in enumerate(message_payloads):
+        try:
+            queue_messages.append(QueueMessage.data_from(message_payload))
+            positions.append(position)
+        except Exception as e:
+            errors.append(f'message {position} could not be decoded: {e}')
+
+    if queue_messages:
+        try:
+            outcome = callbackfn(queue_messages)
+            delivered_results = _get_delivered_results(outcome, queue_messages)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': ''.join(traceback.format_exception(type(e), e, e.__traceback__)).strip(),
+                'results': results,
+            }
+        for position, success in zip(positions, delivered_results):
+            results[position] = success
+
+    failed = results.count(False) - len(errors)
+    if failed > 0:
+        errors.append(f'batch callback reported {failed} failed messages')
+    return {'success': all(results), 'error': '; '.join(errors) or None, 'results': results}
+
+
+def _get_delivered_results(outcome, queue_messages):
+    if outcome is None or outcome is True:
+        return [True] * len(queue_messages)
+    if outcome is False:
+        return [False] * len(queue_messages)
+    if isinstance(outcome, dict):
+        results = []
+        for position, queue_message in enumerate(queue_messages):
+            if queue_message.messageId and queue_message.messageId in outcome:
+                results.append(bool(outcome[queue_message.messageId]))
+            else:
+                results.append(bool(outcome.get(position, False)))
+        return results
+    if isinstance(outcome, (list, tuple)):
+        if len(outcome) != len(queue_messages):
+            raise ValueError(
+                f'Batch callback returned {len(outcome)} results for {len(queue_messages)} messages.'
+            )
+        return [bool(success) for success in outcome]
+    raise TypeError(f'Unsupported batch callback result type: {type(outcome).__name__}')
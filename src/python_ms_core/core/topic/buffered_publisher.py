@@ -0,0 +1,153 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from azure.servicebus import ServiceBusMessage
+from .message_batches import send_in_batches
+from ..resource_errors.errors import TooManyRequestError, TimeOutError
+
+logger = logging.getLogger('AzureTopic')
+
+
+"""
+BufferedPublisher takes publish calls off the caller's hot path. Payloads go into a bounded in-memory buffer and a
+background thread sends them as ServiceBusMessageBatch objects.
+A batch is sent when the buffer holds max_batch_messages payloads, holds max_batch_bytes bytes, or the oldest
+payload has waited linger_time seconds.
+Attributes:
+    sender (ServiceBusSender): The sender used to send the batches.
+    max_buffer_size (int): The maximum number of payloads held in memory.
+    max_batch_messages (int): The number of payloads that triggers an immediate send.
+    max_batch_bytes (int): The buffered payload size in bytes that triggers an immediate send.
+    linger_time (float): The maximum time in seconds a payload waits before it is sent.
+    block_when_full (bool): Block the caller while the buffer is full (True) or raise TooManyRequestError (False).
+    block_timeout (float): The maximum time in seconds to block before raising TimeOutError (None = wait forever).
+Methods:
+    publish(payload: str) -> None:
+        Adds a payload to the buffer.
+    flush(timeout=None) -> bool:
+        Waits until every buffered payload has been sent.
+    close(timeout=None) -> None:
+        Flushes the buffer and stops the sender thread.
+"""
+class BufferedPublisher:
+    def __init__(self, sender, max_buffer_size=10000, max_batch_messages=100, max_batch_bytes=256 * 1024,
+                 linger_time=0.05, block_when_full=True, block_timeout=None):
+        self.sender = sender
+        self.max_buffer_size = max(int(max_buffer_size), 1)
+        self.max_batch_messages = max(int(max_batch_messages), 1)
+        self.max_batch_bytes = max(int(max_batch_bytes), 1)
+        self.linger_time = max(float(linger_time), 0)
+        self.block_when_full = block_when_full
+        self.block_timeout = block_timeout
+        self.sent_messages = 0
+        self.failed_messages = 0
+        self.last_error = None
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='AzureTopicBufferedPublisher', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def publish(self, payload: str):
+        size = len(payload.encode('utf-8'))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Buffered publisher is closed.')
+            if len(self._buffer) >= self.max_buffer_size:
+                if not self.block_when_full:
+                    raise TooManyRequestError({
+                        'message': 'Publish buffer is full',
+                        'status_code': 429,
+                        'description': f'{len(self._buffer)} messages are waiting to be sent',
+                    })
+                has_space = self._condition.wait_for(
+                    lambda: self._closed or len(self._buffer) < self.max_buffer_size,
+                    timeout=self.block_timeout,
+                )
+                if not has_space:
+                    raise TimeOutError({
+                        'message': 'Timed out waiting for space in the publish buffer',
+                        'status_code': 408,
+                        'description': f'Waited {self.block_timeout} seconds',
+                    })
+                if self._closed:
+                    raise RuntimeError('Buffered publisher is closed.')
+            self._buffer.append((payload, size, time.monotonic()))
+            self._buffered_bytes += size
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            flushed = self._condition.wait_for(lambda: not self._buffer and self._in_flight == 0, timeout=timeout)
+            self._flush_requested = False
+            return flushed
+
+    def close(self, timeout=None):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+    def _batch_ready(self):
+        if not self._buffer:
+            return False
+        if self._closed or self._flush_requested:
+            return True
+        if len(self._buffer) >= self.max_batch_messages or self._buffered_bytes >= self.max_batch_bytes:
+            return True
+        return time.monotonic() - self._buffer[0][2] >= self.linger_time
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._batch_ready():
+                    if self._closed and not self._buffer:
+                        return
+                    timeout = None
+                    if self._buffer:
+                        timeout = max(self.linger_time - (time.monotonic() - self._buffer[0][2]), 0)
+                    self._condition.wait(timeout)
+                payloads = []
+                while self._buffer and len(payloads) < self.max_batch_messages:
+                    payload, size, _ = self._buffer.popleft()
+                    self._buffered_bytes -= size
+                    payloads.append(payload)
+                self._in_flight = len(payloads)
+                self._condition.notify_all()
+            try:
+                self._send(payloads)
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self._condition.notify_all()
+
+    def _send(self, payloads):
+        results = []
+        try:
+            send_in_batches(self.sender, (ServiceBusMessage(payload) for payload in payloads), results)
+        except Exception as e:
+            # Creating a batch failed; whatever was not sent yet is lost.
+            failed = len(payloads) - sum(result['message_count'] for result in results)
+            self.failed_messages += failed
+            self.last_error = e
+            logger.error(f'Error in publishing {failed} buffered messages: {e}')
+        for result in results:
+            if result['success']:
+                self.sent_messages += result['message_count']
+            else:
+                self.failed_messages += result['message_count']
+                self.last_error = result['error']
@@ -0,0 +1,124 @@
+import math
+import threading
+
+
+"""
+WeightedConcurrencyBudget is one global in-flight limit shared by several subscriptions.
+Every subscription is guaranteed a share of the limit proportional to its weight and may borrow the slots other
+subscriptions leave unused. Slots are only held back for a subscription while it is busy (its last receive returned
+messages) or waiting (it was denied a slot below its share), so an idle subscription never blocks the others.
+An optional quota caps the slots one subscription can hold, whatever is free.
+Attributes:
+    max_concurrent_messages (int): The global number of messages allowed in flight.
+Methods:
+    add(name: str, weight=1, quota=None) -> None:
+        Registers a subscription.
+    available(name: str) -> int:
+        Returns the number of slots the subscription may take now.
+    acquire(name: str, force=False) -> bool:
+        Takes one slot; force=True takes it even when the budget is exhausted (messages already received).
+    release(name: str) -> None:
+        Gives one slot back.
+    record_receive(name: str, message_count: int) -> None:
+        Marks the subscription busy or idle after a receive call.
+    stats() -> dict:
+        Returns the limit and the per-subscription share, quota and slots in use.
+"""
+class WeightedConcurrencyBudget:
+    def __init__(self, max_concurrent_messages):
+        if int(max_concurrent_messages) < 1:
+            raise ValueError('max_concurrent_messages must be at least 1.')
+        self.max_concurrent_messages = int(max_concurrent_messages)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._in_use = 0
+
+    def add(self, name, weight=1, quota=None):
+        if weight is None or weight <= 0:
+            raise ValueError('weight must be greater than 0.')
+        if quota is not None and int(quota) < 1:
+            raise ValueError('quota must be at least 1.')
+        with self._lock:
+            if name in self._entries:
+                raise ValueError(f'{name} is already registered.')
+            self._entries[name] = _BudgetEntry(weight=weight, quota=None if quota is None else int(quota))
+            self._update_shares()
+
+    def available(self, name):
+        with self._lock:
+            entry = self._entries[name]
+            slots = self._get_available(name, entry)
+            if slots <= 0 and entry.in_use < entry.share:
+                # Hold slots back for this subscription until it gets its share.
+                entry.waiting = True
+            return slots
+
+    def acquire(self, name, force=False):
+        with self._lock:
+            entry = self._entries[name]
+            if not force and self._get_available(name, entry) <= 0:
+                if entry.in_use < entry.share:
+                    entry.waiting = True
+                return False
+            entry.in_use += 1
+            self._in_use += 1
+            return True
+
+    def release(self, name):
+        with self._lock:
+            entry = self._entries[name]
+            if entry.in_use > 0:
+                entry.in_use -= 1
+                self._in_use -= 1
+
+    def record_receive(self, name, message_count):
+        with self._lock:
+            entry = self._entries[name]
+            entry.busy = message_count > 0
+            if not entry.busy:
+                entry.waiting = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent_messages': self.max_concurrent_messages,
+                'in_flight': self._in_use,
+                'subscriptions': {
+                    name: {
+                        'weight': entry.weight,
+                        'share': entry.share,
+                        'quota': entry.quota,
+                        'in_flight': entry.in_use,
+                    }
+                    for name, entry in self._entries.items()
+                },
+            }
+
+    def _get_available(self, name, entry):
+        free_slots = self.max_concurrent_messages - self._in_use
+        # Unused share of every other busy or waiting subscription is not lent out.
+        reserved = sum(
+            max(other.share - other.in_use, 0)
+            for other_name, other in self._entries.items()
+            if other_name != name and (other.busy or other.waiting)
+        )
+        slots = min(free_slots, max(entry.share - entry.in_use, free_slots - reserved))
+        if entry.quota is not None:
+            slots = min(slots, entry.quota - entry.in_use)
+        return max(slots, 0)
+
+    def _update_shares(self):
+        total_weight = sum(entry.weight for entry in self._entries.values())
+        for entry in self._entries.values():
+            share = max(math.floor(self.max_concurrent_messages * entry.weight / total_weight), 1)
+            entry.share = share if entry.quota is None else min(share, entry.quota)
+
+
+class _BudgetEntry:
+    def __init__(self, weight, quota):
+        self.weight = weight
+        self.quota = quota
+        self.share = 0
+        self.in_use = 0
+        self.busy = False
+        self.waiting = False
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from .resource_usage import sample_usage
+
+logger = logging.getLogger('AzureTopic')
+
+
+"""
+AdaptiveConcurrencyController sizes the receive window of a topic with an AIMD (additive increase, multiplicative
+decrease) policy.
+Every adjust_interval seconds it looks at the callbacks settled since the previous adjustment, the CPU utilisation
+and the RSS of the process tree:
+    - the limit is multiplied by decrease_factor when the error rate, the average callback latency, the CPU or the
+      RSS is above its threshold;
+    - otherwise it grows by increase_step when the window was fully used, so idle capacity is not added blindly.
+The limit always stays within [min_concurrency, max_concurrency] and every change is logged.
+Attributes:
+    limit (int): The current number of messages allowed in flight.
+    min_concurrency (int): The lower bound of the limit.
+    max_concurrency (int): The upper bound of the limit.
+    target_latency (float): Average callback duration in seconds above which the limit is reduced (None = ignore).
+    max_error_rate (float): Fraction of failed callbacks above which the limit is reduced.
+    max_cpu_percent (float): CPU utilisation in percent above which the limit is reduced (None = ignore).
+    max_rss_bytes (int): Process tree RSS in bytes above which the limit is reduced (None = ignore).
+Methods:
+    record(latency: float, success: bool) -> None:
+        Adds the outcome of one settled callback to the current window.
+    update(in_flight: int) -> int:
+        Called from the receive loop; adjusts the limit once per interval and returns it.
+    stats() -> dict:
+        Returns the current limit and the observations of the current window.
+"""
+class AdaptiveConcurrencyController:
+    def __init__(self, min_concurrency=1, max_concurrency=16, initial_concurrency=None, target_latency=None,
+                 max_error_rate=0.1, max_cpu_percent=90, max_rss_bytes=None, increase_step=1,
+                 decrease_factor=0.5, adjust_interval=10, usage_sampler=sample_usage):
+        self.min_concurrency = max(int(min_concurrency), 1)
+        self.max_concurrency = max(int(max_concurrency), self.min_concurrency)
+        initial_concurrency = self.min_concurrency if initial_concurrency is None else initial_concurrency
+        self.limit = min(max(int(initial_concurrency), self.min_concurrency), self.max_concurrency)
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.max_cpu_percent = max_cpu_percent
+        self.max_rss_bytes = max_rss_bytes
+        self.increase_step = max(int(increase_step), 1)
+        self.decrease_factor = min(max(float(decrease_factor), 0.0), 1.0)
+        self.adjust_interval = adjust_interval
+        self.usage_sampler = usage_sampler
+        self.adjustments = 0
+        # Several receive loops report to the same controller.
+        self._lock = threading.Lock()
+        self._window_started = time.monotonic()
+        self._reset_window()
+
+    def record(self, latency, success):
+        with self._lock:
+            self._completed += 1
+            if not success:
+                self._failed += 1
+            if latency is not None:
+                self._latency_count += 1
+                self._latency_sum += latency
+
+    def update(self, in_flight):
+        with self._lock:
+            return self._update(in_flight)
+
+    def _update(self, in_flight):
+        self._peak_in_flight = max(self._peak_in_flight, in_flight)
+        now = time.monotonic()
+        if now - self._window_started < self.adjust_interval:
+            return self.limit
+        usage = self.usage_sampler() if self.usage_sampler is not None else {}
+        previous_limit = self.limit
+        reasons = self._get_decrease_reasons(usage)
+        if reasons:
+            self.limit = max(int(self.limit * self.decrease_factor), self.min_concurrency)
+        elif self._completed > 0 and self._peak_in_flight >= self.limit:
+            reasons = ['window saturated']
+            self.limit = min(self.limit + self.increase_step, self.max_concurrency)
+        if self.limit != previous_limit:
+            self.adjustments += 1
+            logger.info(
+                f'Adaptive concurrency {previous_limit} -> {self.limit} ({", ".join(reasons)}); '
+                f'completed={self._completed}, error_rate={self._error_rate():.2f}, '
+                f'avg_latency={self._average_latency()}, cpu_percent={usage.get("cpu_percent")}, '
+                f'rss={usage.get("rss")}, peak_in_flight={self._peak_in_flight}'
+            )
+        self._window_started = now
+        self._reset_window()
+        return self.limit
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'min_concurrency': self.min_concurrency,
+            'max_concurrency': self.max_concurrency,
+            'adjustments': self.adjustments,
+            'window_completed': self._completed,
+            'window_error_rate': self._error_rate(),
+            'window_avg_latency': self._average_latency(),
+        }
+
+    def _get_decrease_reasons(self, usage):
+        reasons = []
+        if self._completed > 0 and self._error_rate() > self.max_error_rate:
+            reasons.append(f'error rate above {self.max_error_rate}')
+        average_latency = self._average_latency()
+        if self.target_latency is not None and average_latency is not None and average_latency > self.target_latency:
+            reasons.append(f'latency above {self.target_latency}s')
+        cpu_percent = usage.get('cpu_percent')
+        if self.max_cpu_percent is not None and cpu_percent is not None and cpu_percent > self.max_cpu_percent:
+            reasons.append(f'cpu above {self.max_cpu_percent}%')
+        rss = usage.get('rss')
+        if self.max_rss_bytes is not None and rss is not None and rss > self.max_rss_bytes:
+            reasons.append(f'rss above {self.max_rss_bytes} bytes')
+        return reasons
+
+    def _error_rate(self):
+        return self._failed / self._completed if self._completed else 0.0
+
+    def _average_latency(self):
+        return self._latency_sum / self._latency_count if self._latency_count else None
+
+    def _reset_window(self):
+        self._completed = 0
+        self._failed = 0
+        self._latency_count = 0
+        self._latency_sum = 0.0
+        self._peak_in_flight = 0
@@ -0,0 +1,271 @@
+import logging
+import signal
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from ..config.config import TopicConfig
+from ..connection_registry import ConnectionRegistry
+from ..queue.models.queue_message import QueueMessage
+from .azure_topic import AzureTopic
+from .concurrency_budget import WeightedConcurrencyBudget
+from .payload_transport import load_payload
+from .worker_pool import CallbackWorkerPool
+
+logger = logging.getLogger('TopicConsumerHost')
+
+
+"""
+TopicConsumerHost consumes several topic/subscription pairs in one service with one ServiceBusClient, one lock
+renewal scheduler, one callback executor / worker pool and one global concurrency limit.
+Each registration gets its own receive loop thread; the global limit is split between the registrations by weight
+(see WeightedConcurrencyBudget), slots left unused by idle subscriptions are lent to busy ones and an optional
+per-registration quota caps what one subscription can hold.
+Attributes:
+    max_concurrent_messages (int): The global number of messages in flight across all registrations.
+    registry (ConnectionRegistry): The registry the client, senders and renewal scheduler are shared through.
+    budget (WeightedConcurrencyBudget): The shared concurrency limit.
+    topics (dict): The AzureTopic of every registration, keyed by 'topic/subscription'.
+Methods:
+    register(topic_name, subscription, callback, weight=1, max_concurrent_messages=None, ...) -> AzureTopic:
+        Adds a topic/subscription pair and the callback its messages are handed to.
+    run() -> None:
+        Consumes every registration until each reached its max_receivable_messages or idle window (blocks forever by
+        default).
+    stats() -> dict:
+        Returns the shared budget and the stats of every registration.
+    stop(drain_timeout=30, close=True) -> None:
+        Stops every registration and drains the messages in flight; `run` returns once they are drained.
+    handle_termination_signals(drain_timeout=30, signals=(signal.SIGTERM,)) -> None:
+        Calls `stop` when the process receives one of the signals.
+    close() -> None:
+        Releases the topics, the worker pool, the executor and, when owned, the connections.
+"""
+class TopicConsumerHost:
+    def __init__(self, config: TopicConfig=None, max_concurrent_messages: int=1, max_messages_per_worker: int=None,
+                 registry: ConnectionRegistry=None, worker_initializer=None, preload_modules=None):
+        self.config = config
+        self.max_concurrent_messages = max_concurrent_messages
+        self.max_messages_per_worker = max_messages_per_worker
+        self.worker_initializer = worker_initializer
+        self.preload_modules = preload_modules
+        self.owns_registry = registry is None
+        self.registry = ConnectionRegistry() if registry is None else registry
+        self.budget = WeightedConcurrencyBudget(max_concurrent_messages)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_messages)
+        self.worker_pool = None
+        self.topics = {}
+        self.registrations = []
+        self.stopping = False
+        self.drain_timeout = None
+        self.close_on_stop = True
+
+    def register(self, topic_name, subscription, callback, weight=1, max_concurrent_messages=None,
+                 max_receivable_messages=-1, prefetch_count=0, receive_ahead=0, receiver_count=1, exit_when_idle=None):
+        """
+        Adds a topic/subscription pair to the host. Call it before `run`.
+        Args:
+            topic_name (str): The name of the topic.
+            subscription (str): The name of the subscription.
+            callback (function): The callback invoked with a QueueMessage for each message.
+            weight (float): Relative share of the global concurrency limit guaranteed to this subscription.
+            max_concurrent_messages (int): Quota; the most messages of this subscription in flight (None = no quota).
+            max_receivable_messages (int): Stop after this many messages have been processed (-1 = run forever).
+            prefetch_count (int): Messages the Service Bus link prefetches into the SDK cache (0 = disabled).
+            receive_ahead (int): Messages received ahead of free worker slots (0 = disabled).
+            receiver_count (int): Receiver links opened on the subscription.
+            exit_when_idle (float): Stop consuming the subscription once it returned no messages for this many seconds.
+        Returns:
+            AzureTopic: The topic consuming the subscription (for `stats`, `forward_metrics`, ...).
+        """
+        name = f'{topic_name}/{subscription}'
+        self.budget.add(name, weight=weight, quota=max_concurrent_messages)
+        topic = AzureTopic(
+            config=self.config,
+            topic_name=topic_name,
+            max_concurrent_messages=max_concurrent_messages or self.max_concurrent_messages,
+            max_messages_per_worker=self.max_messages_per_worker,
+            registry=self.registry,
+            worker_initializer=self.worker_initializer,
+            preload_modules=self.preload_modules,
+            executor=self.executor,
+        )
+        topic.concurrency_budget = self.budget
+        topic.budget_name = name
+        self.topics[name] = topic
+        self.registrations.append(_ConsumerRegistration(
+            name=name,
+            topic=topic,
+            subscription=subscription,
+            callback=callback,
+            max_receivable_messages=max_receivable_messages,
+            prefetch_count=prefetch_count,
+            receive_ahead=receive_ahead,
+            receiver_count=receiver_count,
+            exit_when_idle=exit_when_idle,
+        ))
+        return topic
+
+    def run(self):
+        """
+        Starts one receive loop thread per registration and blocks until all of them stopped.
+        """
+        if not self.registrations:
+            raise ValueError('No subscription is registered.')
+        self._start_worker_pool()
+        consumer_threads = [
+            threading.Thread(
+                target=self._consume,
+                args=(registration,),
+                name=f'TopicConsumerHost-{registration.name}',
+                daemon=True,
+            )
+            for registration in self.registrations
+        ]
+        try:
+            for consumer_thread in consumer_threads:
+                consumer_thread.start()
+            for consumer_thread in consumer_threads:
+                while consumer_thread.is_alive():
+                    consumer_thread.join(0.1)
+                    self._propagate_stop()
+        finally:
+            self._shutdown_worker_pool()
+        if self.stopping and self.close_on_stop:
+            self.close()
+        # Reset once drained rather than on entry, so a `stop` that arrives while `run` starts is not lost.
+        self.stopping = False
+
+    def stats(self):
+        """
+        Returns the shared concurrency budget and the consumption stats of every registration.
+        """
+        snapshot = self.budget.stats()
+        for name, topic in self.topics.items():
+            snapshot['subscriptions'][name]['stats'] = topic.stats()
+        return snapshot
+
+    def stop(self, drain_timeout=30, close=True):
+        """
+        Stops receiving on every registration; callbacks in flight get until drain_timeout to finish and the messages
+        left are abandoned (see AzureTopic.stop). Safe to call from another thread or a signal handler.
+        Args:
+            drain_timeout (float): Seconds callbacks in flight are given to finish.
+            close (bool): Close the host once `run` has drained every registration.
+        """
+        self.close_on_stop = close
+        self.drain_timeout = drain_timeout
+        self.stopping = True
+        self._propagate_stop()
+
+    def _propagate_stop(self):
+        if not self.stopping:
+            return
+        # A topic whose subscribe call started after `stop` has reset its stopping flag, so stop it again.
+        for topic in self.topics.values():
+            if not topic.stopping:
+                # The executor and worker pool are shared, so the topics must not close them on their own.
+                topic.stop(self.drain_timeout, close=False)
+
+    def handle_termination_signals(self, drain_timeout=30, signals=(signal.SIGTERM,)):
+        """
+        Installs handlers that call `stop(drain_timeout)` when the process receives one of the signals.
+        Call it from the main thread.
+        """
+        def handle_signal(signum, frame):
+            logger.info(f'Received signal {signum}, draining for up to {drain_timeout}s')
+            self.stop(drain_timeout)
+
+        for signum in signals:
+            signal.signal(signum, handle_signal)
+
+    def close(self):
+        """
+        Releases the topics, the worker pool, the executor and, when the host created it, the connection registry.
+        """
+        for topic in self.topics.values():
+            try:
+                topic.close()
+            except Exception as e:
+                logger.error(f'Error in closing topic {topic.topic_name}: {e}')
+        self._shutdown_worker_pool()
+        self.executor.shutdown(wait=False)
+        if self.owns_registry:
+            self.registry.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _consume(self, registration):
+        try:
+            registration.topic.subscribe(
+                registration.subscription,
+                registration.callback,
+                max_receivable_messages=registration.max_receivable_messages,
+                prefetch_count=registration.prefetch_count,
+                receive_ahead=registration.receive_ahead,
+                receiver_count=registration.receiver_count,
+                exit_when_idle=registration.exit_when_idle,
+            )
+        except Exception as e:
+            logger.error(f'Error in consuming {registration.name}: {e}')
+
+    def _start_worker_pool(self):
+        topic = self.registrations[0].topic
+        if topic.callback_execution_mode != 'pool' or topic.process_context is None:
+            return
+        # Workers are forked with every callback so any of them can serve any subscription.
+        self.worker_pool = CallbackWorkerPool(
+            process_context=topic.process_context,
+            callback={registration.name: registration.callback for registration in self.registrations},
+            size=self.max_concurrent_messages,
+            max_messages_per_worker=topic.max_messages_per_worker,
+            runner=run_routed_callback,
+            initializer=topic.callback_process_initializer,
+        )
+        self.worker_pool.start()
+        for registration in self.registrations:
+            registration.topic.shared_worker_pool = self.worker_pool
+
+    def _shutdown_worker_pool(self):
+        if self.worker_pool is None:
+            return
+        for registration in self.registrations:
+            registration.topic.shared_worker_pool = None
+        try:
+            self.worker_pool.shutdown()
+        except Exception as e:
+            logger.error(f'Error shutting down callback worker pool: {e}')
+        finally:
+            self.worker_pool = None
+
+
+def run_routed_callback(callbacks, routed_payload):
+    """
+    Worker pool runner for the host: routed_payload is (registration name, message payload).
+    """
+    try:
+        name, message_payload = routed_payload
+        callbacks[name](QueueMessage.data_from(load_payload(message_payload)))
+        return {'success': True, 'error': None}
+    except Exception as e:
+        return {
+            'success': False,
+            'error': ''.join(traceback.format_exception(type(e), e, e.__traceback__)).strip(),
+        }
+
+
+class _ConsumerRegistration:
+    def __init__(self, name, topic, subscription, callback, max_receivable_messages, prefetch_count, receive_ahead,
+                 receiver_count, exit_when_idle=None):
+        self.name = name
+        self.topic = topic
+        self.subscription = subscription
+        self.callback = callback
+        self.max_receivable_messages = max_receivable_messages
+        self.prefetch_count = prefetch_count
+        self.receive_ahead = receive_ahead
+        self.receiver_count = receiver_count
+        self.exit_when_idle = exit_when_idle
@@ -0,0 +1,160 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+logger = logging.getLogger('AzureTopic')
+
+
+class IdempotencyBackend(ABC):
+    """
+    Persistent store of completed message ids. Implementations must be safe to call from several threads.
+    """
+    @abstractmethod
+    def contains(self, message_id): pass
+
+    @abstractmethod
+    def add(self, message_id, expires_at): pass
+
+    def close(self):
+        pass
+
+
+"""
+SqliteIdempotencyBackend keeps completed message ids in a local SQLite file so they survive a pod restart.
+Expired ids are purged at most once per purge_interval seconds.
+Attributes:
+    path (str): The SQLite database file.
+Methods:
+    contains(message_id: str) -> bool:
+        Checks whether the id was completed and has not expired.
+    add(message_id: str, expires_at: float) -> None:
+        Records a completed id until expires_at (epoch seconds).
+    close() -> None:
+        Closes the database connection.
+"""
+class SqliteIdempotencyBackend(IdempotencyBackend):
+    def __init__(self, path, purge_interval=300):
+        self.path = path
+        self.purge_interval = purge_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS completed_messages (message_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)'
+            )
+        self._purged_at = 0.0
+
+    def contains(self, message_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT expires_at FROM completed_messages WHERE message_id = ?', (message_id,)
+            ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def add(self, message_id, expires_at):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO completed_messages (message_id, expires_at) VALUES (?, ?)',
+                (message_id, expires_at),
+            )
+            now = time.time()
+            if now - self._purged_at >= self.purge_interval:
+                self._connection.execute('DELETE FROM completed_messages WHERE expires_at <= ?', (now,))
+                self._purged_at = now
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+"""
+IdempotencyCache remembers the ids of messages that were processed to completion so redeliveries can be completed
+without running the callback again.
+Lookups go to an in-memory LRU first and then to the optional persistent backend; hits from the backend are copied
+into the LRU. Every id expires ttl seconds after it was recorded.
+Attributes:
+    backend (IdempotencyBackend): Optional persistent store (e.g. SqliteIdempotencyBackend).
+    max_entries (int): The number of ids kept in memory.
+    ttl (float): Seconds an id is remembered.
+Methods:
+    is_completed(message_id: str) -> bool:
+        Checks whether the message was already completed.
+    mark_completed(message_id: str) -> None:
+        Records a completed message.
+    stats() -> dict:
+        Returns the hit and miss counters and the in-memory size.
+    close() -> None:
+        Closes the backend.
+"""
+class IdempotencyCache:
+    def __init__(self, backend: IdempotencyBackend=None, max_entries=10000, ttl=86400):
+        if int(max_entries) < 1:
+            raise ValueError('max_entries must be at least 1.')
+        if ttl <= 0:
+            raise ValueError('ttl must be greater than 0.')
+        self.backend = backend
+        self.max_entries = int(max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def is_completed(self, message_id):
+        if not message_id:
+            return False
+        now = time.time()
+        with self._lock:
+            expires_at = self._entries.get(message_id)
+            if expires_at is not None and expires_at > now:
+                self._entries.move_to_end(message_id)
+                self._hits += 1
+                return True
+            if expires_at is not None:
+                del self._entries[message_id]
+        completed = False
+        if self.backend is not None:
+            try:
+                completed = self.backend.contains(message_id)
+            except Exception as e:
+                logger.error(f'Error in reading idempotency backend: {e}')
+        with self._lock:
+            if completed:
+                self._hits += 1
+                # The backend does not return the expiry; keep the id in memory for at most one more ttl.
+                self._remember(message_id, now + self.ttl)
+            else:
+                self._misses += 1
+        return completed
+
+    def mark_completed(self, message_id):
+        if not message_id:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(message_id, expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.add(message_id, expires_at)
+            except Exception as e:
+                logger.error(f'Error in writing idempotency backend: {e}')
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses, 'size': len(self._entries)}
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+    def _remember(self, message_id, expires_at):
+        self._entries[message_id] = expires_at
+        self._entries.move_to_end(message_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from azure.servicebus import ServiceBusSession
+from azure.servicebus.exceptions import AutoLockRenewFailed, AutoLockRenewTimeout
+
+logger = logging.getLogger('LockRenewalScheduler')
+
+
+"""
+LockRenewalScheduler renews Service Bus message and session locks. One timer-heap thread schedules every registered
+message or session shortly before its `locked_until_utc` and hands due renewals to a small bounded executor, so one slow
+or failing renewal (the client retries with backoff) does not hold up the other locks. Every call goes through the
+public `renew_message_lock` / `ServiceBusSession.renew_lock` with a per-call timeout.
+It is a drop-in replacement for AutoLockRenewer: `register` takes the same arguments and failures are reported through
+`on_lock_renew_failure(message, error)` with `auto_renew_error` set on the message.
+Attributes:
+    renew_margin (float): Seconds before lock expiry at which a lock is renewed.
+    max_lock_renewal_duration (float): Default maximum time in seconds a message lock is kept alive.
+    max_workers (int): Renewal calls run at the same time.
+    renew_timeout (float): Timeout in seconds of one renewal call.
+Methods:
+    register(receiver, renewable, max_lock_renewal_duration=None, on_lock_renew_failure=None) -> None:
+        Starts renewing the lock of a received message or of a receiver's session.
+    unregister(renewable) -> int:
+        Stops renewing the lock of a message (called once the message is settled) and returns its renewal count.
+    stats() -> dict:
+        Returns renewal counters and lag metrics.
+    close() -> None:
+        Stops the scheduler thread and the renewal workers.
+"""
+class LockRenewalScheduler:
+    def __init__(self, renew_margin=60, max_lock_renewal_duration=86400, on_lock_renew_failure=None,
+                 max_workers=4, renew_timeout=10, retry_interval=2):
+        self.renew_margin = renew_margin
+        self.max_lock_renewal_duration = max_lock_renewal_duration
+        self.on_lock_renew_failure = on_lock_renew_failure
+        self.max_workers = max(int(max_workers), 1)
+        self.renew_timeout = renew_timeout
+        self.retry_interval = retry_interval
+        self._heap = []
+        self._entries = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._renewals = 0
+        self._in_progress = 0
+        self._failures = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._total_lag = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='LockRenewal')
+        self._thread = threading.Thread(target=self._run, name='LockRenewalScheduler', daemon=True)
+        self._thread.start()
+
+    def register(self, receiver, renewable, max_lock_renewal_duration=None, on_lock_renew_failure=None):
+        duration = max_lock_renewal_duration or self.max_lock_renewal_duration
+        entry = _RenewalEntry(
+            receiver=receiver,
+            renewable=renewable,
+            duration=duration,
+            on_failure=on_lock_renew_failure or self.on_lock_renew_failure,
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Lock renewal scheduler is closed.')
+            self._entries[id(renewable)] = entry
+            self._schedule(entry, self._next_due(renewable))
+            self._condition.notify()
+
+    def unregister(self, renewable):
+        with self._condition:
+            entry = self._entries.pop(id(renewable), None)
+            if entry is None:
+                return 0
+            entry.active = False
+            return entry.renewals
+
+    def stats(self):
+        with self._condition:
+            return {
+                'outstanding_locks': len(self._entries),
+                'renewals': self._renewals,
+                'renewals_in_progress': self._in_progress,
+                'renewal_failures': self._failures,
+                'last_renewal_lag': self._last_lag,
+                'max_renewal_lag': self._max_lag,
+                'avg_renewal_lag': self._total_lag / self._renewals if self._renewals else 0.0,
+            }
+
+    def close(self, timeout=5):
+        with self._condition:
+            self._closed = True
+            for entry in self._entries.values():
+                entry.active = False
+            self._entries = {}
+            self._heap = []
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule(self, entry, due):
+        entry.due = due
+        heapq.heappush(self._heap, (due, next(self._sequence), entry))
+
+    def _next_due(self, renewable):
+        locked_until = getattr(renewable, 'locked_until_utc', None)
+        if not isinstance(locked_until, datetime):
+            return time.monotonic() + self.retry_interval
+        if locked_until.tzinfo is None:
+            locked_until = locked_until.replace(tzinfo=timezone.utc)
+        remaining = (locked_until - datetime.now(timezone.utc)).total_seconds()
+        # Never renew more often than every half lock period, even when the lock is shorter than the margin.
+        return time.monotonic() + max(remaining - min(self.renew_margin, remaining / 2), 0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due_entries = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, entry = heapq.heappop(self._heap)
+                    if entry.active:
+                        due_entries.append(entry)
+                self._in_progress += len(due_entries)
+            for entry in due_entries:
+                # The entry is back on the heap only once its renewal finished, so it is never renewed twice at once.
+                try:
+                    self._executor.submit(self._renew, entry, now)
+                except RuntimeError:
+                    return
+
+    def _renew(self, entry, now):
+        try:
+            if time.monotonic() >= entry.deadline:
+                self._fail(entry, AutoLockRenewTimeout(
+                    f'Auto-renew period ({entry.duration} seconds) elapsed.'
+                ))
+            else:
+                self._renew_single(entry, now)
+        except Exception as e:
+            logger.error(f'Error in renewing lock for message {_get_message_id(entry.renewable)}: {e}')
+        finally:
+            with self._condition:
+                self._in_progress -= 1
+
+    def _renew_single(self, entry, now):
+        try:
+            if self._is_session(entry.renewable):
+                entry.renewable.renew_lock(timeout=self.renew_timeout)
+            else:
+                entry.receiver.renew_message_lock(entry.renewable, timeout=self.renew_timeout)
+        except Exception as e:
+            if self._lock_expired(entry.renewable):
+                self._fail(entry, AutoLockRenewFailed('Failed to auto-renew lock', error=e))
+                return
+            logger.warning(f'Retrying lock renewal for message {_get_message_id(entry.renewable)}: {e}')
+            with self._condition:
+                self._failures += 1
+                if entry.active and not self._closed:
+                    self._schedule(entry, time.monotonic() + self.retry_interval)
+                    self._condition.notify()
+            return
+        self._record_renewal(entry, now)
+        self._reschedule(entry)
+
+    def _record_renewal(self, entry, now):
+        with self._condition:
+            self._renewals += 1
+            entry.renewals += 1
+            lag = max(now - entry.due, 0.0)
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            self._total_lag += lag
+
+    def _reschedule(self, entry):
+        with self._condition:
+            if entry.active and not self._closed:
+                self._schedule(entry, self._next_due(entry.renewable))
+                self._condition.notify()
+
+    def _finish(self, entry):
+        with self._condition:
+            entry.active = False
+            if self._entries.get(id(entry.renewable)) is entry:
+                del self._entries[id(entry.renewable)]
+
+    def _fail(self, entry, error):
+        self._finish(entry)
+        with self._condition:
+            self._failures += 1
+        try:
+            entry.renewable.auto_renew_error = error
+        except Exception:
+            pass
+        if entry.on_failure is not None:
+            try:
+                entry.on_failure(entry.renewable, error)
+            except Exception as e:
+                logger.error(f'Error in lock renewal failure callback: {e}')
+
+    @staticmethod
+    def _is_session(renewable):
+        return isinstance(renewable, ServiceBusSession)
+
+    @staticmethod
+    def _lock_expired(renewable):
+        locked_until = getattr(renewable, 'locked_until_utc', None)
+        if not isinstance(locked_until, datetime):
+            return False
+        if locked_until.tzinfo is None:
+            locked_until = locked_until.replace(tzinfo=timezone.utc)
+        return locked_until <= datetime.now(timezone.utc)
+
+
+class _RenewalEntry:
+    def __init__(self, receiver, renewable, duration, on_failure):
+        self.receiver = receiver
+        self.renewable = renewable
+        self.duration = duration
+        self.deadline = time.monotonic() + duration
+        self.on_failure = on_failure
+        self.due = 0.0
+        self.renewals = 0
+        self.active = True
+
+
+def _get_message_id(message):
+    return getattr(message, 'message_id', None) or getattr(message, 'messageId', 'unknown')
@@ -0,0 +1,99 @@
+import logging
+from azure.servicebus.exceptions import MessageSizeExceededError
+
+logger = logging.getLogger('AzureTopic')
+
+CREATE_BATCH = 'create_batch'
+SEND_BATCH = 'send_batch'
+REJECT_MESSAGE = 'reject_message'
+
+
+def pack_message_batches(messages):
+    """
+    Packs ServiceBusMessages into as few ServiceBusMessageBatch objects as the size limit allows.
+    The generator does no I/O so the sync and async publishers share it: it yields (CREATE_BATCH, None) and expects an
+    empty batch back through `send`, yields (SEND_BATCH, batch) for every batch to publish and (REJECT_MESSAGE, error)
+    for a message larger than an empty batch, which can never be sent.
+    """
+    batch = yield CREATE_BATCH, None
+    for message in messages:
+        try:
+            batch.add_message(message)
+            continue
+        except MessageSizeExceededError:
+            pass
+        if len(batch) > 0:
+            yield SEND_BATCH, batch
+            batch = yield CREATE_BATCH, None
+        try:
+            batch.add_message(message)
+        except MessageSizeExceededError as e:
+            yield REJECT_MESSAGE, e
+    if len(batch) > 0:
+        yield SEND_BATCH, batch
+
+
+def send_in_batches(sender, messages, results=None):
+    """
+    Sends ServiceBusMessages with as few batch sends as possible.
+    Args:
+        sender (ServiceBusSender): The sender the batches are created and sent with.
+        messages (Iterable[ServiceBusMessage]): The messages to send.
+        results (list): Collects the results as they are produced, so they are kept when creating a batch raises.
+    Returns:
+        list: One {'batch', 'message_count', 'success', 'error'} entry per batch sent or message rejected.
+    """
+    results = [] if results is None else results
+    packer = pack_message_batches(messages)
+    action, value = next(packer)
+    while True:
+        try:
+            if action == CREATE_BATCH:
+                action, value = packer.send(sender.create_message_batch())
+                continue
+            if action == SEND_BATCH:
+                try:
+                    sender.send_messages(value)
+                    results.append(_get_batch_result(len(results), len(value)))
+                except Exception as e:
+                    results.append(_get_batch_result(len(results), len(value), e))
+            else:
+                results.append(_get_batch_result(len(results), 1, value))
+            action, value = next(packer)
+        except StopIteration:
+            return results
+
+
+async def send_in_batches_async(sender, messages):
+    """
+    `send_in_batches` for the senders of azure.servicebus.aio.
+    """
+    results = []
+    packer = pack_message_batches(messages)
+    action, value = next(packer)
+    while True:
+        try:
+            if action == CREATE_BATCH:
+                action, value = packer.send(await sender.create_message_batch())
+                continue
+            if action == SEND_BATCH:
+                try:
+                    await sender.send_messages(value)
+                    results.append(_get_batch_result(len(results), len(value)))
+                except Exception as e:
+                    results.append(_get_batch_result(len(results), len(value), e))
+            else:
+                results.append(_get_batch_result(len(results), 1, value))
+            action, value = next(packer)
+        except StopIteration:
+            return results
+
+
+def _get_batch_result(index, message_count, error=None):
+    if error is None:
+        return {'batch': index, 'message_count': message_count, 'success': True, 'error': None}
+    if isinstance(error, MessageSizeExceededError):
+        logger.error(f'Rejecting a message larger than the batch size limit: {error}')
+    else:
+        logger.error(f'Error in publishing batch {index} of {message_count} messages: {error}')
+    return {'batch': index, 'message_count': message_count, 'success': False, 'error': str(error)}
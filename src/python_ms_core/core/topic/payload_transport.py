@@ -0,0 +1,100 @@
+import json
+import logging
+import mmap
+import os
+import tempfile
+
+logger = logging.getLogger('AzureTopic')
+
+# tmpfs: the file lives in memory and is mapped, not read, by the callback process.
+DEFAULT_PAYLOAD_DIRECTORY = '/dev/shm'
+
+
+"""
+SharedPayload hands a message body to a callback process through a memory-mapped file instead of pickling it.
+The body is written once, only the small SharedPayloadHandle (path and size) crosses the process boundary, and the
+callback process decodes the body straight from the mapping. The file is removed by `release` once the message is
+settled.
+A memory-mapped tmpfs file is used rather than `multiprocessing.shared_memory` because segments attached in a child
+process are tracked (and unlinked) by the resource tracker on Python < 3.13.
+Attributes:
+    handle (SharedPayloadHandle): The picklable reference passed to the callback process.
+Methods:
+    release() -> None:
+        Removes the file; safe to call more than once.
+"""
+class SharedPayload:
+    def __init__(self, body_sections, directory=None):
+        directory = directory or (DEFAULT_PAYLOAD_DIRECTORY if os.path.isdir(DEFAULT_PAYLOAD_DIRECTORY) else None)
+        descriptor, path = tempfile.mkstemp(prefix='topic-payload-', dir=directory)
+        size = 0
+        try:
+            for section in body_sections:
+                view = memoryview(section)
+                while view:
+                    written = os.write(descriptor, view)
+                    view = view[written:]
+                    size += written
+        except Exception:
+            os.close(descriptor)
+            os.unlink(path)
+            raise
+        os.close(descriptor)
+        self.handle = SharedPayloadHandle(path, size)
+
+    def release(self):
+        if self.handle is None:
+            return
+        try:
+            os.unlink(self.handle.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f'Unable to remove shared payload {self.handle.path}: {e}')
+        self.handle = None
+
+
+class SharedPayloadHandle:
+    __slots__ = ('path', 'size')
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def __getstate__(self):
+        return self.path, self.size
+
+    def __setstate__(self, state):
+        self.path, self.size = state
+
+
+def load_payload(payload):
+    """
+    Returns the message payload for QueueMessage.data_from: the payload unchanged, or the JSON body decoded straight
+    from the memory-mapped bytes when a handle is passed.
+    """
+    if not isinstance(payload, SharedPayloadHandle):
+        return payload
+    if payload.size == 0:
+        return ''
+    with open(payload.path, 'rb') as payload_file:
+        with mmap.mmap(payload_file.fileno(), payload.size, access=mmap.ACCESS_READ) as buffer:
+            return json.loads(buffer[:])
+
+
+def get_body_sections(message):
+    """
+    Returns the raw body of a received message as a list of bytes sections, or None when it has no bytes body.
+    """
+    body = getattr(message, 'body', None)
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return [body]
+    if body is None or isinstance(body, str):
+        return None
+    try:
+        sections = list(body)
+    except TypeError:
+        return None
+    if not sections or not all(isinstance(section, (bytes, bytearray, memoryview)) for section in sections):
+        return None
+    return sections
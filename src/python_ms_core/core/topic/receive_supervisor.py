@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+
+from azure.servicebus.exceptions import (
+    MessagingEntityDisabledError,
+    MessagingEntityNotFoundError,
+    ServiceBusAuthenticationError,
+    ServiceBusAuthorizationError,
+    ServiceBusCommunicationError,
+    ServiceBusConnectionError,
+)
+
+
+# Errors after which the receiver link is not reused; the receive loop opens a new one.
+FATAL_RECEIVE_ERRORS = (
+    ServiceBusConnectionError,
+    ServiceBusCommunicationError,
+    ServiceBusAuthenticationError,
+    ServiceBusAuthorizationError,
+    MessagingEntityNotFoundError,
+    MessagingEntityDisabledError,
+)
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+"""
+ReceiveSupervisor decides how long a receive loop waits after a failed iteration and whether its receiver link has to
+be rebuilt.
+Consecutive failures back off exponentially: failure n waits min(initial_delay * multiplier ** (n - 1), max_delay),
+randomised by +/- jitter. After failure_threshold consecutive failures the circuit opens and the loops wait at least
+reset_timeout before one trial receive (half-open); a successful receive closes the circuit again.
+Attributes:
+    state (str): `closed`, `open` or `half_open`.
+    consecutive_failures (int): Failures since the last successful receive.
+Methods:
+    record_success() -> None:
+        Resets the failure count and closes the circuit.
+    record_failure(error: Exception) -> float:
+        Counts a failure and returns the seconds to wait before the next attempt.
+    before_attempt() -> None:
+        Moves an open circuit to half-open once reset_timeout has passed.
+    should_rebuild(error: Exception) -> bool:
+        Checks whether the receiver link should be replaced after the error.
+    record_reconnect() -> None:
+        Counts a rebuilt receiver link.
+    stats() -> dict:
+        Returns the circuit state and the failure and reconnect counters.
+"""
+class ReceiveSupervisor:
+    def __init__(self, initial_delay=1, max_delay=60, multiplier=2, jitter=0.2, failure_threshold=5,
+                 reset_timeout=60):
+        if initial_delay <= 0 or max_delay < initial_delay:
+            raise ValueError('initial_delay must be greater than 0 and at most max_delay.')
+        if multiplier < 1:
+            raise ValueError('multiplier must be at least 1.')
+        if not 0 <= jitter <= 1:
+            raise ValueError('jitter must be between 0 and 1.')
+        if int(failure_threshold) < 1:
+            raise ValueError('failure_threshold must be at least 1.')
+        if reset_timeout < 0:
+            raise ValueError('reset_timeout must not be negative.')
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._opened_at = None
+        self._failures = 0
+        self._reconnects = 0
+        self._circuit_opened = 0
+        self._last_error = None
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.state = CIRCUIT_CLOSED
+            self._opened_at = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._failures += 1
+            self._last_error = f'{type(error).__name__}: {error}'
+            delay = min(self.initial_delay * self.multiplier ** (self.consecutive_failures - 1), self.max_delay)
+            if self.jitter:
+                delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            now = time.monotonic()
+            if self.state == CIRCUIT_HALF_OPEN or (
+                    self.state == CIRCUIT_CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = CIRCUIT_OPEN
+                self._opened_at = now
+                self._circuit_opened += 1
+            if self.state == CIRCUIT_OPEN:
+                # The trial receive happens once reset_timeout has passed since the circuit opened.
+                delay = max(delay, self._opened_at + self.reset_timeout - now)
+            return max(delay, 0)
+
+    def should_rebuild(self, error):
+        with self._lock:
+            circuit_open = self.state != CIRCUIT_CLOSED
+        return isinstance(error, FATAL_RECEIVE_ERRORS) or circuit_open
+
+    def before_attempt(self):
+        """
+        Moves an open circuit whose reset_timeout passed to half-open; called before every receive.
+        """
+        with self._lock:
+            if self.state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = CIRCUIT_HALF_OPEN
+
+    def record_reconnect(self):
+        with self._lock:
+            self._reconnects += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failures': self._failures,
+                'reconnects': self._reconnects,
+                'circuit_opened': self._circuit_opened,
+                'last_error': self._last_error,
+            }
@@ -0,0 +1,62 @@
+import logging
+import psutil
+
+logger = logging.getLogger('AzureTopic')
+
+CGROUP_V2_MEMORY_LIMIT = '/sys/fs/cgroup/memory.max'
+CGROUP_V1_MEMORY_LIMIT = '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+# cgroup v1 reports "no limit" as a page-aligned value close to 2**63.
+UNLIMITED_THRESHOLD = 2 ** 60
+
+
+def get_process_rss(include_children=True):
+    """
+    Returns the resident set size in bytes of the current process and, optionally, of every child process
+    (callback subprocesses and pooled workers).
+    """
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    if include_children:
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                # Callback processes come and go between listing and sampling.
+                continue
+    return rss
+
+
+def get_cgroup_memory_limit():
+    """
+    Returns the memory limit in bytes of the container (cgroup v2, then v1), or the physical memory size when the
+    process is not memory limited.
+    """
+    for path in (CGROUP_V2_MEMORY_LIMIT, CGROUP_V1_MEMORY_LIMIT):
+        try:
+            with open(path) as limit_file:
+                value = limit_file.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < UNLIMITED_THRESHOLD:
+            return int(value)
+    return psutil.virtual_memory().total
+
+
+def get_cpu_percent():
+    """
+    Returns the system CPU utilisation in percent since the previous call (non-blocking).
+    """
+    return psutil.cpu_percent(interval=None)
+
+
+def sample_usage():
+    """
+    Returns {'cpu_percent', 'rss'} for the current process tree. Sampling errors are logged and reported as None.
+    """
+    usage = {'cpu_percent': None, 'rss': None}
+    try:
+        usage['cpu_percent'] = get_cpu_percent()
+        usage['rss'] = get_process_rss()
+    except Exception as e:
+        logger.warning(f'Unable to sample resource usage: {e}')
+    return usage
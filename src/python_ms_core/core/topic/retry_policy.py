@@ -0,0 +1,72 @@
+import random
+
+
+RETRY_ATTEMPT_PROPERTY = 'retry_attempt'
+RETRY_SUBSCRIPTION_PROPERTY = 'retry_subscription'
+RETRY_ORIGINAL_MESSAGE_ID_PROPERTY = 'retry_original_message_id'
+
+
+"""
+RetryPolicy decides what happens to a message whose callback failed: it is re-published with a scheduled enqueue time
+that grows exponentially with every attempt, and dead-lettered once max_attempts callbacks have failed.
+Every copy gets a new message_id so duplicate detection on the topic does not drop it; the id of the first delivery is
+kept in the `retry_original_message_id` application property.
+The delay of attempt n (1-based) is min(initial_delay * multiplier ** (n - 1), max_delay), randomised by +/- jitter.
+Attributes:
+    max_attempts (int): Failed callbacks after which the message is dead-lettered.
+    initial_delay (float): Seconds before the first retry.
+    max_delay (float): Upper bound of the delay in seconds.
+    multiplier (float): Factor the delay grows by with every attempt.
+    jitter (float): Fraction of the delay added or removed at random so retries of a burst do not line up.
+    max_error_length (int): Characters of the traceback kept in the dead-letter description.
+Methods:
+    get_delay(attempt: int) -> float:
+        Returns the delay in seconds before the given retry attempt.
+    should_dead_letter(attempt: int) -> bool:
+        Checks whether the failed attempt was the last one allowed.
+    truncate_error(error: str) -> str:
+        Shortens a traceback to max_error_length characters, keeping its end.
+    get_subscription_filter(subscription_name: str) -> str:
+        Returns the SQL rule filter that keeps the retry copies of other subscriptions out of a subscription.
+"""
+class RetryPolicy:
+    def __init__(self, max_attempts=5, initial_delay=10, max_delay=3600, multiplier=2, jitter=0.2,
+                 max_error_length=4096):
+        if int(max_attempts) < 1:
+            raise ValueError('max_attempts must be at least 1.')
+        if initial_delay < 0 or max_delay < initial_delay:
+            raise ValueError('initial_delay must be between 0 and max_delay.')
+        if multiplier < 1:
+            raise ValueError('multiplier must be at least 1.')
+        if not 0 <= jitter <= 1:
+            raise ValueError('jitter must be between 0 and 1.')
+        self.max_attempts = int(max_attempts)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_error_length = max(int(max_error_length), 16)
+
+    def get_delay(self, attempt):
+        delay = min(self.initial_delay * self.multiplier ** max(attempt - 1, 0), self.max_delay)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(delay, 0)
+
+    def should_dead_letter(self, attempt):
+        return attempt >= self.max_attempts
+
+    def truncate_error(self, error):
+        error = str(error or '')
+        if len(error) <= self.max_error_length:
+            return error
+        # The end of a traceback names the exception, so that is the part kept.
+        return '...' + error[-(self.max_error_length - 3):]
+
+    @staticmethod
+    def get_subscription_filter(subscription_name):
+        """
+        Retry copies are published to the topic, so without this filter every subscription receives them.
+        """
+        escaped_name = str(subscription_name).replace("'", "''")
+        return f"{RETRY_SUBSCRIPTION_PROPERTY} IS NULL OR {RETRY_SUBSCRIPTION_PROPERTY} = '{escaped_name}'"
@@ -1,11 +1,14 @@
 import json
 import logging
+import threading
 import time
 from .config.topic_config import Config
 from ..resource_errors import ExceptionHandler
+from ..connection_registry import SynchronizedSender
 from concurrent.futures import ThreadPoolExecutor
 from .abstract.topic_abstract import TopicAbstract
 from ..queue.models.queue_message import QueueMessage
+from .message_batches import send_in_batches
 
 logging.basicConfig(format='%(asctime)s %(levelname)-8s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger('Topic')
@@ -38,34 +41,34 @@ class Callback:
         self._function_to_call(queue_message)
 
     # Starts listening to the messages
+    # The service bus client is owned by the Topic and stays open for publishing after the receiver closes.
     def start_listening(self, provider, topic, subscription):
-        with provider.client:  # service bus client
-            logger.info('Initiating receiver')
-            topic_receiver = provider.client.get_subscription_receiver(
-                topic_name=topic,
-                subscription_name=subscription
-            )
-            logger.info('Receiver started')
-            with topic_receiver:
-                while True:
-                    available_slots = self._max_concurrent_messages - self.message_processing
-                    if available_slots > 0:
-                        try:
-                            messages = topic_receiver.receive_messages(
-                                max_message_count=available_slots,
-                                max_wait_time=5
-                            )
-                            if not messages:
-                                continue
-                            for message in messages:
-                                self.message_processing += 1
-                                self.executor.submit(self._process_message_in_thread, message, topic_receiver)
-                        except Exception as et:
-                            logger.error(f'Error in service bus connection: {et}')
-                    else:
-                        time.sleep(10)  # Short sleep to prevent tight loop if no slots available
-
-                logger.info('Receiver stopped')
+        logger.info('Initiating receiver')
+        topic_receiver = provider.client.get_subscription_receiver(
+            topic_name=topic,
+            subscription_name=subscription
+        )
+        logger.info('Receiver started')
+        with topic_receiver:
+            while True:
+                available_slots = self._max_concurrent_messages - self.message_processing
+                if available_slots > 0:
+                    try:
+                        messages = topic_receiver.receive_messages(
+                            max_message_count=available_slots,
+                            max_wait_time=5
+                        )
+                        if not messages:
+                            continue
+                        for message in messages:
+                            self.message_processing += 1
+                            self.executor.submit(self._process_message_in_thread, message, topic_receiver)
+                    except Exception as et:
+                        logger.error(f'Error in service bus connection: {et}')
+                else:
+                    time.sleep(10)  # Short sleep to prevent tight loop if no slots available
+
+            logger.info('Receiver stopped')
 
     def _process_message_in_thread(self, message, topic_receiver):
         try:
@@ -85,6 +88,14 @@ class Topic(TopicAbstract):
         self.topic = topic_name
         self.provider = Config(config=config, topic_name=topic_name)
         self.max_concurrent_messages = max_concurrent_messages
+        self.sender = None
+        self._sender_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @ExceptionHandler.decorated
     def subscribe(self, subscription=None, callback=None):
@@ -98,7 +109,32 @@ class Topic(TopicAbstract):
     @ExceptionHandler.decorated
     def publish(self, data=None):
         message = QueueMessage.to_dict(data)
-        with self.provider.client:
-            sender = self.provider.client.get_topic_sender(topic_name=self.provider.topic)
-            with sender:
-                sender.send_messages(self.provider.sender(json.dumps(message)))
+        self._get_sender().send_messages(self.provider.sender(json.dumps(message)))
+
+    @ExceptionHandler.decorated
+    def publish_many(self, messages=None):
+        return send_in_batches(
+            self._get_sender(),
+            (self.provider.sender(json.dumps(QueueMessage.to_dict(data))) for data in messages or []),
+        )
+
+    def close(self):
+        with self._sender_lock:
+            sender, self.sender = self.sender, None
+        for resource in (sender, self.provider.client):
+            if resource is None:
+                continue
+            try:
+                resource.close()
+            except Exception as e:
+                logger.error(f'Error closing service bus connection: {e}')
+
+    def _get_sender(self):
+        # One sender (and AMQP link) is kept for the lifetime of the topic instead of one per publish. Callbacks
+        # publish from the Callback executor threads, so calls on the shared sender are serialised.
+        with self._sender_lock:
+            if self.sender is None:
+                self.sender = SynchronizedSender(
+                    self.provider.client.get_topic_sender(topic_name=self.provider.topic)
+                )
+            return self.sender
@@ -0,0 +1,162 @@
+import bisect
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600, 14400, 86400)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 500, 1000)
+
+
+"""
+Histogram counts observations into fixed buckets so percentiles can be estimated without keeping every sample.
+Attributes:
+    bounds (tuple): The inclusive upper bound of every bucket; larger values fall into an overflow bucket.
+Methods:
+    observe(value: float) -> None:
+        Adds one observation.
+    snapshot() -> dict:
+        Returns count, sum, min, max, avg, p50, p95, p99 and the per-bucket counts.
+"""
+class Histogram:
+    def __init__(self, bounds=DURATION_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        value = max(float(value), 0.0)
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        if self.count == 0:
+            return None
+        rank = max(math.ceil(self.count * percent / 100.0), 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                # Report the bucket bound, clamped to what was actually observed.
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'avg': self.sum / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': dict(zip([str(bound) for bound in self.bounds] + ['+Inf'], self.buckets)),
+        }
+
+
+"""
+TopicMetrics records where the time of every consumed message goes, from enqueue to settlement.
+The receive loop reports each stage through the on_* hooks; stats() can be read from any thread.
+Histograms (seconds unless noted):
+    queue_time: Service Bus enqueue (`enqueued_time_utc`) to receive.
+    start_delay: Receive to callback start (time spent in the receive-ahead buffer included).
+    callback_duration: Callback start to the result being available on the receive loop.
+    settlement_latency: Duration of the complete / abandon call.
+    lock_renewals: Number of lock renewals per message (count, not seconds).
+Outcomes:
+    completed, abandoned, retried, dead_lettered, failed (receive_and_delete), timed_out, duplicate, skipped,
+    lock_expired, dropped, settle_failed
+Methods:
+    on_received(message) / on_started(message) / on_finished(message) / on_settled(message, outcome, ...):
+        Stage hooks called by the topic; on_finished returns the callback duration.
+    snapshot() -> dict:
+        Returns the histogram and outcome snapshot.
+"""
+class TopicMetrics:
+    HISTOGRAMS = ('queue_time', 'start_delay', 'callback_duration', 'settlement_latency', 'lock_renewals')
+    OUTCOMES = (
+        'completed', 'abandoned', 'retried', 'dead_lettered', 'failed', 'timed_out', 'duplicate', 'skipped',
+        'lock_expired', 'dropped', 'settle_failed',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {
+                name: Histogram(COUNT_BUCKETS if name == 'lock_renewals' else DURATION_BUCKETS)
+                for name in self.HISTOGRAMS
+            }
+            self.outcomes = {outcome: 0 for outcome in self.OUTCOMES}
+            self.started_at = time.time()
+
+    def on_received(self, message):
+        now = time.monotonic()
+        queue_time = self._get_queue_time(message)
+        with self._lock:
+            self._in_flight[id(message)] = _MessageTiming(received_at=now)
+            if queue_time is not None:
+                self.histograms['queue_time'].observe(queue_time)
+
+    def on_started(self, message):
+        now = time.monotonic()
+        with self._lock:
+            timing = self._in_flight.get(id(message))
+            if timing is None:
+                return
+            timing.started_at = now
+            self.histograms['start_delay'].observe(now - timing.received_at)
+
+    def on_finished(self, message):
+        now = time.monotonic()
+        with self._lock:
+            timing = self._in_flight.get(id(message))
+            if timing is None or timing.started_at is None:
+                return None
+            duration = now - timing.started_at
+            self.histograms['callback_duration'].observe(duration)
+            return duration
+
+    def on_settled(self, message, outcome, settlement_latency=None, lock_renewals=None):
+        with self._lock:
+            self._in_flight.pop(id(message), None)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if settlement_latency is not None:
+                self.histograms['settlement_latency'].observe(settlement_latency)
+            if isinstance(lock_renewals, int):
+                self.histograms['lock_renewals'].observe(lock_renewals)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+                'histograms': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+                'outcomes': dict(self.outcomes),
+            }
+
+    @staticmethod
+    def _get_queue_time(message):
+        enqueued_time = getattr(message, 'enqueued_time_utc', None)
+        if not isinstance(enqueued_time, datetime):
+            return None
+        if enqueued_time.tzinfo is None:
+            enqueued_time = enqueued_time.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - enqueued_time).total_seconds()
+
+
+class _MessageTiming:
+    def __init__(self, received_at):
+        self.received_at = received_at
+        self.started_at = None
@@ -0,0 +1,238 @@
+import importlib
+import logging
+import threading
+import traceback
+from collections import deque
+from multiprocessing import connection as mp_connection
+from ..queue.models.queue_message import QueueMessage
+from .payload_transport import load_payload
+
+logger = logging.getLogger('AzureTopic')
+
+
+"""
+CallbackWorkerPool keeps a fixed number of long-lived callback processes and reuses them across messages.
+Each worker owns a duplex pipe; the parent sends one message payload at a time and the worker answers with
+the same {'success', 'error'} payload produced by the per-message subprocess runner.
+Attributes:
+    callback (function): The callback function every worker invokes.
+    size (int): The number of worker processes kept alive.
+    max_messages_per_worker (int): Messages a worker handles before it is recycled (0 disables recycling).
+    runner (function): Optional runner(callback, payload) -> result dict used instead of the single-message runner.
+    initializer (function): Optional function every worker calls once before it handles its first message.
+Methods:
+    start() -> None:
+        Starts all the worker processes.
+    submit(message_payload: str) -> _PoolExecutionTask:
+        Hands the payload to an idle worker and returns a task tracking the result.
+    shutdown() -> None:
+        Stops all the worker processes.
+"""
+class CallbackWorkerPool:
+    def __init__(self, process_context, callback, size: int, max_messages_per_worker: int = 0, runner=None,
+                 initializer=None):
+        self.process_context = process_context
+        self.callback = callback
+        self.runner = runner
+        self.initializer = initializer
+        self.size = max(int(size), 1)
+        self.max_messages_per_worker = max(int(max_messages_per_worker or 0), 0)
+        self._workers = []
+        self._idle_workers = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        with self._lock:
+            while len(self._workers) < self.size:
+                self._idle_workers.append(self._start_worker())
+
+    def submit(self, message_payload):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Callback worker pool is shut down.')
+            worker = self._acquire_worker()
+            try:
+                worker.connection.send(message_payload)
+            except Exception:
+                self._discard_worker(worker)
+                raise
+            worker.messages_sent += 1
+        return _PoolExecutionTask(self, worker)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers = []
+            self._idle_workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def _acquire_worker(self):
+        while self._idle_workers:
+            worker = self._idle_workers.popleft()
+            if worker.process.is_alive():
+                return worker
+            self._discard_worker(worker)
+        if len(self._workers) < self.size:
+            return self._start_worker()
+        raise RuntimeError(f'No idle callback worker available (pool size {self.size}).')
+
+    def _start_worker(self):
+        parent_connection, child_connection = self.process_context.Pipe(duplex=True)
+        process = self.process_context.Process(
+            target=_run_callback_worker,
+            args=(self.callback, child_connection, self.max_messages_per_worker, self.runner, self.initializer),
+            daemon=True,
+        )
+        try:
+            process.start()
+        except Exception:
+            parent_connection.close()
+            child_connection.close()
+            raise
+        child_connection.close()
+        worker = _PoolWorker(process, parent_connection)
+        self._workers.append(worker)
+        return worker
+
+    def _discard_worker(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker.stop()
+
+    def _release_worker(self, worker, healthy):
+        with self._lock:
+            if worker not in self._workers:
+                return
+            recycle = self.max_messages_per_worker > 0 and worker.messages_sent >= self.max_messages_per_worker
+            if healthy and not recycle and not self._closed:
+                self._idle_workers.append(worker)
+                return
+            self._discard_worker(worker)
+            if self._closed:
+                return
+            try:
+                # Replace the worker straight away so the next message does not pay the start-up cost.
+                self._idle_workers.append(self._start_worker())
+            except Exception as e:
+                logger.warning(f'Unable to start replacement callback worker: {e}')
+
+
+class _PoolWorker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.messages_sent = 0
+
+    def stop(self, timeout=5):
+        try:
+            if self.process.is_alive():
+                self.connection.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.connection.close()
+
+
+class _PoolExecutionTask:
+    def __init__(self, pool, worker):
+        self._pool = pool
+        self._worker = worker
+        self._result = None
+        self.deadline = None
+
+    def done(self):
+        if self._result is not None:
+            return True
+        return len(mp_connection.wait(self.wait_handles(), timeout=0)) > 0
+
+    def wait_handles(self):
+        if self._result is not None:
+            return []
+        return [self._worker.connection, self._worker.process.sentinel]
+
+    def terminate(self):
+        """
+        Kills the worker running an overdue callback; the pool starts a replacement.
+        """
+        self._worker.process.terminate()
+        self._worker.process.join(5)
+        self._result = {'success': False, 'error': 'Callback worker terminated after its deadline.', 'timed_out': True}
+        self._pool._release_worker(self._worker, healthy=False)
+        return True
+
+    def result(self):
+        if self._result is not None:
+            return self._result
+
+        healthy = False
+        try:
+            self._result = self._worker.connection.recv()
+            healthy = True
+        except (EOFError, OSError):
+            self._worker.process.join()
+            self._result = {
+                'success': False,
+                'error': f'Callback worker exited with code {self._worker.process.exitcode} without returning a result.',
+            }
+        finally:
+            self._pool._release_worker(self._worker, healthy=healthy)
+
+        return self._result
+
+
+def initialize_callback_process(preload_modules=(), initializer=None):
+    """
+    Imports the preload modules and runs the user initializer in a callback process.
+    """
+    for module_name in preload_modules:
+        importlib.import_module(module_name)
+    if initializer is not None:
+        initializer()
+
+
+def _run_callback_worker(callbackfn, connection, max_messages, runner=None, initializer=None):
+    handled_messages = 0
+    initialization_error = None
+    if initializer is not None:
+        try:
+            initializer()
+        except Exception as exc:
+            # Keep the worker up so every message it is handed fails with the cause instead of a crash loop.
+            initialization_error = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)).strip()
+    try:
+        while max_messages <= 0 or handled_messages < max_messages:
+            try:
+                message_payload = connection.recv()
+            except EOFError:
+                break
+            if message_payload is None:
+                break
+            keep_running = True
+            try:
+                if initialization_error is not None:
+                    result = {'success': False, 'error': f'Callback worker initialization failed: {initialization_error}'}
+                elif runner is None:
+                    queue_message = QueueMessage.data_from(load_payload(message_payload))
+                    callbackfn(queue_message)
+                    result = {'success': True, 'error': None}
+                else:
+                    result = runner(callbackfn, message_payload)
+            except BaseException as exc:  # pragma: no cover - exercised through the parent process wrapper
+                result = {
+                    'success': False,
+                    'error': ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)).strip(),
+                }
+                # SystemExit / KeyboardInterrupt end the worker; the pool starts a replacement.
+                keep_running = isinstance(exc, Exception)
+            connection.send(result)
+            handled_messages += 1
+            if not keep_running:
+                break
+    finally:
+        connection.close()
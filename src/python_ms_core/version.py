@@ -1 +1 @@
-__version__ = '0.0.25'
+__version__ = '0.0.26'
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from src.python_ms_core.core.connection_registry import ConnectionRegistry, SynchronizedSender
+
+
+class TestConnectionRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+
+    def test_acquire_creates_resource_once_per_key(self):
+        factory = MagicMock(side_effect=lambda: MagicMock())
+
+        first = self.registry.acquire('key', factory)
+        second = self.registry.acquire('key', factory)
+
+        self.assertIs(first, second)
+        factory.assert_called_once()
+        self.assertEqual(self.registry.ref_count('key'), 2)
+
+    def test_release_closes_resource_after_last_reference(self):
+        resource = MagicMock()
+        self.registry.acquire('key', lambda: resource)
+        self.registry.acquire('key', lambda: resource)
+
+        self.registry.release('key')
+        resource.close.assert_not_called()
+        self.registry.release('key')
+
+        resource.close.assert_called_once()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_release_unknown_key_is_ignored(self):
+        self.registry.release('missing')
+        self.assertEqual(len(self.registry), 0)
+
+    def test_close_closes_every_resource(self):
+        first = MagicMock()
+        second = MagicMock()
+        second.close.side_effect = Exception('close failed')
+        self.registry.acquire('first', lambda: first)
+        self.registry.acquire('second', lambda: second)
+
+        self.registry.close()
+
+        first.close.assert_called_once()
+        second.close.assert_called_once()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_concurrent_acquire_creates_single_resource(self):
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        threads = [threading.Thread(target=self.registry.acquire, args=('key', factory)) for _ in range(10)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        factory.assert_called_once()
+        self.assertEqual(self.registry.ref_count('key'), 10)
+
+
+class TestSynchronizedSender(unittest.TestCase):
+
+    def test_delegates_to_wrapped_sender(self):
+        sender = MagicMock()
+        synchronized = SynchronizedSender(sender)
+
+        synchronized.send_messages('message')
+        synchronized.create_message_batch()
+        synchronized.close()
+
+        sender.send_messages.assert_called_once_with('message')
+        sender.create_message_batch.assert_called_once()
+        sender.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
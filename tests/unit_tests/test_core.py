@@ -66,6 +66,71 @@ class TestCore(unittest.TestCase):
             mock_logging_error.assert_called_once_with(
                 f'Failed to initialize core.get_topic for provider: {UNKNOWN_ENV}')
 
+    @patch('src.python_ms_core.AsyncAzureTopic')
+    def test_get_async_topic_azure_provider(self, mock_async_topic):
+        core = Core(config=AZURE_ENV)
+        topic = core.get_async_topic('mock_topic', max_concurrent_messages=4)
+        self.assertIs(topic, mock_async_topic.return_value)
+        _, kwargs = mock_async_topic.call_args
+        self.assertEqual(kwargs['topic_name'], 'mock_topic')
+        self.assertEqual(kwargs['max_concurrent_messages'], 4)
+
+    def test_get_async_topic_local_provider(self):
+        core = Core(config=LOCAL_ENV)
+        with patch('logging.error') as mock_logging_error:
+            topic = core.get_async_topic('mock_topic')
+            self.assertIsNone(topic)
+            mock_logging_error.assert_called_once_with(
+                f'Failed to initialize core.get_async_topic for provider: {core.config.provider}')
+
+    @patch('src.python_ms_core.AzureTopic')
+    def test_get_topic_passes_worker_initializer_and_preload_modules(self, mock_azure_topic):
+        core = Core(config=AZURE_ENV)
+        initializer = MagicMock()
+
+        core.get_topic('mock_topic', worker_initializer=initializer, preload_modules=['pandas'])
+
+        _, kwargs = mock_azure_topic.call_args
+        self.assertIs(kwargs['worker_initializer'], initializer)
+        self.assertEqual(kwargs['preload_modules'], ['pandas'])
+
+    @patch('src.python_ms_core.TopicConsumerHost')
+    def test_get_consumer_host_shares_core_connection_registry(self, mock_consumer_host):
+        core = Core(config=AZURE_ENV)
+        host = core.get_consumer_host(max_concurrent_messages=8)
+        self.assertIs(host, mock_consumer_host.return_value)
+        _, kwargs = mock_consumer_host.call_args
+        self.assertEqual(kwargs['max_concurrent_messages'], 8)
+        self.assertIs(kwargs['registry'], core.connections)
+
+    def test_get_consumer_host_local_provider(self):
+        core = Core(config=LOCAL_ENV)
+        with patch('logging.error') as mock_logging_error:
+            self.assertIsNone(core.get_consumer_host())
+            mock_logging_error.assert_called_once_with(
+                f'Failed to initialize core.get_consumer_host for provider: {core.config.provider}')
+
+    @patch('src.python_ms_core.AzureStorageClient')
+    @patch('src.python_ms_core.AzureTopic')
+    def test_azure_clients_share_core_connection_registry(self, mock_azure_topic, mock_storage_client):
+        core = Core(config=AZURE_ENV)
+
+        core.get_topic('mock_topic')
+        core.get_storage_client()
+
+        self.assertIs(mock_azure_topic.call_args[1]['registry'], core.connections)
+        self.assertIs(mock_storage_client.call_args[1]['registry'], core.connections)
+
+    def test_close_releases_shared_connections(self):
+        core = Core(config=LOCAL_ENV)
+        resource = MagicMock()
+        core.connections.acquire('key', lambda: resource)
+
+        core.close()
+
+        resource.close.assert_called_once()
+        self.assertEqual(len(core.connections), 0)
+
     def test_get_storage_client_local_provider(self):
         core = Core(config=LOCAL_ENV)
         with patch('src.python_ms_core.Core.get_storage_client') as mock_get_storage_client:
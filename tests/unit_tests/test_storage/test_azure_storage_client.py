@@ -5,6 +5,7 @@ from azure.storage.blob import BlobServiceClient, BlobClient, BlobSasPermissions
 from src.python_ms_core.core.storage.providers.azure.azure_storage_client import AzureStorageClient
 from src.python_ms_core.core.storage.providers.azure.azure_storage_container import AzureStorageContainer
 from src.python_ms_core.core.storage.providers.azure.azure_file_entity import AzureFileEntity
+from src.python_ms_core.core.connection_registry import ConnectionRegistry
 
 
 class TestAzureStorageClient(unittest.TestCase):
@@ -30,6 +31,21 @@ class TestAzureStorageClient(unittest.TestCase):
         # Assertions
         self.assertEqual(result, mock_storage_container_instance)
 
+    @patch('src.python_ms_core.core.storage.providers.azure.azure_storage_client.BlobServiceClient')
+    def test_clients_share_blob_service_client_through_registry(self, mock_blob_service_client):
+        registry = ConnectionRegistry()
+
+        first = AzureStorageClient(self.config, registry=registry)
+        second = AzureStorageClient(self.config, registry=registry)
+
+        mock_blob_service_client.from_connection_string.assert_called_once_with(self.config.connection_string)
+        self.assertIs(first._blob_service_client, second._blob_service_client)
+
+        first.close()
+        mock_blob_service_client.from_connection_string.return_value.close.assert_not_called()
+        second.close()
+        mock_blob_service_client.from_connection_string.return_value.close.assert_called_once()
+
     def test_get_container_without_container_name(self):
         result = self.client.get_container(container_name='')
         self.assertIsNone(result)
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock, mock_open, patch
+from src.python_ms_core.core.topic import resource_usage
+from src.python_ms_core.core.topic.admission_policy import MemoryAdmissionPolicy
+
+
+class TestMemoryAdmissionPolicy(unittest.TestCase):
+    def test_pauses_above_high_water_mark_and_resumes_below_low_water_mark(self):
+        samples = iter([50, 95, 85, 80, 70])
+        policy = MemoryAdmissionPolicy(
+            max_rss_bytes=100, high_water_mark=0.9, low_water_mark=0.75, check_interval=0,
+            rss_sampler=lambda: next(samples),
+        )
+
+        self.assertTrue(policy.admits())
+        self.assertFalse(policy.admits())
+        self.assertFalse(policy.admits())
+        self.assertFalse(policy.admits())
+        self.assertTrue(policy.admits())
+        self.assertEqual(policy.stats(), {'budget': 100, 'rss': 70, 'paused': False, 'pauses': 1})
+
+    def test_budget_from_cgroup_limit_fraction(self):
+        policy = MemoryAdmissionPolicy(cgroup_limit_fraction=0.5, rss_sampler=lambda: 0, limit_reader=lambda: 4000)
+
+        self.assertEqual(policy.budget, 2000)
+
+    def test_samples_at_most_once_per_check_interval(self):
+        rss_sampler = MagicMock(return_value=10)
+        policy = MemoryAdmissionPolicy(max_rss_bytes=100, check_interval=60, rss_sampler=rss_sampler)
+
+        policy.admits()
+        policy.admits()
+
+        rss_sampler.assert_called_once()
+
+    def test_sampling_error_keeps_current_state(self):
+        policy = MemoryAdmissionPolicy(max_rss_bytes=100, check_interval=0, rss_sampler=MagicMock(side_effect=OSError))
+
+        self.assertTrue(policy.admits())
+
+    def test_requires_a_budget(self):
+        with self.assertRaises(ValueError):
+            MemoryAdmissionPolicy()
+        with self.assertRaises(ValueError):
+            MemoryAdmissionPolicy(max_rss_bytes=100, high_water_mark=0.5, low_water_mark=0.8)
+
+
+class TestResourceUsage(unittest.TestCase):
+    @patch('builtins.open', new_callable=mock_open, read_data='2147483648\n')
+    def test_cgroup_memory_limit_reads_limit_file(self, _):
+        self.assertEqual(resource_usage.get_cgroup_memory_limit(), 2147483648)
+
+    @patch('src.python_ms_core.core.topic.resource_usage.psutil.virtual_memory')
+    @patch('builtins.open', new_callable=mock_open, read_data='max\n')
+    def test_cgroup_memory_limit_falls_back_to_physical_memory(self, _, mock_virtual_memory):
+        mock_virtual_memory.return_value = MagicMock(total=8192)
+
+        self.assertEqual(resource_usage.get_cgroup_memory_limit(), 8192)
+
+    def test_process_rss_includes_current_process(self):
+        self.assertGreater(resource_usage.get_process_rss(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
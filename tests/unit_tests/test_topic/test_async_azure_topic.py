@@ -0,0 +1,158 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from azure.servicebus.exceptions import MessageSizeExceededError
+
+from src.python_ms_core.core.topic.async_azure_topic import AsyncAzureTopic
+from src.python_ms_core.core.queue.models.queue_message import QueueMessage
+
+
+class FakeBatch:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.messages = []
+
+    def add_message(self, message):
+        if len(self.messages) >= self.capacity:
+            raise MessageSizeExceededError(message='batch full')
+        self.messages.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class TestAsyncAzureTopic(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = patch('src.python_ms_core.core.topic.async_azure_topic.ServiceBusClient')
+        self.mock_service_bus_client = patcher.start()
+        self.addCleanup(patcher.stop)
+        renewer_patcher = patch('src.python_ms_core.core.topic.async_azure_topic.AutoLockRenewer')
+        self.mock_auto_lock_renewer = renewer_patcher.start()
+        self.addCleanup(renewer_patcher.stop)
+        self.mock_auto_lock_renewer.return_value.close = AsyncMock()
+
+        self.mock_client = MagicMock()
+        self.mock_client.close = AsyncMock()
+        self.mock_sender = MagicMock()
+        self.mock_sender.send_messages = AsyncMock()
+        self.mock_sender.close = AsyncMock()
+        self.mock_client.get_topic_sender.return_value = self.mock_sender
+        self.mock_receiver = MagicMock()
+        self.mock_receiver.__aenter__ = AsyncMock(return_value=self.mock_receiver)
+        self.mock_receiver.__aexit__ = AsyncMock(return_value=None)
+        self.mock_receiver.complete_message = AsyncMock()
+        self.mock_receiver.abandon_message = AsyncMock()
+        self.mock_client.get_subscription_receiver.return_value = self.mock_receiver
+        self.mock_service_bus_client.from_connection_string.return_value = self.mock_client
+
+        self.topic = AsyncAzureTopic(
+            config=MagicMock(connection_string='Endpoint=sb://test/'),
+            topic_name='mock-topic',
+            max_concurrent_messages=2,
+        )
+
+    @staticmethod
+    def _received_message(message_id):
+        message = MagicMock(_lock_expired=False, message_id=message_id)
+        message.__str__.return_value = json.dumps({'messageId': message_id, 'message': 'hello'})
+        return message
+
+    async def test_publish_reuses_sender(self):
+        await self.topic.publish(QueueMessage.data_from({'message': 'one'}))
+        await self.topic.publish(QueueMessage.data_from({'message': 'two'}))
+
+        self.mock_client.get_topic_sender.assert_called_once_with(topic_name='mock-topic')
+        self.assertEqual(self.mock_sender.send_messages.await_count, 2)
+
+    async def test_publish_many_splits_batches_at_size_limit(self):
+        self.mock_sender.create_message_batch = AsyncMock(side_effect=lambda: FakeBatch(capacity=2))
+        messages = [QueueMessage.data_from({'message': str(index)}) for index in range(5)]
+
+        results = await self.topic.publish_many(messages)
+
+        self.assertEqual([result['message_count'] for result in results], [2, 2, 1])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(self.mock_sender.send_messages.await_count, 3)
+
+    async def test_publish_many_reports_failed_batch(self):
+        self.mock_sender.create_message_batch = AsyncMock(side_effect=lambda: FakeBatch(capacity=10))
+        self.mock_sender.send_messages.side_effect = Exception('send failed')
+
+        results = await self.topic.publish_many([QueueMessage.data_from({'message': 'one'})])
+
+        self.assertEqual(results, [{'batch': 0, 'message_count': 1, 'success': False, 'error': 'send failed'}])
+
+    async def test_subscribe_awaits_callbacks_and_settles(self):
+        first_message = self._received_message('message-1')
+        second_message = self._received_message('message-2')
+        self.mock_receiver.receive_messages = AsyncMock(side_effect=[[first_message, second_message]])
+        processed = []
+
+        async def callback(message):
+            await asyncio.sleep(0)
+            if message.messageId == 'message-2':
+                raise ValueError('boom')
+            processed.append(message.messageId)
+
+        await self.topic.subscribe('mock-subscription', callback, max_receivable_messages=2, prefetch_count=10)
+
+        self.mock_client.get_subscription_receiver.assert_called_once_with(
+            topic_name='mock-topic',
+            subscription_name='mock-subscription',
+            prefetch_count=10,
+        )
+        self.mock_receiver.receive_messages.assert_awaited_once_with(max_message_count=2, max_wait_time=5)
+        self.assertEqual(processed, ['message-1'])
+        self.mock_receiver.complete_message.assert_awaited_once_with(first_message)
+        self.mock_receiver.abandon_message.assert_awaited_once_with(second_message)
+        self.assertEqual(self.mock_auto_lock_renewer.return_value.register.call_count, 2)
+        self.mock_auto_lock_renewer.return_value.close.assert_awaited_once()
+        self.assertEqual(self.topic.internal_count, 0)
+
+    async def test_subscribe_runs_plain_callbacks_in_executor(self):
+        message = self._received_message('message-1')
+        self.mock_receiver.receive_messages = AsyncMock(side_effect=[[message]])
+        callback = MagicMock()
+
+        await self.topic.subscribe('mock-subscription', callback, max_receivable_messages=1)
+
+        callback.assert_called_once()
+        self.mock_receiver.complete_message.assert_awaited_once_with(message)
+
+    async def test_subscribe_configures_lock_renewal_through_public_arguments_only(self):
+        renewer = MagicMock(spec_set=['register', 'close'])
+        renewer.close = AsyncMock()
+        self.mock_auto_lock_renewer.return_value = renewer
+        message = self._received_message('message-1')
+        self.mock_receiver.receive_messages = AsyncMock(side_effect=[[message]])
+
+        await self.topic.subscribe('mock-subscription', AsyncMock(), max_receivable_messages=1)
+
+        self.mock_auto_lock_renewer.assert_called_once_with(
+            max_lock_renewal_duration=86400,
+            on_lock_renew_failure=self.topic._handle_lock_renew_failure,
+        )
+        renewer.register.assert_called_once()
+        renewer.close.assert_awaited_once()
+
+    async def test_acquire_slots_takes_every_free_slot(self):
+        semaphore = asyncio.Semaphore(2)
+
+        self.assertEqual(await self.topic._acquire_slots(semaphore, -1, 0), 2)
+        self.assertTrue(semaphore.locked())
+
+    async def test_close_closes_sender_and_client(self):
+        await self.topic.publish(QueueMessage.data_from({'message': 'one'}))
+
+        await self.topic.close()
+
+        self.mock_sender.close.assert_awaited_once()
+        self.mock_client.close.assert_awaited_once()
+        self.assertIsNone(self.topic.publisher)
+
+
+if __name__ == '__main__':
+    unittest.main()
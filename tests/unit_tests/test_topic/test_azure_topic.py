@@ -1,8 +1,21 @@
+import multiprocessing as mp
+from multiprocessing import connection as mp_connection
 import os
+import signal
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, call, patch
 
-from src.python_ms_core.core.topic.azure_topic import AzureTopic
+from azure.servicebus import NEXT_AVAILABLE_SESSION, ServiceBusReceiveMode, ServiceBusReceivedMessage
+from azure.servicebus._pyamqp.message import Message, Properties
+from azure.servicebus.exceptions import MessageLockLostError, MessageSizeExceededError, OperationTimeoutError, ServiceBusConnectionError
+
+from src.python_ms_core.core.topic.azure_topic import AzureTopic, _ProcessExecutionTask, _run_callback_in_subprocess
+from src.python_ms_core.core.queue.models.queue_message import QueueMessage
+from src.python_ms_core.core.connection_registry import ConnectionRegistry
 
 
 class CompletedTask:
@@ -19,12 +32,30 @@ class CompletedTask:
         return self._result
 
 
+class FakeBatch:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.messages = []
+
+    def add_message(self, message):
+        if len(self.messages) >= self.capacity:
+            raise MessageSizeExceededError(message='batch full')
+        self.messages.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def _successful_callback(message):
+    return message
+
+
 class TestAzureTopic(unittest.TestCase):
 
     @patch.dict(os.environ, {}, clear=True)
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_init_sets_process_execution_defaults(
         self,
@@ -51,14 +82,15 @@ class TestAzureTopic(unittest.TestCase):
         mock_auto_lock_renewer.assert_called_once()
         _, kwargs = mock_auto_lock_renewer.call_args
         self.assertEqual(kwargs['max_lock_renewal_duration'], 86400)
-        self.assertEqual(kwargs['max_workers'], 2)
-        self.assertEqual(mock_renewer._renew_period, 60)
+        self.assertEqual(kwargs['renew_margin'], 60)
+        self.assertEqual(kwargs['on_lock_renew_failure'], topic._handle_lock_renew_failure)
+        self.assertIs(topic.lock_renewal, mock_renewer)
         mock_get_context.assert_called_once_with('fork')
 
     @patch.dict(os.environ, {}, clear=True)
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_submit_processing_task_uses_process_runner_by_default(
         self,
@@ -91,7 +123,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_submit_processing_task_falls_back_to_thread_when_process_start_fails(
         self,
@@ -132,7 +164,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch.dict(os.environ, {}, clear=True)
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_subscribe_settles_completed_tasks_on_receiver_loop(
         self,
@@ -175,7 +207,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_settle_task_abandons_message_when_worker_reports_failure(
         self,
@@ -219,7 +251,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_settle_task_abandons_message_when_worker_exits_without_result(
         self,
@@ -263,7 +295,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_settle_task_logs_error_and_releases_slot(
         self,
@@ -302,7 +334,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_settle_task_skips_expired_message(
         self,
@@ -347,7 +379,7 @@ class TestAzureTopic(unittest.TestCase):
     @patch('src.python_ms_core.core.topic.azure_topic.logger')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
     @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
-    @patch('src.python_ms_core.core.topic.azure_topic.AutoLockRenewer')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
     @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
     def test_handle_lock_renew_failure_logs_when_sdk_returns_no_error(
         self,
@@ -377,6 +409,1565 @@ class TestAzureTopic(unittest.TestCase):
             'locked_until_utc=2026-03-17T09:39:28Z'
         )
 
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'pool', 'TOPIC_CALLBACK_WORKER_MAX_MESSAGES': '25'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.CallbackWorkerPool')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_submit_processing_task_reuses_worker_pool_in_pool_mode(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+        mock_get_all_start_methods,
+        mock_get_context,
+        mock_worker_pool,
+    ):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_process_context = MagicMock()
+        mock_message = MagicMock()
+        mock_callback = MagicMock()
+        mock_pool = MagicMock(callback=mock_callback)
+
+        mock_get_context.return_value = mock_process_context
+        mock_worker_pool.return_value = mock_pool
+        mock_pool.submit.return_value = 'pool-task'
+        mock_message.__str__.return_value = '{"message":"hello"}'
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=3)
+
+        self.assertEqual(topic.callback_execution_mode, 'pool')
+        self.assertEqual(topic.max_messages_per_worker, 25)
+        self.assertEqual(topic._submit_processing_task(mock_message, mock_callback), 'pool-task')
+        self.assertEqual(topic._submit_processing_task(mock_message, mock_callback), 'pool-task')
+
+        mock_worker_pool.assert_called_once_with(
+            process_context=mock_process_context,
+            callback=mock_callback,
+            size=3,
+            max_messages_per_worker=25,
+            runner=None,
+            initializer=None,
+        )
+        mock_pool.start.assert_called_once()
+        self.assertEqual(mock_pool.submit.call_count, 2)
+
+        topic._shutdown_worker_pool()
+
+        mock_pool.shutdown.assert_called_once()
+        self.assertIsNone(topic.worker_pool)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_WORKER_MAX_MESSAGES': 'many'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.logger')
+    def test_get_max_messages_per_worker_defaults_to_no_recycling(self, mock_logger):
+        self.assertEqual(AzureTopic._get_max_messages_per_worker(), 0)
+        self.assertEqual(AzureTopic._get_max_messages_per_worker(10), 10)
+        mock_logger.warning.assert_called_once()
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_wait_for_pending_tasks_wakes_when_thread_task_finishes(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+    ):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_receiver = MagicMock()
+        mock_message = MagicMock()
+        mock_message._lock_expired = False
+        release_callback = threading.Event()
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.receiver = mock_receiver
+        topic.internal_count = 1
+        task = topic._submit_thread_task('{"message":"hello"}', lambda message: release_callback.wait(5))
+        topic.pending_tasks.append((task, mock_message))
+
+        topic._wait_for_pending_tasks(timeout=0.05)
+        self.assertEqual(len(topic.pending_tasks), 1)
+
+        threading.Timer(0.1, release_callback.set).start()
+        started = time.monotonic()
+        topic._wait_for_pending_tasks(timeout=5)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(topic.pending_tasks, [])
+        self.assertEqual(topic.internal_count, 0)
+        mock_receiver.complete_message.assert_called_once_with(mock_message)
+
+    @unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+    def test_process_task_reports_completion_through_wait_handles(self):
+        process_context = mp.get_context('fork')
+        parent_connection, child_connection = process_context.Pipe(duplex=False)
+        process = process_context.Process(
+            target=_run_callback_in_subprocess,
+            args=('{"message":"hello"}', _successful_callback, child_connection),
+        )
+        process.start()
+        child_connection.close()
+        task = _ProcessExecutionTask(process, parent_connection)
+
+        self.assertEqual(len(task.wait_handles()), 2)
+        ready = mp_connection.wait(task.wait_handles(), timeout=5)
+
+        self.assertTrue(ready)
+        self.assertTrue(task.done())
+        self.assertEqual(task.result(), {'success': True, 'error': None})
+        self.assertEqual(task.wait_handles(), [])
+
+    @unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+    def test_process_task_reads_result_larger_than_the_pipe_buffer(self):
+        process_context = mp.get_context('fork')
+        parent_connection, child_connection = process_context.Pipe(duplex=False)
+        process = process_context.Process(target=_send_large_result, args=(child_connection,))
+        process.start()
+        child_connection.close()
+        task = _ProcessExecutionTask(process, parent_connection)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(task.result()), daemon=True)
+
+        reader.start()
+        reader.join(5)
+
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(len(results[0]['error']), 1024 * 1024)
+        self.assertFalse(process.is_alive())
+
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_completion_signal_does_not_block_without_a_waiting_loop(self, mock_service_bus_client, mock_auto_lock_renewer):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        completion_signal = topic.completion_signal
+        notifier = threading.Thread(
+            target=lambda: [completion_signal.notify() for _ in range(200000)],
+            daemon=True,
+        )
+
+        notifier.start()
+        notifier.join(5)
+
+        self.assertFalse(notifier.is_alive())
+        self.assertTrue(completion_signal.wait_handle.poll())
+        completion_signal.clear()
+        self.assertFalse(completion_signal.wait_handle.poll())
+
+        topic.close()
+
+        self.assertTrue(completion_signal.wait_handle.closed)
+        self.assertEqual(topic.completion_signals, [])
+        completion_signal.notify()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_receives_ahead_of_free_slots(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+        mock_get_all_start_methods,
+        mock_get_context,
+    ):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        first_message = MagicMock(_lock_expired=False)
+        second_message = MagicMock(_lock_expired=False)
+
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        mock_receiver.receive_messages.side_effect = [[first_message, second_message]]
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        callback = MagicMock()
+        topic._submit_processing_task = MagicMock(
+            return_value=CompletedTask({'success': True, 'error': None})
+        )
+
+        topic.subscribe(
+            subscription='mock-subscription',
+            callback=callback,
+            max_receivable_messages=2,
+            prefetch_count=20,
+            receive_ahead=1,
+        )
+
+        mock_client.get_subscription_receiver.assert_called_once_with(
+            topic_name='mock-topic',
+            subscription_name='mock-subscription',
+            prefetch_count=20,
+        )
+        mock_receiver.receive_messages.assert_called_once_with(max_message_count=2, max_wait_time=5)
+        self.assertEqual(topic._submit_processing_task.call_count, 2)
+        self.assertEqual(mock_receiver.complete_message.call_count, 2)
+        self.assertEqual(len(topic.receive_ahead_buffer), 0)
+        self.assertEqual(topic.internal_count, 0)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_buffered_messages_have_their_locks_renewed_until_dispatched_or_dropped(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+    ):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_receiver = MagicMock()
+        running_message = MagicMock(_lock_expired=False, message_id='running')
+        buffered_message = MagicMock(_lock_expired=False, message_id='buffered')
+        buffered_message.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.receiver = mock_receiver
+        topic._submit_processing_task = MagicMock(return_value='task')
+
+        topic._buffer_received_messages([running_message, buffered_message])
+        topic._dispatch_buffered_messages(MagicMock())
+
+        registered = [registration[0][1] for registration in topic.lock_renewal.register.call_args_list]
+        self.assertEqual(registered, [running_message, buffered_message])
+        self.assertEqual(list(topic.receive_ahead_buffer), [buffered_message])
+
+        # The lock of the waiting message was lost while the first callback ran.
+        buffered_message._lock_expired = True
+        topic.internal_count = 0
+        topic._dispatch_buffered_messages(MagicMock())
+
+        topic.lock_renewal.unregister.assert_called_once_with(buffered_message)
+        self.assertEqual(topic.lock_renewal.register.call_count, 2)
+        self.assertEqual(topic._submit_processing_task.call_count, 1)
+        self.assertEqual(topic.stats()['outcomes'].get('dropped'), 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.logger')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_dispatch_buffered_messages_drops_messages_near_lock_expiry(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+        mock_logger,
+    ):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_receiver = MagicMock()
+        expiring_message = MagicMock(_lock_expired=False, message_id='expiring')
+        expiring_message.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=1)
+        healthy_message = MagicMock(_lock_expired=False, message_id='healthy')
+        healthy_message.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.receiver = mock_receiver
+        topic._submit_processing_task = MagicMock(return_value='task')
+        topic.receive_ahead_buffer.extend([expiring_message, healthy_message])
+
+        topic._dispatch_buffered_messages(MagicMock())
+
+        mock_receiver.abandon_message.assert_called_once_with(expiring_message)
+        topic._submit_processing_task.assert_called_once()
+        self.assertIs(topic._submit_processing_task.call_args[0][0], healthy_message)
+        self.assertEqual(topic.pending_tasks, [('task', healthy_message)])
+        self.assertEqual(topic.internal_count, 1)
+        mock_logger.warning.assert_called_once()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_publish_many_packs_messages_into_batches(self, mock_service_bus_client, mock_auto_lock_renewer):
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+        mock_sender.create_message_batch.side_effect = lambda: FakeBatch(capacity=2)
+        mock_sender.send_messages.side_effect = [None, Exception('send failed'), None]
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        results = topic.publish_many(QueueMessage.data_from({'message': str(index)}) for index in range(5))
+
+        self.assertEqual(results, [
+            {'batch': 0, 'message_count': 2, 'success': True, 'error': None},
+            {'batch': 1, 'message_count': 2, 'success': False, 'error': 'send failed'},
+            {'batch': 2, 'message_count': 1, 'success': True, 'error': None},
+        ])
+        self.assertEqual(mock_sender.send_messages.call_count, 3)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_publish_many_reports_message_larger_than_batch(self, mock_service_bus_client, mock_auto_lock_renewer):
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+        mock_sender.create_message_batch.side_effect = lambda: FakeBatch(capacity=0)
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        results = topic.publish_many([QueueMessage.data_from({'message': 'huge'})])
+
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0]['success'])
+        mock_sender.send_messages.assert_not_called()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.BufferedPublisher')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_publish_enqueues_when_buffered_publish_is_enabled(
+        self,
+        mock_service_bus_client,
+        mock_auto_lock_renewer,
+        mock_buffered_publisher,
+    ):
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.enable_buffered_publish(max_batch_messages=50, linger_time=0.5, block_when_full=False)
+        topic.publish(QueueMessage.data_from({'message': 'hello'}))
+        topic.flush(timeout=1)
+        topic.close()
+
+        _, kwargs = mock_buffered_publisher.call_args
+        self.assertIs(kwargs['sender'], mock_sender)
+        self.assertEqual(kwargs['max_batch_messages'], 50)
+        self.assertFalse(kwargs['block_when_full'])
+        buffered = mock_buffered_publisher.return_value
+        buffered.publish.assert_called_once()
+        buffered.flush.assert_called_once_with(timeout=1)
+        buffered.close.assert_called_once()
+        mock_sender.send_messages.assert_not_called()
+        mock_sender.close.assert_called_once()
+        mock_client.close.assert_called_once()
+        self.assertIsNone(topic.buffered_publisher)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_topics_share_client_and_sender_through_registry(self, mock_service_bus_client, mock_auto_lock_renewer):
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+        registry = ConnectionRegistry()
+
+        first = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1, registry=registry)
+        second = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1, registry=registry)
+        other = AzureTopic(config=mock_config, topic_name='other-topic', max_concurrent_messages=1, registry=registry)
+
+        mock_service_bus_client.from_connection_string.assert_called_once()
+        self.assertEqual(mock_client.get_topic_sender.call_count, 2)
+        self.assertIs(first.publisher, second.publisher)
+        self.assertIsNot(first.publisher, other.publisher)
+
+        first.publish(QueueMessage.data_from({'message': 'hello'}))
+        mock_sender.send_messages.assert_called_once()
+
+        first.close()
+        mock_sender.close.assert_not_called()
+        mock_client.close.assert_not_called()
+
+        second.close()
+        other.close()
+        self.assertEqual(mock_sender.close.call_count, 2)
+        mock_client.close.assert_called_once()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_topics_share_lock_renewal_scheduler_through_registry(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        registry = ConnectionRegistry()
+
+        first = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1, registry=registry)
+        second = AzureTopic(config=mock_config, topic_name='other-topic', max_concurrent_messages=1, registry=registry)
+
+        mock_scheduler_class.assert_called_once()
+        self.assertIs(first.lock_renewal, second.lock_renewal)
+        first.close()
+        first.lock_renewal.close.assert_not_called()
+        second.close()
+        second.lock_renewal.close.assert_called_once()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_settle_task_unregisters_message_from_lock_renewal(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.receiver = MagicMock()
+        incoming_message = MagicMock(_lock_expired=False)
+        task = MagicMock()
+        task.result.return_value = {'success': True, 'error': None}
+
+        topic._settle_task(task, incoming_message=incoming_message)
+
+        topic.receiver.complete_message.assert_called_once_with(incoming_message)
+        topic.lock_renewal.unregister.assert_called_once_with(incoming_message)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_stats_records_message_timings_and_outcome(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        mock_scheduler_class.return_value.unregister.return_value = 3
+        mock_scheduler_class.return_value.stats.return_value = {'outstanding_locks': 0}
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        topic.receiver = MagicMock()
+        message = MagicMock(_lock_expired=False, enqueued_time_utc=datetime.now(timezone.utc))
+        task = MagicMock()
+        task.result.return_value = {'success': False, 'error': 'boom'}
+
+        topic.metrics.on_received(message)
+        topic.metrics.on_started(message)
+        topic._settle_task(task, incoming_message=message)
+        stats = topic.stats()
+
+        self.assertEqual(stats['topic'], 'mock-topic')
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['lock_renewal'], {'outstanding_locks': 0})
+        self.assertEqual(stats['outcomes']['abandoned'], 1)
+        for name in ('queue_time', 'start_delay', 'callback_duration', 'settlement_latency', 'lock_renewals'):
+            self.assertEqual(stats['histograms'][name]['count'], 1)
+        self.assertEqual(stats['histograms']['lock_renewals']['sum'], 3)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_forward_metrics_records_summaries_once_per_interval(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        metrics_logger = MagicMock()
+
+        topic.forward_metrics(metrics_logger, interval=60)
+        topic._report_metrics()
+        metrics_logger.record_metric.assert_not_called()
+
+        topic._report_metrics(force=True)
+        names = [call.args[0] for call in metrics_logger.record_metric.call_args_list]
+        self.assertIn('mock-topic.callback_duration', names)
+        self.assertIn('mock-topic.outcomes', names)
+        self.assertIn('mock-topic.receiver', names)
+        self.assertEqual(len(names), 7)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_message_whose_callback_cannot_start_is_abandoned_and_its_slot_released(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_receiver = MagicMock()
+        message = MagicMock(_lock_expired=False, locked_until_utc=None, message_id='unstarted')
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.receiver = mock_receiver
+        topic.executor.shutdown()
+
+        topic._buffer_received_messages([message])
+        topic._dispatch_buffered_messages(MagicMock())
+
+        mock_receiver.abandon_message.assert_called_once_with(message)
+        self.assertEqual(topic.internal_count, 0)
+        self.assertEqual(topic.pending_tasks, [])
+        self.assertEqual(topic.stats()['outcomes']['abandoned'], 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_adaptive_concurrency_limits_free_slots(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=2)
+        original_executor = topic.executor
+
+        topic.enable_adaptive_concurrency(min_concurrent_messages=1, max_concurrent_messages=8)
+
+        self.assertEqual(topic.max_concurrent_messages, 8)
+        self.assertIsNot(topic.executor, original_executor)
+        self.assertEqual(topic.executor._max_workers, 8)
+        self.assertEqual(topic._get_free_slot_count(), 1)
+        topic.concurrency_controller.limit = 6
+        topic.internal_count = 2
+        self.assertEqual(topic._get_free_slot_count(), 4)
+        self.assertEqual(topic.stats()['concurrency_limit'], 6)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_settle_task_feeds_adaptive_concurrency_controller(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=2)
+        topic.receiver = MagicMock()
+        topic.concurrency_controller = MagicMock(limit=2)
+        message = MagicMock(_lock_expired=False)
+        task = MagicMock()
+        task.result.return_value = {'success': False, 'error': 'boom'}
+        topic.metrics.on_received(message)
+        topic.metrics.on_started(message)
+        topic.internal_count = 1
+
+        topic._update_concurrency_limit()
+        topic._settle_task(task, incoming_message=message)
+
+        topic.concurrency_controller.update.assert_called_once_with(1)
+        latency, success = topic.concurrency_controller.record.call_args[0]
+        self.assertGreaterEqual(latency, 0)
+        self.assertFalse(success)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_admission_policy_stops_receiving_while_paused(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=4)
+        topic.receiver = MagicMock(local_received_messages=0)
+        topic.admission_policy = MagicMock()
+
+        topic.admission_policy.admits.return_value = False
+        self.assertEqual(topic._get_receivable_count(), 0)
+
+        topic.admission_policy.admits.return_value = True
+        self.assertEqual(topic._get_receivable_count(), 4)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_uses_admission_policy(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        mock_message = MagicMock(_lock_expired=False, locked_until_utc=None)
+        mock_message.__str__.return_value = '{"message":"hello"}'
+        mock_receiver.receive_messages.return_value = [mock_message]
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=1)
+        policy = MagicMock()
+        policy.admits.side_effect = [False, True, True, True, True, True]
+        topic.wait_time_for_message = 0.01
+
+        topic.subscribe('mock-subscription', _successful_callback, max_receivable_messages=1, admission_policy=policy)
+
+        self.assertIs(topic.admission_policy, policy)
+        self.assertGreaterEqual(policy.admits.call_count, 2)
+        mock_receiver.receive_messages.assert_called_once()
+        mock_receiver.complete_message.assert_called_once_with(mock_message)
+
+    def _run_subscribe_batch(self, execution_mode, callback, messages, **options):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        mock_receiver.receive_messages.side_effect = [messages]
+        with patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': execution_mode}, clear=True), \
+                patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler'), \
+                patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient') as mock_service_bus_client:
+            mock_service_bus_client.from_connection_string.return_value = mock_client
+            topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=2)
+            topic.subscribe_batch(
+                'mock-subscription', callback, max_receivable_messages=len(messages), **options,
+            )
+        return topic, mock_receiver
+
+    def test_subscribe_batch_settles_each_message_from_result_map(self):
+        messages = []
+        for message_id in ('a', 'b', 'c'):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = f'{{"messageId":"{message_id}","message":"hello"}}'
+            messages.append(message)
+        delivered = []
+
+        def callback(batch):
+            delivered.append([message.messageId for message in batch])
+            return {'a': True, 'b': False, 'c': True}
+
+        topic, mock_receiver = self._run_subscribe_batch('thread', callback, messages, max_batch_size=10, max_wait=2)
+
+        self.assertEqual(delivered, [['a', 'b', 'c']])
+        mock_receiver.receive_messages.assert_called_once_with(max_message_count=3, max_wait_time=2)
+        self.assertEqual(mock_receiver.complete_message.call_args_list, [call(messages[0]), call(messages[2])])
+        mock_receiver.abandon_message.assert_called_once_with(messages[1])
+        self.assertEqual(topic.lock_renewal.register.call_count, 3)
+        self.assertEqual(topic.internal_count, 0)
+        self.assertEqual(topic.stats()['outcomes']['completed'], 2)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_batch_returns_summary_of_each_run(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        batches = []
+        for batch_index in range(2):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = f'{{"messageId":"{batch_index}","message":"hello"}}'
+            batches.append([message])
+        mock_receiver.receive_messages.side_effect = batches
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        # Left over from an earlier run that was interrupted during a receive call.
+        topic.reserved_messages = 3
+
+        first = topic.subscribe_batch('mock-subscription', MagicMock(return_value=True), max_receivable_messages=1)
+        second = topic.subscribe_batch('mock-subscription', MagicMock(return_value=False), max_receivable_messages=1)
+
+        self.assertEqual(first['exit_reason'], 'max_receivable_messages')
+        self.assertEqual((first['received'], first['completed'], first['failed']), (1, 1, 0))
+        self.assertEqual((second['received'], second['completed'], second['failed']), (1, 0, 1))
+        self.assertEqual(second['outcomes']['abandoned'], 1)
+        self.assertEqual(second['callback_duration']['count'], 1)
+        self.assertEqual(topic.reserved_messages, 0)
+
+    @unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+    def test_subscribe_batch_runs_callback_in_subprocess(self):
+        messages = []
+        for _ in range(2):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = '{"message":"hello"}'
+            messages.append(message)
+
+        _, mock_receiver = self._run_subscribe_batch('process', _batch_callback_failing_last, messages)
+
+        mock_receiver.complete_message.assert_called_once_with(messages[0])
+        mock_receiver.abandon_message.assert_called_once_with(messages[1])
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_with_multiple_receivers_settles_on_owning_receiver(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        receivers = []
+        available_messages = []
+        for _ in range(6):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = '{"message":"hello"}'
+            available_messages.append(message)
+        subscription_lock = threading.Lock()
+
+        def create_receiver(**kwargs):
+            receiver = MagicMock()
+            receiver.delivered = []
+
+            def receive_messages(max_message_count, max_wait_time):
+                with subscription_lock:
+                    messages = available_messages[:min(max_message_count, 2)]
+                    del available_messages[:len(messages)]
+                receiver.delivered.extend(messages)
+                if not messages:
+                    time.sleep(0.01)
+                return messages
+
+            receiver.receive_messages.side_effect = receive_messages
+            receivers.append(receiver)
+            return receiver
+
+        mock_client.get_subscription_receiver.side_effect = create_receiver
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=6)
+        topic.wait_time_for_message = 0.01
+
+        topic.subscribe('mock-subscription', _successful_callback, max_receivable_messages=6, receiver_count=3)
+
+        self.assertEqual(len(receivers), 3)
+        for receiver in receivers:
+            completed = [settle_call.args[0] for settle_call in receiver.complete_message.call_args_list]
+            self.assertCountEqual(completed, receiver.delivered)
+            receiver.close.assert_called_once()
+        self.assertEqual(topic.received_messages, 6)
+        self.assertEqual(topic.internal_count, 0)
+        self.assertEqual(topic.stats()['outcomes']['completed'], 6)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_receive_loops_share_slots_and_receive_limit(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=5)
+        topic.receiver_count = 2
+        topic.receiver = MagicMock()
+        topic.receiver.receive_messages.return_value = ['message']
+
+        self.assertEqual(topic._get_receivable_count(), 3)
+        self.assertEqual(topic._receive_messages(3, max_receivable_messages=4, max_wait_time=1), ['message'])
+        topic.receiver.receive_messages.assert_called_once_with(max_message_count=3, max_wait_time=1)
+        self.assertEqual(topic.received_messages, 1)
+        self.assertEqual(topic._get_receivable_count(max_receivable_messages=2), 1)
+
+        for _ in range(5):
+            self.assertTrue(topic._reserve_slot())
+        self.assertFalse(topic._reserve_slot())
+        self.assertTrue(topic._reserve_slot(force=True))
+        self.assertEqual(topic.internal_count, 6)
+
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'pool'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_host_budget_and_shared_worker_pool_are_used(self, mock_service_bus_client, mock_scheduler_class):
+        mock_config = MagicMock(connection_string='Endpoint=sb://test/')
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=mock_config, topic_name='mock-topic', max_concurrent_messages=4)
+        topic.concurrency_budget = MagicMock()
+        topic.concurrency_budget.available.return_value = 1
+        topic.budget_name = 'mock-topic/mock-subscription'
+        topic.shared_worker_pool = MagicMock()
+
+        self.assertEqual(topic._get_free_slot_count(), 1)
+        self.assertTrue(topic._reserve_slot())
+        topic.concurrency_budget.acquire.assert_called_once_with('mock-topic/mock-subscription', force=False)
+        task = topic._submit_pool_task('payload', _successful_callback)
+        self.assertIs(task, topic.shared_worker_pool.submit.return_value)
+        topic.shared_worker_pool.submit.assert_called_once_with(('mock-topic/mock-subscription', 'payload'))
+        self.assertIsNone(topic.worker_pool)
+
+        topic._settle_task(CompletedTask({'success': True, 'error': None}))
+
+        topic.concurrency_budget.release.assert_called_once_with('mock-topic/mock-subscription')
+        self.assertEqual(topic.internal_count, 0)
+
+    def _create_subscribed_message(self, mock_client):
+        mock_receiver = MagicMock()
+        message = MagicMock(_lock_expired=False, locked_until_utc=None, message_id='slow')
+        message.__str__.return_value = '{"message":"hello"}'
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        mock_receiver.receive_messages.side_effect = [[message]]
+        return mock_receiver, message
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_thread_callback_past_deadline_is_abandoned_and_slot_leaked(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, message = self._create_subscribed_message(mock_client)
+        release_callback = threading.Event()
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=1)
+        topic.set_callback_deadline(0.1)
+
+        topic.subscribe('mock-subscription', lambda queue_message: release_callback.wait(5), max_receivable_messages=1)
+
+        mock_receiver.abandon_message.assert_called_once_with(message)
+        mock_receiver.complete_message.assert_not_called()
+        stats = topic.stats()
+        self.assertEqual(stats['outcomes']['timed_out'], 1)
+        self.assertEqual(stats['leaked_slots'], 1)
+        self.assertEqual(topic.internal_count, 1)
+
+        release_callback.set()
+        topic._wait_for_pending_tasks(timeout=5)
+
+        self.assertEqual(topic.leaked_slots, 0)
+        self.assertEqual(topic.internal_count, 0)
+        self.assertEqual(topic.pending_tasks, [])
+
+    @unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'process'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_process_callback_past_deadline_is_terminated_and_dead_lettered(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, message = self._create_subscribed_message(mock_client)
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=1)
+        topic.set_callback_deadline(0.2, action='dead_letter')
+        started = time.monotonic()
+
+        topic.subscribe('mock-subscription', _hanging_callback, max_receivable_messages=1)
+
+        self.assertLess(time.monotonic() - started, 10)
+        mock_receiver.dead_letter_message.assert_called_once()
+        args, kwargs = mock_receiver.dead_letter_message.call_args
+        self.assertIs(args[0], message)
+        self.assertEqual(kwargs['reason'], 'CallbackTimeout')
+        self.assertIn('deadline of 0.2s', kwargs['error_description'])
+        self.assertEqual(topic.internal_count, 0)
+        self.assertEqual(topic.leaked_slots, 0)
+        self.assertEqual(topic.stats()['outcomes']['timed_out'], 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_set_callback_deadline_rejects_invalid_arguments(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+
+        with self.assertRaises(ValueError):
+            topic.set_callback_deadline(0)
+        with self.assertRaises(ValueError):
+            topic.set_callback_deadline(10, action='complete')
+
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_redelivered_completed_message_skips_callback(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        first_delivery, redelivery = [], []
+        for message in (first_delivery, redelivery):
+            received = MagicMock(_lock_expired=False, locked_until_utc=None, message_id=None)
+            received.__str__.return_value = '{"messageId":"job-1","message":"hello"}'
+            message.append(received)
+        mock_receiver.receive_messages.side_effect = [first_delivery, redelivery]
+        callback = MagicMock()
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=1)
+        topic.enable_deduplication()
+
+        topic.subscribe('mock-subscription', callback, max_receivable_messages=2)
+
+        callback.assert_called_once()
+        self.assertEqual(mock_receiver.complete_message.call_args_list, [call(first_delivery[0]), call(redelivery[0])])
+        mock_scheduler_class.return_value.unregister.assert_any_call(redelivery[0])
+        stats = topic.stats()
+        self.assertEqual(stats['outcomes']['duplicate'], 1)
+        self.assertEqual(stats['deduplication']['hits'], 1)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_redelivery_after_lock_loss_is_completed_as_duplicate(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        first_delivery, redelivery = [], []
+        for message in (first_delivery, redelivery):
+            received = MagicMock(_lock_expired=False, locked_until_utc=None, message_id='job-1')
+            received.__str__.return_value = '{"message":"hello"}'
+            message.append(received)
+        mock_receiver.receive_messages.side_effect = [first_delivery, redelivery]
+        mock_receiver.complete_message.side_effect = [MessageLockLostError(message='lock lost'), None]
+        callback = MagicMock()
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=1)
+        topic.enable_deduplication()
+
+        topic.subscribe('mock-subscription', callback, max_receivable_messages=2)
+
+        callback.assert_called_once()
+        self.assertEqual(mock_receiver.complete_message.call_args_list, [call(first_delivery[0]), call(redelivery[0])])
+        stats = topic.stats()
+        self.assertEqual(stats['outcomes']['settle_failed'], 1)
+        self.assertEqual(stats['outcomes']['duplicate'], 1)
+        self.assertEqual(stats['deduplication']['hits'], 1)
+
+    def test_idempotency_key_prefers_service_bus_message_id(self):
+        message = MagicMock(message_id='sb-id')
+        message.__str__.return_value = '{"messageId":"body-id"}'
+        self.assertEqual(AzureTopic._get_idempotency_key(message), 'sb-id')
+
+        message.message_id = None
+        self.assertEqual(AzureTopic._get_idempotency_key(message), 'body-id')
+
+        message.__str__.return_value = 'not json'
+        self.assertIsNone(AzureTopic._get_idempotency_key(message))
+
+    def _create_retry_topic(self, mock_service_bus_client, **retry_options):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.receiver = MagicMock()
+        topic.subscription_name = 'mock-subscription'
+        topic.enable_retry(**retry_options)
+        return topic
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_failed_message_is_republished_with_backoff(self, mock_service_bus_client, mock_scheduler_class):
+        topic = self._create_retry_topic(mock_service_bus_client, initial_delay=30, jitter=0)
+        message = MagicMock(_lock_expired=False, message_id='job-1', application_properties={b'tenant': b'a'})
+        message.__str__.return_value = '{"message":"hello"}'
+
+        topic._settle_message(message, {'success': False, 'error': 'boom'})
+
+        retry_message = topic.publisher.send_messages.call_args[0][0]
+        self.assertEqual(str(retry_message), '{"message":"hello"}')
+        self.assertNotEqual(retry_message.message_id, 'job-1')
+        self.assertEqual(retry_message.application_properties['retry_original_message_id'], 'job-1')
+        self.assertEqual(retry_message.application_properties['retry_attempt'], 1)
+        self.assertEqual(retry_message.application_properties['retry_subscription'], 'mock-subscription')
+        self.assertEqual(retry_message.application_properties[b'tenant'], b'a')
+        delay = (retry_message.scheduled_enqueue_time_utc - datetime.now(timezone.utc)).total_seconds()
+        self.assertTrue(25 < delay <= 30)
+        topic.receiver.complete_message.assert_called_once_with(message)
+        topic.receiver.abandon_message.assert_not_called()
+        self.assertEqual(topic.stats()['outcomes']['retried'], 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_retry_copies_survive_duplicate_detection(self, mock_service_bus_client, mock_scheduler_class):
+        topic = self._create_retry_topic(mock_service_bus_client, jitter=0)
+        # The topic drops every message whose message_id it has already seen, as duplicate detection does.
+        seen_message_ids = {'job-1'}
+        accepted = []
+
+        def send_messages(message):
+            if message.message_id not in seen_message_ids:
+                seen_message_ids.add(message.message_id)
+                accepted.append(message)
+
+        topic.publisher.send_messages.side_effect = send_messages
+        message = MagicMock(_lock_expired=False, message_id='job-1', application_properties=None)
+        message.__str__.return_value = '{"message":"hello"}'
+
+        topic._settle_message(message, {'success': False, 'error': 'boom'})
+        retried_copy = MagicMock(_lock_expired=False, message_id=accepted[0].message_id,
+                                 application_properties=accepted[0].application_properties)
+        retried_copy.__str__.return_value = '{"message":"hello"}'
+        topic._settle_message(retried_copy, {'success': False, 'error': 'boom'})
+
+        self.assertEqual(len(accepted), 2)
+        self.assertEqual([copy.application_properties['retry_attempt'] for copy in accepted], [1, 2])
+        self.assertEqual(
+            [copy.application_properties['retry_original_message_id'] for copy in accepted], ['job-1', 'job-1'],
+        )
+        self.assertEqual(AzureTopic._get_idempotency_key(retried_copy), 'job-1')
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_message_is_dead_lettered_after_last_attempt(self, mock_service_bus_client, mock_scheduler_class):
+        topic = self._create_retry_topic(mock_service_bus_client, max_attempts=3, max_error_length=20)
+        message = MagicMock(_lock_expired=False, application_properties={b'retry_attempt': 2})
+
+        topic._settle_message(message, {'success': False, 'error': 'Traceback ... ValueError: bad input'})
+
+        topic.publisher.send_messages.assert_not_called()
+        topic.receiver.dead_letter_message.assert_called_once_with(
+            message, reason='MaxRetryAttemptsExceeded', error_description='...eError: bad input',
+        )
+        self.assertEqual(topic.stats()['outcomes']['dead_lettered'], 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_failed_retry_publish_falls_back_to_abandon(self, mock_service_bus_client, mock_scheduler_class):
+        topic = self._create_retry_topic(mock_service_bus_client)
+        topic.publisher.send_messages.side_effect = Exception('send failed')
+        message = MagicMock(_lock_expired=False, application_properties=None)
+        message.__str__.return_value = '{"message":"hello"}'
+
+        topic._settle_message(message, {'success': False, 'error': 'boom'})
+
+        topic.receiver.abandon_message.assert_called_once_with(message)
+        topic.receiver.complete_message.assert_not_called()
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_retry_copy_of_another_subscription_is_skipped(self, mock_service_bus_client, mock_scheduler_class):
+        mock_service_bus_client.from_connection_string.return_value = MagicMock()
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.receiver = MagicMock()
+        topic.subscription_name = 'mock-subscription'
+        topic._submit_processing_task = MagicMock()
+        own_retry = MagicMock(_lock_expired=False, locked_until_utc=None,
+                              application_properties={b'retry_subscription': b'mock-subscription'})
+        foreign_retry = MagicMock(_lock_expired=False, locked_until_utc=None,
+                                  application_properties={b'retry_subscription': b'other-subscription'})
+        topic.receive_ahead_buffer.extend([foreign_retry, own_retry])
+
+        topic._dispatch_buffered_messages(MagicMock())
+
+        topic.receiver.complete_message.assert_called_once_with(foreign_retry)
+        topic._submit_processing_task.assert_called_once()
+        self.assertIs(topic._submit_processing_task.call_args[0][0], own_retry)
+        self.assertEqual(topic.stats()['outcomes']['skipped'], 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_retry_copy_is_only_processed_by_the_subscription_that_failed(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        failing_topic = self._create_retry_topic(mock_service_bus_client)
+        other_topic = self._create_retry_topic(mock_service_bus_client)
+        other_topic.subscription_name = 'other-subscription'
+        message = MagicMock(_lock_expired=False, message_id='job-1', application_properties=None)
+        message.__str__.return_value = '{"message":"hello"}'
+        failing_topic._settle_message(message, {'success': False, 'error': 'boom'})
+        sent_copy = failing_topic.publisher.send_messages.call_args[0][0]
+        # Both subscriptions receive the copy when their rule filters are missing.
+        deliveries = {}
+        for topic in (failing_topic, other_topic):
+            delivered = MagicMock(_lock_expired=False, locked_until_utc=None, message_id=sent_copy.message_id,
+                                  application_properties={
+                                      key.encode(): value.encode() if isinstance(value, str) else value
+                                      for key, value in sent_copy.application_properties.items()
+                                  })
+            topic._submit_processing_task = MagicMock(return_value='task')
+            topic.receiver = MagicMock()
+            topic.receive_ahead_buffer.append(delivered)
+            topic._dispatch_buffered_messages(MagicMock())
+            deliveries[topic.subscription_name] = delivered
+
+        failing_topic._submit_processing_task.assert_called_once()
+        other_topic._submit_processing_task.assert_not_called()
+        other_topic.receiver.complete_message.assert_called_once_with(deliveries['other-subscription'])
+        self.assertEqual(other_topic.stats()['outcomes']['skipped'], 1)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_PROCESS_START_METHOD': 'forkserver'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn', 'forkserver'])
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_preload_modules_are_handed_to_fork_server(
+        self, mock_service_bus_client, mock_scheduler_class, mock_get_all_start_methods, mock_get_context,
+    ):
+        mock_process_context = MagicMock()
+        mock_process_context.Pipe.return_value = (MagicMock(), MagicMock())
+        mock_get_context.return_value = mock_process_context
+        initializer = MagicMock()
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           worker_initializer=initializer, preload_modules=['json', 'decimal'])
+        topic._submit_process_task('{"message":"hello"}', _successful_callback)
+
+        mock_process_context.set_forkserver_preload.assert_called_once_with(['json', 'decimal'])
+        _, kwargs = mock_process_context.Process.call_args
+        self.assertIs(kwargs['args'][3], initializer)
+        self.assertEqual(topic.callback_process_initializer.args, (('json', 'decimal'), initializer))
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_PROCESS_START_METHOD': 'fork'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.importlib.import_module')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_context')
+    @patch('src.python_ms_core.core.topic.azure_topic.mp.get_all_start_methods', return_value=['fork', 'spawn'])
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_preload_modules_are_imported_before_fork(
+        self, mock_service_bus_client, mock_scheduler_class, mock_get_all_start_methods, mock_get_context,
+        mock_import_module,
+    ):
+        mock_import_module.side_effect = [MagicMock(), ImportError('missing')]
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           preload_modules=['pandas', 'missing'])
+
+        self.assertEqual(mock_import_module.call_args_list, [call('pandas'), call('missing')])
+        self.assertIsNotNone(topic.callback_process_initializer)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_receive_and_delete_mode_skips_lock_renewal_and_settlement(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        messages = []
+        for body in ('{"message":"ok"}', '{"message":"fail"}'):
+            message = MagicMock(locked_until_utc=None)
+            message.__str__.return_value = body
+            messages.append(message)
+        mock_receiver.receive_messages.side_effect = [messages]
+
+        def callback(queue_message):
+            if queue_message.message == 'fail':
+                raise ValueError('bad telemetry')
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=2)
+
+        topic.subscribe('mock-subscription', callback, max_receivable_messages=2, receive_mode='receive_and_delete')
+
+        _, kwargs = mock_client.get_subscription_receiver.call_args
+        self.assertEqual(kwargs['receive_mode'], ServiceBusReceiveMode.RECEIVE_AND_DELETE)
+        mock_scheduler_class.return_value.register.assert_not_called()
+        mock_receiver.complete_message.assert_not_called()
+        mock_receiver.abandon_message.assert_not_called()
+        outcomes = topic.stats()['outcomes']
+        self.assertEqual(outcomes['completed'], 1)
+        self.assertEqual(outcomes['failed'], 1)
+        self.assertEqual(topic.internal_count, 0)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_rejects_unknown_receive_mode(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+
+        with self.assertRaises(ValueError):
+            topic.subscribe('mock-subscription', _successful_callback, receive_mode='peek')
+
+    @unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'process'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_large_body_reaches_process_through_shared_payload(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        body = '{"message":"' + 'x' * 4096 + '"}'
+        message = MagicMock(_lock_expired=False, locked_until_utc=None, body=[body.encode('utf-8')])
+        message.__str__.return_value = body
+        mock_receiver.receive_messages.side_effect = [[message]]
+        payload_directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, payload_directory)
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.enable_shared_payloads(min_size=1024, directory=payload_directory)
+
+        topic.subscribe('mock-subscription', _large_payload_callback, max_receivable_messages=1)
+
+        mock_receiver.complete_message.assert_called_once_with(message)
+        self.assertEqual(os.listdir(payload_directory), [])
+        self.assertEqual(topic.shared_payloads, {})
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_small_body_is_sent_to_process_as_string(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.enable_shared_payloads(min_size=1024)
+        message = MagicMock(body=[b'{"message":"hello"}'])
+        message.__str__.return_value = '{"message":"hello"}'
+
+        self.assertEqual(topic._get_process_payload(message), '{"message":"hello"}')
+        self.assertEqual(topic.shared_payloads, {})
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'pool'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.SharedPayload')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_unwritable_shared_payload_keeps_pool_execution(self, mock_service_bus_client, mock_scheduler_class,
+                                                            mock_shared_payload):
+        mock_shared_payload.side_effect = OSError(28, 'No space left on device')
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.enable_shared_payloads(min_size=8)
+        topic._submit_pool_task = MagicMock()
+        topic._submit_thread_task = MagicMock()
+        message = MagicMock(body=[b'{"message":"hello"}'])
+        message.__str__.return_value = '{"message":"hello"}'
+
+        topic._submit_processing_task(message, _successful_callback)
+
+        topic._submit_pool_task.assert_called_once_with('{"message":"hello"}', _successful_callback)
+        topic._submit_thread_task.assert_not_called()
+        self.assertEqual(topic.shared_payloads, {})
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_receive_failure_backs_off_and_keeps_receiver(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        message = MagicMock(_lock_expired=False, locked_until_utc=None)
+        message.__str__.return_value = '{"message":"hello"}'
+        mock_receiver.receive_messages.side_effect = [RuntimeError('boom'), [message]]
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.set_reconnect_policy(initial_delay=0.05, jitter=0)
+        started = time.monotonic()
+
+        topic.subscribe('mock-subscription', _successful_callback, max_receivable_messages=1)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        mock_client.get_subscription_receiver.assert_called_once()
+        mock_receiver.complete_message.assert_called_once_with(message)
+        receiver_stats = topic.stats()['receiver']
+        self.assertEqual(receiver_stats['failures'], 1)
+        self.assertEqual(receiver_stats['reconnects'], 0)
+        self.assertEqual(receiver_stats['state'], 'closed')
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_broken_link_is_rebuilt_and_in_flight_message_settled_by_its_receiver(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        first_receiver = MagicMock()
+        second_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.side_effect = [first_receiver, second_receiver]
+        messages = []
+        for body in ('{"message":"slow"}', '{"message":"hello"}'):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = body
+            messages.append(message)
+        first_receiver.receive_messages.side_effect = [[messages[0]], ServiceBusConnectionError(message='link detached')]
+        second_receiver.receive_messages.side_effect = [[messages[1]]]
+
+        def callback(queue_message):
+            if queue_message.message == 'slow':
+                time.sleep(0.2)
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=2)
+        topic.set_reconnect_policy(initial_delay=0.01, jitter=0)
+
+        topic.subscribe('mock-subscription', callback, max_receivable_messages=2)
+
+        first_receiver.complete_message.assert_called_once_with(messages[0])
+        second_receiver.complete_message.assert_called_once_with(messages[1])
+        first_receiver.close.assert_called_once()
+        second_receiver.close.assert_not_called()
+        self.assertEqual(topic.stats()['receiver']['reconnects'], 1)
+        self.assertEqual(topic.loop_state.message_receivers, {})
+
+    def _create_stoppable_receiver(self, mock_client, bodies):
+        mock_receiver = MagicMock()
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        messages = []
+        for body in bodies:
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = body
+            messages.append(message)
+        pending = list(messages)
+
+        def receive_messages(max_message_count, max_wait_time):
+            batch = pending[:max_message_count]
+            del pending[:len(batch)]
+            if not batch:
+                time.sleep(0.01)
+            return batch
+
+        mock_receiver.receive_messages.side_effect = receive_messages
+        return mock_receiver, messages
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_stop_finishes_in_flight_callback_and_abandons_buffered_messages(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, messages = self._create_stoppable_receiver(
+            mock_client, ['{"message":"first"}', '{"message":"second"}'],
+        )
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.wait_time_for_message = 0.01
+
+        def callback(queue_message):
+            topic.stop(drain_timeout=5)
+            time.sleep(0.1)
+
+        topic.subscribe('mock-subscription', callback, receive_ahead=1)
+
+        mock_receiver.complete_message.assert_called_once_with(messages[0])
+        mock_receiver.abandon_message.assert_called_once_with(messages[1])
+        mock_client.close.assert_called_once()
+        outcomes = topic.stats()['outcomes']
+        self.assertEqual(outcomes['completed'], 1)
+        self.assertEqual(outcomes['abandoned'], 1)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_stop_abandons_callbacks_running_past_drain_timeout(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, messages = self._create_stoppable_receiver(mock_client, ['{"message":"hello"}'])
+        release = threading.Event()
+        self.addCleanup(release.set)
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.wait_time_for_message = 0.01
+
+        def callback(queue_message):
+            topic.stop(drain_timeout=0.2, close=False)
+            release.wait(10)
+
+        started = time.monotonic()
+        topic.subscribe('mock-subscription', callback)
+
+        self.assertLess(time.monotonic() - started, 5)
+        mock_receiver.abandon_message.assert_called_once_with(messages[0])
+        mock_receiver.complete_message.assert_not_called()
+        mock_client.close.assert_not_called()
+        self.assertEqual(topic.stats()['outcomes']['abandoned'], 1)
+        self.assertEqual(topic.internal_count, 0)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_stop_interrupts_receive_backoff_with_callbacks_in_flight(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        mock_receiver = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.return_value = mock_receiver
+        message = MagicMock(_lock_expired=False, locked_until_utc=None)
+        message.__str__.return_value = '{"message":"hello"}'
+        mock_receiver.receive_messages.side_effect = [[message], RuntimeError('outage')]
+        release = threading.Event()
+        self.addCleanup(release.set)
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=2)
+        topic.set_reconnect_policy(initial_delay=15, jitter=0)
+        threading.Timer(0.5, topic.stop, kwargs={'drain_timeout': 0.5, 'close': False}).start()
+
+        started = time.monotonic()
+        topic.subscribe('mock-subscription', lambda queue_message: release.wait(30))
+
+        self.assertLess(time.monotonic() - started, 5)
+        mock_receiver.abandon_message.assert_called_once_with(message)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_again_after_stop_receives_messages(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, messages = self._create_stoppable_receiver(mock_client, ['{"message":"first"}'])
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.wait_time_for_message = 0.01
+
+        topic.subscribe('mock-subscription', lambda queue_message: topic.stop(drain_timeout=5, close=False))
+        second = MagicMock(_lock_expired=False, locked_until_utc=None)
+        second.__str__.return_value = '{"message":"second"}'
+        mock_receiver.receive_messages.side_effect = [[second]]
+        summary = topic.subscribe('mock-subscription', _successful_callback, max_receivable_messages=1)
+        third = MagicMock(_lock_expired=False, locked_until_utc=None)
+        third.__str__.return_value = '{"message":"third"}'
+        mock_receiver.receive_messages.side_effect = [[third]]
+        topic.stop(drain_timeout=5, close=False)
+        batch_summary = topic.subscribe_batch('mock-subscription', MagicMock(return_value=True), max_receivable_messages=1)
+
+        self.assertEqual((summary['exit_reason'], summary['completed']), ('max_receivable_messages', 1))
+        self.assertEqual((batch_summary['exit_reason'], batch_summary['completed']), ('max_receivable_messages', 1))
+        self.assertEqual(
+            mock_receiver.complete_message.call_args_list,
+            [call(messages[0]), call(second), call(third)],
+        )
+        self.assertFalse(topic.stopping)
+        self.assertIsNone(topic.drain_deadline)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.signal.signal')
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_termination_signal_stops_subscription(self, mock_service_bus_client, mock_scheduler_class, mock_signal):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+
+        topic.handle_termination_signals(drain_timeout=10)
+
+        signum, handler = mock_signal.call_args.args
+        self.assertEqual(signum, signal.SIGTERM)
+        self.assertFalse(topic.stopping)
+        handler(signum, None)
+        self.assertTrue(topic.stopping)
+        self.assertTrue(topic.close_on_stop)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_exit_when_idle_returns_summary_once_subscription_is_empty(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_receiver, messages = self._create_stoppable_receiver(
+            mock_client, ['{"message":"ok"}', '{"message":"fail"}', '{"message":"ok"}'],
+        )
+
+        def callback(queue_message):
+            if queue_message.message == 'fail':
+                raise ValueError('bad input')
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=3)
+
+        summary = topic.subscribe('mock-subscription', callback, exit_when_idle=0.2)
+
+        self.assertEqual(summary['exit_reason'], 'idle')
+        self.assertEqual(summary['subscription'], 'mock-subscription')
+        self.assertEqual(summary['received'], 3)
+        self.assertEqual(summary['completed'], 2)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(summary['outcomes']['abandoned'], 1)
+        self.assertEqual(summary['callback_duration']['count'], 3)
+        self.assertGreaterEqual(summary['duration'], 0.2)
+        self.assertEqual(mock_receiver.complete_message.call_count, 2)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_rejects_non_positive_idle_window(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+
+        with self.assertRaises(ValueError):
+            topic.subscribe('mock-subscription', _successful_callback, exit_when_idle=0)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_subscribe_sessions_processes_each_session_in_order(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        session_receivers = []
+        for session_id, count in (('dataset-a', 3), ('dataset-b', 2)):
+            receiver = MagicMock()
+            receiver.session.session_id = session_id
+            deliveries = []
+            for index in range(count):
+                message = MagicMock(_lock_expired=False, locked_until_utc=None, session_id=session_id)
+                message.__str__.return_value = f'{{"messageId":"{session_id}-{index}","message":"{session_id}"}}'
+                deliveries.append([message])
+            receiver.receive_messages.side_effect = deliveries + [[]]
+            session_receivers.append(receiver)
+        idle_receiver = MagicMock()
+
+        def no_session_available(**kwargs):
+            time.sleep(0.01)
+            raise OperationTimeoutError(message='no session available')
+
+        idle_receiver.__enter__.side_effect = no_session_available
+        mock_client.get_subscription_receiver.side_effect = session_receivers + [idle_receiver] * 100
+        processed = {'dataset-a': [], 'dataset-b': []}
+
+        def callback(queue_message):
+            time.sleep(0.02)
+            processed[queue_message.message].append(queue_message.messageId)
+
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=2)
+
+        summary = topic.subscribe_sessions('mock-subscription', callback, max_receivable_messages=5)
+
+        self.assertEqual(processed['dataset-a'], ['dataset-a-0', 'dataset-a-1', 'dataset-a-2'])
+        self.assertEqual(processed['dataset-b'], ['dataset-b-0', 'dataset-b-1'])
+        self.assertEqual(summary['completed'], 5)
+        _, kwargs = mock_client.get_subscription_receiver.call_args_list[0]
+        self.assertEqual(kwargs['session_id'], NEXT_AVAILABLE_SESSION)
+        scheduler = mock_scheduler_class.return_value
+        for receiver in session_receivers:
+            self.assertEqual(receiver.complete_message.call_count, len(processed[receiver.session.session_id]))
+            scheduler.register.assert_any_call(
+                receiver, receiver.session, max_lock_renewal_duration=topic.max_renewal_duration,
+                on_lock_renew_failure=topic._handle_lock_renew_failure,
+            )
+            scheduler.unregister.assert_any_call(receiver.session)
+            receiver.__exit__.assert_called_once()
+        idle_receiver.receive_messages.assert_not_called()
+        self.assertEqual(topic.internal_count, 0)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_sessions_never_take_more_slots_than_the_concurrency_limit(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        idle_receiver = MagicMock()
+
+        def no_session_available(**kwargs):
+            time.sleep(0.01)
+            raise OperationTimeoutError(message='no session available')
+
+        idle_receiver.__enter__.side_effect = no_session_available
+        mock_client.get_subscription_receiver.return_value = idle_receiver
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic',
+                           max_concurrent_messages=2)
+        threading.Timer(0.2, topic.stop, kwargs={'drain_timeout': 1, 'close': False}).start()
+
+        topic.subscribe_sessions('mock-subscription', _successful_callback, max_concurrent_sessions=8)
+
+        self.assertEqual(topic.max_concurrent_sessions, 2)
+
+        receiver = MagicMock()
+        topic.internal_count = 2
+        message = MagicMock(_lock_expired=False, locked_until_utc=None, session_id='dataset-a', application_properties={})
+        message.__str__.return_value = '{"message":"hello"}'
+        topic.stopping = False
+
+        def process_session_message():
+            topic.receiver = receiver
+            topic._process_session_message(message, _successful_callback)
+
+        session_thread = threading.Thread(target=process_session_message)
+        session_thread.start()
+        time.sleep(0.2)
+
+        self.assertTrue(session_thread.is_alive())
+        self.assertEqual(topic.internal_count, 2)
+        topic._release_slot()
+        session_thread.join(5)
+        self.assertFalse(session_thread.is_alive())
+        receiver.complete_message.assert_called_once_with(message)
+        self.assertEqual(topic.internal_count, 1)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_session_message_is_settled_under_the_session_lock(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.receiver = MagicMock()
+        topic.receiver.session.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=30)
+        message = ServiceBusReceivedMessage(
+            Message(data=[b'{"message":"hello"}'], properties=Properties(group_id=b'dataset-a')),
+            receiver=topic.receiver,
+        )
+        expired = ServiceBusReceivedMessage(
+            Message(data=[b'{"message":"late"}'], properties=Properties(group_id=b'dataset-a')),
+            receiver=topic.receiver,
+        )
+
+        topic._settle_message(message, {'success': True, 'error': None})
+        topic.receiver.session.locked_until_utc = datetime.now(timezone.utc) - timedelta(seconds=1)
+        topic._settle_message(expired, {'success': True, 'error': None})
+
+        topic.receiver.complete_message.assert_called_once_with(message)
+        outcomes = topic.stats()['outcomes']
+        self.assertEqual(outcomes['completed'], 1)
+        self.assertEqual(outcomes['lock_expired'], 1)
+        self.assertEqual(outcomes.get('settle_failed', 0), 0)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_failed_session_message_is_abandoned_instead_of_retried(self, mock_service_bus_client, mock_scheduler_class):
+        topic = AzureTopic(config=MagicMock(connection_string='Endpoint=sb://test/'), topic_name='mock-topic')
+        topic.enable_retry(max_attempts=5)
+        topic.receiver = MagicMock()
+        message = MagicMock(session_id='dataset-a', application_properties={})
+
+        outcome = topic._retry_failed_message(message, 'ValueError: bad input')
+
+        self.assertEqual(outcome, 'abandoned')
+        topic.receiver.abandon_message.assert_called_once_with(message)
+        topic.publisher.send_messages.assert_not_called()
+
+def _send_large_result(result_connection):
+    result_connection.send({'success': False, 'error': 'x' * 1024 * 1024})
+    result_connection.close()
+
+
+def _batch_callback_failing_last(messages):
+    return [True] * (len(messages) - 1) + [False]
+
+
+def _hanging_callback(message):
+    time.sleep(60)
+
+
+def _large_payload_callback(message):
+    if message.message != 'x' * 4096:
+        raise ValueError('payload was not received intact')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from src.python_ms_core.core.topic.batch_callback import run_batch_callback
+
+
+PAYLOADS = ['{"messageId":"a","message":"first"}', '{"messageId":"b","message":"second"}']
+
+
+class TestRunBatchCallback(unittest.TestCase):
+    def test_callback_receives_decoded_messages(self):
+        received = []
+
+        result = run_batch_callback(received.extend, PAYLOADS)
+
+        self.assertEqual([message.messageId for message in received], ['a', 'b'])
+        self.assertEqual(result, {'success': True, 'error': None, 'results': [True, True]})
+
+    def test_boolean_result_applies_to_every_message(self):
+        result = run_batch_callback(lambda messages: False, PAYLOADS)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['results'], [False, False])
+        self.assertIn('2 failed messages', result['error'])
+
+    def test_map_keyed_by_message_id(self):
+        result = run_batch_callback(lambda messages: {'a': True, 'b': False}, PAYLOADS)
+
+        self.assertEqual(result['results'], [True, False])
+
+    def test_map_keyed_by_position_and_missing_entries_fail(self):
+        result = run_batch_callback(lambda messages: {1: True}, ['{"message":"x"}', '{"message":"y"}'])
+
+        self.assertEqual(result['results'], [False, True])
+
+    def test_list_result_is_matched_by_position(self):
+        result = run_batch_callback(lambda messages: [False, True], PAYLOADS)
+
+        self.assertEqual(result['results'], [False, True])
+
+    def test_list_result_with_wrong_length_fails_batch(self):
+        result = run_batch_callback(lambda messages: [True], PAYLOADS)
+
+        self.assertEqual(result['results'], [False, False])
+        self.assertIn('returned 1 results for 2 messages', result['error'])
+
+    def test_exception_fails_every_message(self):
+        def callback(messages):
+            raise ValueError('database down')
+
+        result = run_batch_callback(callback, PAYLOADS)
+
+        self.assertEqual(result['results'], [False, False])
+        self.assertIn('ValueError: database down', result['error'])
+
+    def test_undecodable_payload_is_failed_and_not_delivered(self):
+        received = []
+
+        result = run_batch_callback(received.extend, ['not json', PAYLOADS[1]])
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(result['results'], [False, True])
+        self.assertIn('message 0 could not be decoded', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
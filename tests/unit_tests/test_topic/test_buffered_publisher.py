@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from azure.servicebus.exceptions import MessageSizeExceededError
+
+from src.python_ms_core.core.topic.buffered_publisher import BufferedPublisher
+from src.python_ms_core.core.resource_errors.errors import TooManyRequestError, TimeOutError
+
+
+class FakeBatch:
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.messages = []
+
+    def add_message(self, message):
+        if len(self.messages) >= self.capacity:
+            raise MessageSizeExceededError(message='batch full')
+        self.messages.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class TestBufferedPublisher(unittest.TestCase):
+
+    def setUp(self):
+        self.sender = MagicMock()
+        self.sent_batches = []
+        self.sender.create_message_batch.side_effect = lambda: FakeBatch()
+        self.sender.send_messages.side_effect = lambda batch: self.sent_batches.append(len(batch))
+        self.publisher = None
+
+    def tearDown(self):
+        if self.publisher is not None:
+            self.publisher.close(timeout=5)
+
+    def test_sends_batch_when_message_count_is_reached(self):
+        self.publisher = BufferedPublisher(self.sender, max_batch_messages=3, linger_time=60)
+
+        for index in range(3):
+            self.publisher.publish(f'message-{index}')
+
+        self.assertTrue(self.publisher.flush(timeout=5))
+        self.assertEqual(self.sent_batches, [3])
+        self.assertEqual(self.publisher.sent_messages, 3)
+
+    def test_sends_partial_batch_after_linger_time(self):
+        self.publisher = BufferedPublisher(self.sender, max_batch_messages=100, linger_time=0.05)
+
+        self.publisher.publish('message')
+        deadline = time.monotonic() + 5
+        while not self.sent_batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.sent_batches, [1])
+
+    def test_sends_batch_when_byte_size_is_reached(self):
+        self.publisher = BufferedPublisher(self.sender, max_batch_messages=100, max_batch_bytes=10, linger_time=60)
+
+        self.publisher.publish('x' * 10)
+
+        deadline = time.monotonic() + 5
+        while not self.sent_batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.sent_batches, [1])
+
+    def test_raises_when_buffer_is_full_and_blocking_is_disabled(self):
+        release = threading.Event()
+        self.sender.send_messages.side_effect = lambda batch: release.wait(5)
+        self.publisher = BufferedPublisher(self.sender, max_buffer_size=1, max_batch_messages=1, block_when_full=False)
+
+        self.publisher.publish('in-flight')
+        deadline = time.monotonic() + 5
+        while self.publisher._in_flight == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.publisher.publish('buffered')
+
+        with self.assertRaises(TooManyRequestError):
+            self.publisher.publish('rejected')
+        release.set()
+
+    def test_blocking_publish_times_out_when_buffer_stays_full(self):
+        release = threading.Event()
+        self.sender.send_messages.side_effect = lambda batch: release.wait(5)
+        self.publisher = BufferedPublisher(self.sender, max_buffer_size=1, max_batch_messages=1, block_timeout=0.05)
+
+        self.publisher.publish('in-flight')
+        deadline = time.monotonic() + 5
+        while self.publisher._in_flight == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.publisher.publish('buffered')
+
+        with self.assertRaises(TimeOutError):
+            self.publisher.publish('blocked')
+        release.set()
+
+    def test_close_drains_buffer(self):
+        self.publisher = BufferedPublisher(self.sender, max_batch_messages=100, linger_time=60)
+        self.publisher.publish('message-1')
+        self.publisher.publish('message-2')
+
+        self.publisher.close(timeout=5)
+
+        self.assertEqual(self.sent_batches, [2])
+        with self.assertRaises(RuntimeError):
+            self.publisher.publish('late')
+
+    def test_send_failure_is_counted(self):
+        self.sender.send_messages.side_effect = Exception('send failed')
+        self.publisher = BufferedPublisher(self.sender, max_batch_messages=2, linger_time=60)
+
+        self.publisher.publish('message-1')
+        self.publisher.publish('message-2')
+        self.publisher.flush(timeout=5)
+
+        self.assertEqual(self.publisher.failed_messages, 2)
+        self.assertEqual(str(self.publisher.last_error), 'send failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
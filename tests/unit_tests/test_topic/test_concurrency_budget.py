@@ -0,0 +1,62 @@
+import unittest
+from src.python_ms_core.core.topic.concurrency_budget import WeightedConcurrencyBudget
+
+
+class TestWeightedConcurrencyBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = WeightedConcurrencyBudget(max_concurrent_messages=6)
+        self.budget.add('orders', weight=2)
+        self.budget.add('audit', weight=1)
+
+    def _acquire(self, name, count):
+        return sum(1 for _ in range(count) if self.budget.acquire(name))
+
+    def test_shares_are_split_by_weight(self):
+        subscriptions = self.budget.stats()['subscriptions']
+
+        self.assertEqual(subscriptions['orders']['share'], 4)
+        self.assertEqual(subscriptions['audit']['share'], 2)
+
+    def test_idle_subscription_lends_its_share(self):
+        self.budget.record_receive('audit', 0)
+
+        self.assertEqual(self.budget.available('orders'), 6)
+        self.assertEqual(self._acquire('orders', 10), 6)
+        self.assertEqual(self.budget.stats()['in_flight'], 6)
+
+    def test_busy_subscription_keeps_its_share(self):
+        self.budget.record_receive('audit', 1)
+
+        self.assertEqual(self._acquire('orders', 10), 4)
+        self.assertEqual(self._acquire('audit', 10), 2)
+
+    def test_waiting_subscription_gets_slots_back_from_borrower(self):
+        self.assertEqual(self._acquire('orders', 6), 6)
+        self.assertEqual(self.budget.available('audit'), 0)
+
+        self.budget.release('orders')
+
+        self.assertFalse(self.budget.acquire('orders'))
+        self.assertTrue(self.budget.acquire('audit'))
+
+    def test_quota_caps_subscription(self):
+        budget = WeightedConcurrencyBudget(max_concurrent_messages=10)
+        budget.add('reports', quota=2)
+
+        self.assertEqual(budget.available('reports'), 2)
+        self.assertTrue(budget.acquire('reports'))
+        self.assertTrue(budget.acquire('reports'))
+        self.assertFalse(budget.acquire('reports'))
+        self.assertTrue(budget.acquire('reports', force=True))
+
+    def test_invalid_arguments_raise(self):
+        with self.assertRaises(ValueError):
+            WeightedConcurrencyBudget(max_concurrent_messages=0)
+        with self.assertRaises(ValueError):
+            self.budget.add('orders')
+        with self.assertRaises(ValueError):
+            self.budget.add('other', weight=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+from src.python_ms_core.core.topic.concurrency_controller import AdaptiveConcurrencyController
+
+
+def _controller(**options):
+    defaults = {
+        'min_concurrency': 1,
+        'max_concurrency': 8,
+        'initial_concurrency': 4,
+        'adjust_interval': 0,
+        'usage_sampler': lambda: {'cpu_percent': 10, 'rss': 100},
+    }
+    defaults.update(options)
+    return AdaptiveConcurrencyController(**defaults)
+
+
+class TestAdaptiveConcurrencyController(unittest.TestCase):
+    def test_increases_additively_when_window_is_saturated(self):
+        controller = _controller()
+        controller.record(0.1, True)
+
+        self.assertEqual(controller.update(in_flight=4), 5)
+        self.assertEqual(controller.adjustments, 1)
+
+    def test_does_not_increase_when_window_is_not_used(self):
+        controller = _controller()
+        controller.record(0.1, True)
+
+        self.assertEqual(controller.update(in_flight=2), 4)
+
+    def test_does_not_increase_without_completed_callbacks(self):
+        controller = _controller()
+
+        self.assertEqual(controller.update(in_flight=4), 4)
+
+    def test_decreases_multiplicatively_on_error_rate(self):
+        controller = _controller(max_error_rate=0.2)
+        controller.record(0.1, True)
+        controller.record(0.1, False)
+
+        self.assertEqual(controller.update(in_flight=4), 2)
+
+    def test_decreases_when_latency_is_above_target(self):
+        controller = _controller(target_latency=1)
+        controller.record(3, True)
+
+        self.assertEqual(controller.update(in_flight=4), 2)
+
+    def test_decreases_on_cpu_and_rss_pressure(self):
+        cpu_bound = _controller(max_cpu_percent=80, usage_sampler=lambda: {'cpu_percent': 95, 'rss': 0})
+        memory_bound = _controller(max_rss_bytes=50)
+
+        self.assertEqual(cpu_bound.update(in_flight=0), 2)
+        self.assertEqual(memory_bound.update(in_flight=0), 2)
+
+    def test_limit_stays_within_bounds(self):
+        controller = _controller(min_concurrency=2, max_concurrency=5, initial_concurrency=5, max_rss_bytes=50)
+        for _ in range(5):
+            controller.update(in_flight=5)
+        self.assertEqual(controller.limit, 2)
+
+        controller.max_rss_bytes = None
+        for _ in range(10):
+            controller.record(0.1, True)
+            controller.update(in_flight=controller.limit)
+        self.assertEqual(controller.limit, 5)
+
+    def test_waits_for_adjust_interval(self):
+        controller = _controller(adjust_interval=60)
+        controller.record(0.1, True)
+
+        self.assertEqual(controller.update(in_flight=4), 4)
+        self.assertEqual(controller.stats()['window_completed'], 1)
+
+    @patch('src.python_ms_core.core.topic.concurrency_controller.logger')
+    def test_logs_every_adjustment(self, mock_logger):
+        controller = _controller(target_latency=1)
+        controller.record(3, True)
+
+        controller.update(in_flight=4)
+
+        mock_logger.info.assert_called_once()
+        self.assertIn('4 -> 2', mock_logger.info.call_args[0][0])
+        self.assertIn('latency above 1s', mock_logger.info.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
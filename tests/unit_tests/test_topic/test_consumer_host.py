@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.python_ms_core.core.topic.consumer_host import TopicConsumerHost, run_routed_callback
+
+
+def _failing_callback(message):
+    raise ValueError('bad message')
+
+
+class TestTopicConsumerHost(unittest.TestCase):
+    def _create_receiver(self, message_count):
+        messages = []
+        for _ in range(message_count):
+            message = MagicMock(_lock_expired=False, locked_until_utc=None)
+            message.__str__.return_value = '{"message":"hello"}'
+            messages.append(message)
+        receiver = MagicMock()
+
+        def receive_messages(max_message_count, max_wait_time):
+            batch = messages[:max_message_count]
+            del messages[:len(batch)]
+            if not batch:
+                time.sleep(0.01)
+            return batch
+
+        receiver.receive_messages.side_effect = receive_messages
+        return receiver
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_run_consumes_every_registration_with_shared_client_and_executor(
+        self, mock_service_bus_client, mock_scheduler_class,
+    ):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        receivers = {'orders': self._create_receiver(3), 'audit': self._create_receiver(2)}
+        mock_client.get_subscription_receiver.side_effect = lambda **kwargs: receivers[kwargs['subscription_name']]
+        handled = {'orders': 0, 'audit': 0}
+
+        host = TopicConsumerHost(config=MagicMock(connection_string='Endpoint=sb://test/'), max_concurrent_messages=3)
+        orders_topic = host.register(
+            'orders-topic', 'orders', lambda message: handled.__setitem__('orders', handled['orders'] + 1),
+            weight=2, max_receivable_messages=3,
+        )
+        audit_topic = host.register(
+            'audit-topic', 'audit', lambda message: handled.__setitem__('audit', handled['audit'] + 1),
+            max_concurrent_messages=1, max_receivable_messages=2,
+        )
+        for topic in (orders_topic, audit_topic):
+            topic.wait_time_for_message = 0.01
+
+        host.run()
+
+        self.assertEqual(handled, {'orders': 3, 'audit': 2})
+        self.assertEqual(receivers['orders'].complete_message.call_count, 3)
+        self.assertEqual(receivers['audit'].complete_message.call_count, 2)
+        mock_service_bus_client.from_connection_string.assert_called_once()
+        mock_scheduler_class.assert_called_once()
+        self.assertIs(orders_topic.executor, audit_topic.executor)
+        stats = host.stats()
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['subscriptions']['audit-topic/audit']['quota'], 1)
+        self.assertEqual(stats['subscriptions']['orders-topic/orders']['stats']['outcomes']['completed'], 3)
+
+        host.close()
+
+        mock_client.close.assert_called_once()
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_register_rejects_duplicate_subscription(self, mock_service_bus_client, mock_scheduler_class):
+        host = TopicConsumerHost(config=MagicMock(connection_string='Endpoint=sb://test/'), max_concurrent_messages=2)
+        host.register('orders-topic', 'orders', _failing_callback)
+
+        with self.assertRaises(ValueError):
+            host.register('orders-topic', 'orders', _failing_callback)
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_stop_ends_run_and_closes_shared_connections(self, mock_service_bus_client, mock_scheduler_class):
+        mock_client = MagicMock()
+        mock_service_bus_client.from_connection_string.return_value = mock_client
+        mock_client.get_subscription_receiver.side_effect = lambda **kwargs: self._create_receiver(0)
+        host = TopicConsumerHost(config=MagicMock(connection_string='Endpoint=sb://test/'), max_concurrent_messages=2)
+        for subscription in ('orders', 'audit'):
+            host.register(f'{subscription}-topic', subscription, _failing_callback).wait_time_for_message = 0.01
+        run_thread = threading.Thread(target=host.run, daemon=True)
+        run_thread.start()
+
+        host.stop(drain_timeout=1)
+        run_thread.join(5)
+
+        self.assertFalse(run_thread.is_alive())
+        self.assertTrue(all(topic.stopping and not topic.close_on_stop for topic in host.topics.values()))
+        mock_client.close.assert_called_once()
+
+    @patch.dict(os.environ, {'TOPIC_CALLBACK_EXECUTION_MODE': 'thread'}, clear=True)
+    @patch('src.python_ms_core.core.topic.azure_topic.LockRenewalScheduler')
+    @patch('src.python_ms_core.core.topic.azure_topic.ServiceBusClient')
+    def test_registered_topics_never_shut_down_the_host_executor(self, mock_service_bus_client, mock_scheduler_class):
+        host = TopicConsumerHost(config=MagicMock(connection_string='Endpoint=sb://test/'), max_concurrent_messages=2)
+        orders_topic = host.register('orders-topic', 'orders', _failing_callback)
+        host.register('audit-topic', 'audit', _failing_callback)
+
+        orders_topic.enable_adaptive_concurrency(max_concurrent_messages=8)
+        orders_topic.close()
+
+        self.assertFalse(orders_topic.owns_executor)
+        self.assertIs(orders_topic.executor, host.executor)
+        self.assertEqual(host.executor.submit(lambda: 'still running').result(timeout=5), 'still running')
+        host.close()
+
+    def test_run_without_registrations_raises(self):
+        host = TopicConsumerHost(config=MagicMock(connection_string='Endpoint=sb://test/'))
+
+        with self.assertRaises(ValueError):
+            host.run()
+
+    def test_run_routed_callback_invokes_callback_of_registration(self):
+        callback = MagicMock()
+
+        result = run_routed_callback({'orders-topic/orders': callback}, ('orders-topic/orders', '{"message":"hello"}'))
+
+        self.assertEqual(result, {'success': True, 'error': None})
+        self.assertEqual(callback.call_args[0][0].message, 'hello')
+
+    def test_run_routed_callback_reports_callback_error(self):
+        result = run_routed_callback({'audit': _failing_callback}, ('audit', '{"message":"hello"}'))
+
+        self.assertFalse(result['success'])
+        self.assertIn('bad message', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
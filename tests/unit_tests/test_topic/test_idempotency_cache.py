@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.python_ms_core.core.topic.idempotency_cache import IdempotencyCache, SqliteIdempotencyBackend
+
+
+class TestIdempotencyCache(unittest.TestCase):
+    def test_remembers_completed_ids(self):
+        cache = IdempotencyCache()
+
+        self.assertFalse(cache.is_completed('a'))
+        cache.mark_completed('a')
+
+        self.assertTrue(cache.is_completed('a'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_evicts_least_recently_used_id(self):
+        cache = IdempotencyCache(max_entries=2)
+        cache.mark_completed('a')
+        cache.mark_completed('b')
+        cache.is_completed('a')
+
+        cache.mark_completed('c')
+
+        self.assertTrue(cache.is_completed('a'))
+        self.assertFalse(cache.is_completed('b'))
+        self.assertTrue(cache.is_completed('c'))
+
+    @patch('src.python_ms_core.core.topic.idempotency_cache.time.time')
+    def test_ids_expire_after_ttl(self, mock_time):
+        mock_time.return_value = 1000
+        cache = IdempotencyCache(ttl=60)
+        cache.mark_completed('a')
+
+        mock_time.return_value = 1061
+
+        self.assertFalse(cache.is_completed('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_backend_hit_is_copied_into_memory(self):
+        backend = MagicMock()
+        backend.contains.return_value = True
+        cache = IdempotencyCache(backend=backend)
+
+        self.assertTrue(cache.is_completed('a'))
+        self.assertTrue(cache.is_completed('a'))
+
+        backend.contains.assert_called_once_with('a')
+
+    def test_backend_errors_are_treated_as_miss(self):
+        backend = MagicMock()
+        backend.contains.side_effect = Exception('disk error')
+        backend.add.side_effect = Exception('disk error')
+        cache = IdempotencyCache(backend=backend)
+
+        cache.mark_completed('a')
+
+        self.assertFalse(cache.is_completed('b'))
+        self.assertTrue(cache.is_completed('a'))
+
+    def test_empty_ids_are_ignored(self):
+        cache = IdempotencyCache()
+        cache.mark_completed(None)
+
+        self.assertFalse(cache.is_completed(None))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_invalid_arguments_raise(self):
+        with self.assertRaises(ValueError):
+            IdempotencyCache(max_entries=0)
+        with self.assertRaises(ValueError):
+            IdempotencyCache(ttl=0)
+
+
+class TestSqliteIdempotencyBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'dedup', 'completed.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_completed_ids_survive_restart(self):
+        cache = IdempotencyCache(backend=SqliteIdempotencyBackend(self.path))
+        cache.mark_completed('a')
+        cache.close()
+
+        restarted = IdempotencyCache(backend=SqliteIdempotencyBackend(self.path))
+
+        self.assertTrue(restarted.is_completed('a'))
+        self.assertFalse(restarted.is_completed('b'))
+        restarted.close()
+
+    @patch('src.python_ms_core.core.topic.idempotency_cache.time.time')
+    def test_expired_ids_are_ignored_and_purged(self, mock_time):
+        mock_time.return_value = 1000
+        backend = SqliteIdempotencyBackend(self.path, purge_interval=0)
+        backend.add('a', expires_at=1010)
+
+        mock_time.return_value = 1020
+        self.assertFalse(backend.contains('a'))
+        backend.add('b', expires_at=2000)
+
+        rows = backend._connection.execute('SELECT message_id FROM completed_messages').fetchall()
+        self.assertEqual(rows, [('b',)])
+        backend.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
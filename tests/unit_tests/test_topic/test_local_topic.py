@@ -50,6 +50,20 @@ class TestLocalTopic(unittest.TestCase):
                 self.assertEqual(local_topic.connection, mock_connection)
                 self.assertEqual(local_topic.channel, mock_channel)
 
+    def test_publish_many(self):
+        mock_connection = MagicMock()
+        mock_channel = MagicMock()
+
+        with patch('pika.BlockingConnection') as mock_blocking_connection:
+            mock_blocking_connection.return_value = mock_connection
+            mock_connection.channel.return_value = mock_channel
+            local_topic = LocalTopic(config=self.mock_config, topic_name='mock_topic')
+
+            results = local_topic.publish_many(messages=[MagicMock(), MagicMock()])
+
+            self.assertEqual(results, [{'batch': 0, 'message_count': 2, 'success': True, 'error': None}])
+            self.assertEqual(mock_channel.basic_publish.call_count, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
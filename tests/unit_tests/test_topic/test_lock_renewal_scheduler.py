@@ -0,0 +1,140 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from azure.servicebus import ServiceBusSession
+from azure.servicebus.exceptions import AutoLockRenewFailed, AutoLockRenewTimeout
+from src.python_ms_core.core.topic.lock_renewal_scheduler import LockRenewalScheduler
+
+
+class FakeMessage:
+    def __init__(self, lock_seconds, lock_token='token'):
+        self.message_id = lock_token
+        self.lock_token = lock_token
+        self.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=lock_seconds)
+        self._lock_expired = False
+        self._settled = False
+
+
+def _wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestLockRenewalScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = LockRenewalScheduler(renew_margin=60, renew_timeout=5, retry_interval=0.05)
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def test_renews_lock_before_it_expires(self):
+        message = FakeMessage(lock_seconds=0.2)
+        receiver = MagicMock(spec=['renew_message_lock'])
+
+        def renew(renewable, timeout=None):
+            renewable.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        receiver.renew_message_lock.side_effect = renew
+
+        self.scheduler.register(receiver, message)
+
+        self.assertTrue(_wait_until(lambda: self.scheduler.stats()['renewals'] == 1))
+        receiver.renew_message_lock.assert_called_once_with(message, timeout=5)
+        self.assertGreater(message.locked_until_utc, datetime.now(timezone.utc) + timedelta(seconds=20))
+        stats = self.scheduler.stats()
+        self.assertEqual(stats['outstanding_locks'], 1)
+        self.assertEqual(stats['renewals_in_progress'], 0)
+        self.assertGreaterEqual(stats['max_renewal_lag'], 0)
+        self.assertEqual(self.scheduler.unregister(message), 1)
+
+    def test_renews_session_lock_through_the_session(self):
+        receiver = MagicMock(spec=['renew_message_lock'])
+        session = MagicMock(spec=ServiceBusSession)
+        session.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+
+        def renew(timeout=None):
+            session.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        session.renew_lock.side_effect = renew
+
+        self.scheduler.register(receiver, session)
+
+        self.assertTrue(_wait_until(lambda: self.scheduler.stats()['renewals'] == 1))
+        session.renew_lock.assert_called_once_with(timeout=5)
+        receiver.renew_message_lock.assert_not_called()
+        self.assertEqual(self.scheduler.unregister(session), 1)
+
+    def test_slow_renewal_does_not_hold_up_other_locks(self):
+        release = threading.Event()
+        slow_receiver = MagicMock(spec=['renew_message_lock'])
+        slow_receiver.renew_message_lock.side_effect = lambda message, timeout=None: release.wait(5)
+        fast_receiver = MagicMock(spec=['renew_message_lock'])
+
+        def renew(renewable, timeout=None):
+            renewable.locked_until_utc = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        fast_receiver.renew_message_lock.side_effect = renew
+        slow_message = FakeMessage(lock_seconds=0.1, lock_token='slow')
+        fast_message = FakeMessage(lock_seconds=0.2, lock_token='fast')
+
+        try:
+            self.scheduler.register(slow_receiver, slow_message)
+            self.scheduler.register(fast_receiver, fast_message)
+
+            self.assertTrue(_wait_until(lambda: fast_receiver.renew_message_lock.call_count == 1))
+            self.assertEqual(self.scheduler.stats()['renewals_in_progress'], 1)
+        finally:
+            release.set()
+
+    def test_reports_failure_when_lock_has_expired(self):
+        message = FakeMessage(lock_seconds=0)
+        message._lock_expired = True
+        receiver = MagicMock(spec=['renew_message_lock'])
+        receiver.renew_message_lock.side_effect = Exception('lock lost')
+        on_failure = MagicMock()
+
+        self.scheduler.register(receiver, message, on_lock_renew_failure=on_failure)
+
+        self.assertTrue(_wait_until(lambda: on_failure.call_count == 1))
+        renewable, error = on_failure.call_args[0]
+        self.assertIs(renewable, message)
+        self.assertIsInstance(error, AutoLockRenewFailed)
+        self.assertIs(message.auto_renew_error, error)
+        self.assertEqual(self.scheduler.stats()['outstanding_locks'], 0)
+
+    def test_reports_timeout_after_max_renewal_duration(self):
+        message = FakeMessage(lock_seconds=0)
+        receiver = MagicMock(spec=['renew_message_lock'])
+        on_failure = MagicMock()
+
+        self.scheduler.register(receiver, message, max_lock_renewal_duration=0.01, on_lock_renew_failure=on_failure)
+
+        self.assertTrue(_wait_until(lambda: on_failure.call_count == 1))
+        self.assertIsInstance(on_failure.call_args[0][1], AutoLockRenewTimeout)
+
+    def test_unregister_stops_renewal(self):
+        message = FakeMessage(lock_seconds=0.2)
+        receiver = MagicMock(spec=['renew_message_lock'])
+
+        self.scheduler.register(receiver, message)
+        self.scheduler.unregister(message)
+        time.sleep(0.3)
+
+        receiver.renew_message_lock.assert_not_called()
+        self.assertEqual(self.scheduler.stats()['outstanding_locks'], 0)
+
+    def test_register_after_close_raises(self):
+        self.scheduler.close()
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.register(MagicMock(), FakeMessage(lock_seconds=30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from azure.servicebus.exceptions import MessageSizeExceededError
+
+from src.python_ms_core.core.topic.message_batches import send_in_batches, send_in_batches_async
+
+
+class FakeBatch:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.messages = []
+
+    def add_message(self, message):
+        if message == 'oversized' or len(self.messages) >= self.capacity:
+            raise MessageSizeExceededError(message='batch full')
+        self.messages.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class TestMessageBatches(unittest.TestCase):
+    def setUp(self):
+        self.sender = MagicMock()
+        self.sender.create_message_batch.side_effect = lambda: FakeBatch(capacity=2)
+
+    def test_fills_each_batch_before_sending_it(self):
+        results = send_in_batches(self.sender, ['one', 'two', 'three'])
+
+        self.assertEqual([result['message_count'] for result in results], [2, 1])
+        self.assertEqual([call[0][0].messages for call in self.sender.send_messages.call_args_list],
+                         [['one', 'two'], ['three']])
+
+    def test_rejects_message_larger_than_an_empty_batch(self):
+        results = send_in_batches(self.sender, ['one', 'oversized', 'two'])
+
+        self.assertEqual(results[0], {'batch': 0, 'message_count': 1, 'success': True, 'error': None})
+        self.assertEqual(results[1]['batch'], 1)
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(results[2], {'batch': 2, 'message_count': 1, 'success': True, 'error': None})
+
+    def test_reports_failed_send_and_continues(self):
+        self.sender.send_messages.side_effect = [Exception('send failed'), None]
+
+        results = send_in_batches(self.sender, ['one', 'two', 'three'])
+
+        self.assertEqual(results[0], {'batch': 0, 'message_count': 2, 'success': False, 'error': 'send failed'})
+        self.assertTrue(results[1]['success'])
+
+    def test_keeps_results_when_creating_a_batch_fails(self):
+        self.sender.create_message_batch.side_effect = [FakeBatch(capacity=1), Exception('link lost')]
+        results = []
+
+        with self.assertRaises(Exception):
+            send_in_batches(self.sender, ['one', 'two'], results)
+
+        self.assertEqual(results, [{'batch': 0, 'message_count': 1, 'success': True, 'error': None}])
+
+    def test_async_sender_is_driven_the_same_way(self):
+        sender = MagicMock()
+        sender.create_message_batch = AsyncMock(side_effect=lambda: FakeBatch(capacity=2))
+        sender.send_messages = AsyncMock()
+
+        results = asyncio.run(send_in_batches_async(sender, ['one', 'two', 'three']))
+
+        self.assertEqual([result['message_count'] for result in results], [2, 1])
+        self.assertEqual(sender.send_messages.await_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
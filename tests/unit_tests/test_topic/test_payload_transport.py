@@ -0,0 +1,49 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.python_ms_core.core.topic.payload_transport import SharedPayload, get_body_sections, load_payload
+
+
+class TestSharedPayload(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, self.directory)
+
+    def test_round_trips_body_sections(self):
+        shared_payload = SharedPayload([b'{"message":', '"héllo"}'.encode('utf-8')], directory=self.directory)
+        handle = pickle.loads(pickle.dumps(shared_payload.handle))
+
+        self.assertEqual(load_payload(handle), {'message': 'héllo'})
+
+        shared_payload.release()
+        shared_payload.release()
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertIsNone(shared_payload.handle)
+
+    def test_empty_body(self):
+        shared_payload = SharedPayload([b''], directory=self.directory)
+
+        self.assertEqual(load_payload(shared_payload.handle), '')
+        shared_payload.release()
+
+    def test_string_payload_is_returned_unchanged(self):
+        self.assertEqual(load_payload('{"message":"hello"}'), '{"message":"hello"}')
+
+
+class TestGetBodySections(unittest.TestCase):
+    def test_returns_bytes_sections(self):
+        self.assertEqual(get_body_sections(MagicMock(body=b'abc')), [b'abc'])
+        self.assertEqual(get_body_sections(MagicMock(body=iter([b'a', b'b']))), [b'a', b'b'])
+
+    def test_returns_none_without_bytes_body(self):
+        self.assertIsNone(get_body_sections(MagicMock(body='abc')))
+        self.assertIsNone(get_body_sections(MagicMock(body=None)))
+        self.assertIsNone(get_body_sections(MagicMock(body=[{'a': 1}])))
+        self.assertIsNone(get_body_sections(MagicMock()))
+
+
+if __name__ == '__main__':
+    unittest.main()
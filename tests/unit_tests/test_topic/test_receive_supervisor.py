@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+from azure.servicebus.exceptions import ServiceBusConnectionError
+
+from src.python_ms_core.core.topic.receive_supervisor import ReceiveSupervisor
+
+
+class TestReceiveSupervisor(unittest.TestCase):
+    def test_backs_off_exponentially_up_to_max_delay(self):
+        supervisor = ReceiveSupervisor(initial_delay=1, max_delay=5, multiplier=2, jitter=0, failure_threshold=10)
+
+        delays = [supervisor.record_failure(RuntimeError('boom')) for _ in range(4)]
+
+        self.assertEqual(delays, [1, 2, 4, 5])
+        self.assertEqual(supervisor.stats()['consecutive_failures'], 4)
+
+    def test_success_resets_backoff(self):
+        supervisor = ReceiveSupervisor(initial_delay=1, jitter=0)
+        supervisor.record_failure(RuntimeError('boom'))
+        supervisor.record_failure(RuntimeError('boom'))
+
+        supervisor.record_success()
+
+        self.assertEqual(supervisor.record_failure(RuntimeError('boom')), 1)
+
+    @patch('src.python_ms_core.core.topic.receive_supervisor.time.monotonic')
+    def test_circuit_opens_half_opens_and_closes(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        supervisor = ReceiveSupervisor(initial_delay=1, jitter=0, failure_threshold=2, reset_timeout=30)
+        supervisor.record_failure(RuntimeError('boom'))
+        self.assertEqual(supervisor.state, 'closed')
+
+        delay = supervisor.record_failure(RuntimeError('boom'))
+
+        self.assertEqual(supervisor.state, 'open')
+        self.assertEqual(delay, 30)
+        supervisor.before_attempt()
+        self.assertEqual(supervisor.state, 'open')
+        mock_monotonic.return_value = 130.0
+        supervisor.before_attempt()
+        self.assertEqual(supervisor.state, 'half_open')
+        supervisor.record_failure(RuntimeError('boom'))
+        self.assertEqual(supervisor.state, 'open')
+        self.assertEqual(supervisor.stats()['circuit_opened'], 2)
+        mock_monotonic.return_value = 160.0
+        supervisor.before_attempt()
+        supervisor.record_success()
+        self.assertEqual(supervisor.state, 'closed')
+
+    def test_rebuilds_after_connection_errors_and_open_circuit(self):
+        supervisor = ReceiveSupervisor(failure_threshold=2)
+
+        self.assertTrue(supervisor.should_rebuild(ServiceBusConnectionError(message='link detached')))
+        supervisor.record_failure(RuntimeError('boom'))
+        self.assertFalse(supervisor.should_rebuild(RuntimeError('boom')))
+        supervisor.record_failure(RuntimeError('boom'))
+        self.assertTrue(supervisor.should_rebuild(RuntimeError('boom')))
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ReceiveSupervisor(initial_delay=0)
+        with self.assertRaises(ValueError):
+            ReceiveSupervisor(failure_threshold=0)
+        with self.assertRaises(ValueError):
+            ReceiveSupervisor(jitter=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+
+from src.python_ms_core.core.topic.retry_policy import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_grows_exponentially_up_to_max_delay(self):
+        policy = RetryPolicy(initial_delay=10, max_delay=60, multiplier=2, jitter=0)
+
+        self.assertEqual([policy.get_delay(attempt) for attempt in range(1, 6)], [10, 20, 40, 60, 60])
+
+    @patch('src.python_ms_core.core.topic.retry_policy.random.uniform', return_value=1.2)
+    def test_jitter_scales_delay(self, mock_uniform):
+        policy = RetryPolicy(initial_delay=10, jitter=0.2)
+
+        self.assertAlmostEqual(policy.get_delay(1), 12)
+        mock_uniform.assert_called_once_with(0.8, 1.2)
+
+    def test_dead_letters_after_max_attempts(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        self.assertFalse(policy.should_dead_letter(2))
+        self.assertTrue(policy.should_dead_letter(3))
+
+    def test_truncate_error_keeps_end_of_traceback(self):
+        policy = RetryPolicy(max_error_length=20)
+
+        self.assertEqual(policy.truncate_error('short'), 'short')
+        self.assertEqual(policy.truncate_error('x' * 30 + 'ValueError: bad'), '...xxValueError: bad')
+        self.assertEqual(policy.truncate_error(None), '')
+
+    def test_subscription_filter_admits_ordinary_messages_and_own_retry_copies(self):
+        self.assertEqual(
+            RetryPolicy.get_subscription_filter("orders"),
+            "retry_subscription IS NULL OR retry_subscription = 'orders'",
+        )
+        self.assertEqual(
+            RetryPolicy.get_subscription_filter("o'hare"),
+            "retry_subscription IS NULL OR retry_subscription = 'o''hare'",
+        )
+
+    def test_invalid_arguments_raise(self):
+        for kwargs in ({'max_attempts': 0}, {'initial_delay': 10, 'max_delay': 5}, {'multiplier': 0.5},
+                       {'jitter': 2}):
+            with self.assertRaises(ValueError):
+                RetryPolicy(**kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
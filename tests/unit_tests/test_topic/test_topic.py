@@ -1,6 +1,8 @@
 import unittest
 import json
 import uuid
+import threading
+import time
 import random
 from unittest.mock import MagicMock, patch
 from src.python_ms_core.core.topic.topic import Topic, Callback
@@ -71,6 +73,91 @@ class TestTopic(unittest.TestCase):
         mock_client.get_topic_sender.assert_called_once_with(topic_name=mock_provider.topic)
         mock_sender.send_messages.assert_called_once()
 
+    def test_publish_many(self):
+        mock_provider = MagicMock()
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        mock_batch = MagicMock()
+        mock_batch.__len__.return_value = 3
+
+        topic = Topic(config=self.mock_config, topic_name='mock_topic')
+        topic.provider = mock_provider
+        mock_provider.client = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+        mock_sender.create_message_batch.return_value = mock_batch
+
+        results = topic.publish_many(messages=[QueueMessage.data_from({'message': str(x)}) for x in range(3)])
+
+        self.assertEqual(results, [{'batch': 0, 'message_count': 3, 'success': True, 'error': None}])
+        self.assertEqual(mock_batch.add_message.call_count, 3)
+        mock_sender.send_messages.assert_called_once_with(mock_batch)
+
+    def test_publish_reuses_client_and_sender(self):
+        mock_provider = MagicMock()
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+
+        topic = Topic(config=self.mock_config, topic_name='mock_topic')
+        topic.provider = mock_provider
+        mock_provider.client = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+
+        topic.publish(data=QueueMessage.data_from({'message': 'one'}))
+        topic.publish(data=QueueMessage.data_from({'message': 'two'}))
+
+        mock_client.get_topic_sender.assert_called_once_with(topic_name=mock_provider.topic)
+        self.assertEqual(mock_sender.send_messages.call_count, 2)
+        mock_client.__exit__.assert_not_called()
+        mock_sender.close.assert_not_called()
+
+    def test_concurrent_publishes_never_overlap_on_the_shared_sender(self):
+        mock_provider = MagicMock()
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+        active_sends = []
+        overlapping_sends = []
+
+        def send_messages(message):
+            active_sends.append(message)
+            if len(active_sends) > 1:
+                overlapping_sends.append(message)
+            time.sleep(0.01)
+            active_sends.remove(message)
+
+        topic = Topic(config=self.mock_config, topic_name='mock_topic')
+        topic.provider = mock_provider
+        mock_provider.client = mock_client
+        mock_client.get_topic_sender.return_value = mock_sender
+        mock_sender.send_messages.side_effect = send_messages
+
+        publishers = [
+            threading.Thread(target=topic.publish, kwargs={'data': QueueMessage.data_from({'message': str(index)})})
+            for index in range(5)
+        ]
+        for publisher in publishers:
+            publisher.start()
+        for publisher in publishers:
+            publisher.join()
+
+        mock_client.get_topic_sender.assert_called_once_with(topic_name=mock_provider.topic)
+        self.assertEqual(mock_sender.send_messages.call_count, 5)
+        self.assertEqual(overlapping_sends, [])
+
+    def test_close_releases_sender_and_client(self):
+        mock_provider = MagicMock()
+        mock_client = MagicMock()
+        mock_sender = MagicMock()
+
+        with Topic(config=self.mock_config, topic_name='mock_topic') as topic:
+            topic.provider = mock_provider
+            mock_provider.client = mock_client
+            mock_client.get_topic_sender.return_value = mock_sender
+            topic.publish(data=QueueMessage.data_from({'message': 'one'}))
+
+        mock_sender.close.assert_called_once()
+        mock_client.close.assert_called_once()
+        self.assertIsNone(topic.sender)
+
 
 class TestCallback(unittest.TestCase):
 
@@ -84,6 +171,19 @@ class TestCallback(unittest.TestCase):
         self.mock_provider.client.get_subscription_receiver.return_value = self.mock_topic_receiver
         self.mock_topic_receiver.receive_messages.return_value = [self.mock_message]
 
+    def test_start_listening_keeps_client_open(self):
+        self.mock_topic_receiver.receive_messages.side_effect = [[], KeyboardInterrupt()]
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.callback.start_listening(self.mock_provider, 'mock_topic', 'mock_subscription')
+
+        self.mock_provider.client.get_subscription_receiver.assert_called_once_with(
+            topic_name='mock_topic',
+            subscription_name='mock_subscription'
+        )
+        self.mock_provider.client.__enter__.assert_not_called()
+        self.mock_provider.client.close.assert_not_called()
+
     def test_renew_message_lock(self):
         self.mock_message._lock_expired = False
         self.callback._renewal_interval = 0  # For fast testing
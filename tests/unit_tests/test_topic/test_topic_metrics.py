@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from src.python_ms_core.core.topic.topic_metrics import Histogram, TopicMetrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_snapshot_reports_count_sum_and_range(self):
+        histogram = Histogram(bounds=(1, 2, 5))
+        for value in (0.5, 1.5, 4, 10):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        self.assertEqual(snapshot['count'], 4)
+        self.assertEqual(snapshot['sum'], 16)
+        self.assertEqual(snapshot['min'], 0.5)
+        self.assertEqual(snapshot['max'], 10)
+        self.assertEqual(snapshot['avg'], 4)
+        self.assertEqual(snapshot['buckets'], {'1': 1, '2': 1, '5': 1, '+Inf': 1})
+
+    def test_percentiles_use_bucket_bounds_clamped_to_observed_values(self):
+        histogram = Histogram(bounds=(1, 2, 5))
+        for value in [0.5] * 90 + [4] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(95), 4)
+        self.assertEqual(histogram.percentile(99), 4)
+
+    def test_empty_histogram_has_no_percentiles(self):
+        snapshot = Histogram().snapshot()
+
+        self.assertEqual(snapshot['count'], 0)
+        self.assertIsNone(snapshot['p50'])
+        self.assertIsNone(snapshot['avg'])
+
+
+class TestTopicMetrics(unittest.TestCase):
+    @patch('src.python_ms_core.core.topic.topic_metrics.time.monotonic')
+    def test_records_every_stage_of_a_message(self, mock_monotonic):
+        metrics = TopicMetrics()
+        message = MagicMock(enqueued_time_utc=datetime.now(timezone.utc) - timedelta(seconds=30))
+
+        mock_monotonic.return_value = 100.0
+        metrics.on_received(message)
+        mock_monotonic.return_value = 100.5
+        metrics.on_started(message)
+        mock_monotonic.return_value = 103.5
+        metrics.on_finished(message)
+        metrics.on_settled(message, 'completed', settlement_latency=0.02, lock_renewals=2)
+
+        snapshot = metrics.snapshot()
+        histograms = snapshot['histograms']
+        self.assertAlmostEqual(histograms['queue_time']['max'], 30, delta=1)
+        self.assertEqual(histograms['start_delay']['sum'], 0.5)
+        self.assertEqual(histograms['callback_duration']['sum'], 3.0)
+        self.assertEqual(histograms['settlement_latency']['sum'], 0.02)
+        self.assertEqual(histograms['lock_renewals']['sum'], 2)
+        self.assertEqual(snapshot['outcomes']['completed'], 1)
+        self.assertEqual(metrics._in_flight, {})
+
+    def test_message_without_enqueued_time_skips_queue_time(self):
+        metrics = TopicMetrics()
+        message = MagicMock(enqueued_time_utc=None)
+
+        metrics.on_received(message)
+        metrics.on_settled(message, 'dropped')
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['histograms']['queue_time']['count'], 0)
+        self.assertEqual(snapshot['histograms']['settlement_latency']['count'], 0)
+        self.assertEqual(snapshot['outcomes']['dropped'], 1)
+
+    def test_reset_clears_histograms_and_outcomes(self):
+        metrics = TopicMetrics()
+        message = MagicMock(enqueued_time_utc=None)
+        metrics.on_received(message)
+        metrics.on_settled(message, 'abandoned', settlement_latency=0.1)
+
+        metrics.reset()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['outcomes']['abandoned'], 0)
+        self.assertEqual(snapshot['histograms']['settlement_latency']['count'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import multiprocessing as mp
+import os
+import time
+import unittest
+
+from src.python_ms_core.core.topic.worker_pool import CallbackWorkerPool
+from src.python_ms_core.core.topic.batch_callback import run_batch_callback
+
+
+def _successful_callback(message):
+    return message
+
+
+def _failing_callback(message):
+    raise ValueError('callback boom')
+
+
+def _crashing_callback(message):
+    os._exit(3)
+
+
+def _hanging_callback(message):
+    time.sleep(60)
+
+
+def _mark_worker_initialized():
+    os.environ['CALLBACK_WORKER_INITIALIZED'] = str(os.getpid())
+
+
+def _failing_initializer():
+    raise RuntimeError('model download failed')
+
+
+def _initialized_pid_callback(message):
+    if os.environ.get('CALLBACK_WORKER_INITIALIZED') != str(os.getpid()):
+        raise RuntimeError('worker was not initialized')
+
+
+def _first_message_only_callback(messages):
+    return [True] + [False] * (len(messages) - 1)
+
+
+@unittest.skipUnless('fork' in mp.get_all_start_methods(), 'fork start method is required')
+class TestCallbackWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.process_context = mp.get_context('fork')
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _run_task(self, payload='{"message":"hello"}'):
+        task = self.pool.submit(payload)
+        return task.result()
+
+    def test_start_prefork_workers(self):
+        self.pool = CallbackWorkerPool(self.process_context, _successful_callback, size=2)
+        self.pool.start()
+
+        self.assertEqual(len(self.pool._workers), 2)
+        self.assertTrue(all(worker.process.is_alive() for worker in self.pool._workers))
+
+    def test_worker_is_reused_across_messages(self):
+        self.pool = CallbackWorkerPool(self.process_context, _successful_callback, size=1)
+        self.pool.start()
+        first_pid = self.pool._workers[0].process.pid
+
+        self.assertEqual(self._run_task(), {'success': True, 'error': None})
+        self.assertEqual(self._run_task(), {'success': True, 'error': None})
+
+        self.assertEqual(self.pool._workers[0].process.pid, first_pid)
+
+    def test_callback_failure_returns_error_payload(self):
+        self.pool = CallbackWorkerPool(self.process_context, _failing_callback, size=1)
+        self.pool.start()
+
+        result = self._run_task()
+
+        self.assertFalse(result['success'])
+        self.assertIn('callback boom', result['error'])
+        self.assertTrue(self.pool._workers[0].process.is_alive())
+
+    def test_crashed_worker_is_reported_and_replaced(self):
+        self.pool = CallbackWorkerPool(self.process_context, _crashing_callback, size=1)
+        self.pool.start()
+        crashed_pid = self.pool._workers[0].process.pid
+
+        result = self._run_task()
+
+        self.assertEqual(result, {
+            'success': False,
+            'error': 'Callback worker exited with code 3 without returning a result.',
+        })
+        self.assertEqual(len(self.pool._workers), 1)
+        self.assertNotEqual(self.pool._workers[0].process.pid, crashed_pid)
+
+    def test_worker_is_recycled_after_max_messages(self):
+        self.pool = CallbackWorkerPool(self.process_context, _successful_callback, size=1, max_messages_per_worker=2)
+        self.pool.start()
+        first_pid = self.pool._workers[0].process.pid
+
+        self._run_task()
+        self.assertEqual(self.pool._workers[0].process.pid, first_pid)
+        self._run_task()
+
+        self.assertEqual(len(self.pool._workers), 1)
+        self.assertNotEqual(self.pool._workers[0].process.pid, first_pid)
+
+    def test_submit_after_shutdown_raises(self):
+        self.pool = CallbackWorkerPool(self.process_context, _successful_callback, size=1)
+        self.pool.start()
+        workers = list(self.pool._workers)
+
+        self.pool.shutdown()
+
+        self.assertFalse(any(worker.process.is_alive() for worker in workers))
+        with self.assertRaises(RuntimeError):
+            self.pool.submit('{"message":"hello"}')
+
+    def test_worker_uses_runner_when_given(self):
+        self.pool = CallbackWorkerPool(
+            self.process_context, _first_message_only_callback, size=1, runner=run_batch_callback,
+        )
+        self.pool.start()
+
+        result = self._run_task(['{"message":"first"}', '{"message":"second"}'])
+
+        self.assertEqual(result['results'], [True, False])
+        self.assertFalse(result['success'])
+
+    def test_terminate_kills_overdue_worker_and_starts_replacement(self):
+        self.pool = CallbackWorkerPool(self.process_context, _hanging_callback, size=1)
+        self.pool.start()
+        hung_process = self.pool._workers[0].process
+
+        task = self.pool.submit('{"message":"hello"}')
+
+        self.assertTrue(task.terminate())
+        self.assertFalse(hung_process.is_alive())
+        self.assertTrue(task.result()['timed_out'])
+        self.assertEqual(len(self.pool._workers), 1)
+        self.assertIsNot(self.pool._workers[0].process, hung_process)
+
+    def test_initializer_runs_in_worker_before_callbacks(self):
+        self.pool = CallbackWorkerPool(
+            self.process_context, _initialized_pid_callback, size=1, initializer=_mark_worker_initialized,
+        )
+        self.pool.start()
+
+        self.assertEqual(self._run_task(), {'success': True, 'error': None})
+        self.assertEqual(self._run_task(), {'success': True, 'error': None})
+        self.assertNotIn('CALLBACK_WORKER_INITIALIZED', os.environ)
+
+    def test_initializer_failure_fails_messages_without_crashing_worker(self):
+        self.pool = CallbackWorkerPool(self.process_context, _successful_callback, size=1, initializer=_failing_initializer)
+        self.pool.start()
+
+        result = self._run_task()
+
+        self.assertFalse(result['success'])
+        self.assertIn('Callback worker initialization failed', result['error'])
+        self.assertIn('model download failed', result['error'])
+        self.assertTrue(self.pool._workers[0].process.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()